@@ -0,0 +1 @@
+"""Benchmarks that measure the performance of the application against a database."""
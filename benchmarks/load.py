@@ -0,0 +1,370 @@
+"""Load-tests the sync and the async actor stack and saves the results as JSON.
+
+Run the benchmark with `uv run python -m benchmarks.load`. Every stack is served by
+its own uvicorn process and receives a mix of create, read, patch and delete requests
+from a fixed number of concurrent clients, one concurrency level after the other.
+
+By default both stacks run on a temporary SQLite database, see `benchmarks.load_app`.
+Pass `--database postgresql` to serve `myapi.main` against the migrated PostgreSQL
+database that is configured through the usual `DATABASE_*` environment variables.
+The results are written to `--output`, by default `benchmarks/results/`, so runs of
+different commits can be compared.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import pathlib
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Optional
+
+import httpx
+
+STACKS = {"sync": "/actors", "async": "/async/actors"}
+OPERATIONS = ("create", "read", "patch", "delete")
+APPLICATIONS = {
+    "sqlite": "benchmarks.load_app:app",
+    "postgresql": "myapi.main:app",
+}
+
+
+class Workload:
+    """Sends a random mix of requests to one actor stack and records their latency.
+
+    Args:
+        client (httpx.AsyncClient): Client of the application under test.
+        prefix (str): Path prefix of the actor stack.
+        mix (dict[str, int]): Relative weight of every operation.
+        actor_ids (list[int]): IDs of existing actors that are read and patched.
+        seed (int): Seed of the random choices, for reproducible runs.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        prefix: str,
+        mix: dict[str, int],
+        actor_ids: list[int],
+        seed: int,
+    ) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.actor_ids = actor_ids
+        self.created_actor_ids: list[int] = []
+        self.random = random.Random(seed)
+        self.latencies: list[float] = []
+        self.counts = dict.fromkeys(OPERATIONS, 0)
+        self.errors = 0
+
+    async def run(self, concurrency: int, duration: float) -> None:
+        deadline = time.perf_counter() + duration
+
+        await asyncio.gather(*(self._run_client(deadline) for _ in range(concurrency)))
+
+    async def _run_client(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            (operation,) = self.random.choices(self.operations, self.weights)
+
+            # Only actors created by the workload are deleted, so reads do not miss.
+            if operation == "delete" and not self.created_actor_ids:
+                operation = "create"
+
+            start = time.perf_counter()
+            response = await self._send(operation)
+            self.latencies.append(time.perf_counter() - start)
+            self.counts[operation] += 1
+
+            if response.is_error:
+                self.errors += 1
+            elif operation == "create":
+                self.created_actor_ids.append(response.json()["actor_id"])
+
+    async def _send(self, operation: str) -> httpx.Response:
+        if operation == "create":
+            return await self.client.post(
+                f"{self.prefix}/", json={"first_name": "Load", "last_name": "Test"}
+            )
+
+        if operation == "delete":
+            actor_id = self.created_actor_ids.pop()
+
+            return await self.client.delete(f"{self.prefix}/{actor_id}")
+
+        actor_id = self.random.choice(self.actor_ids)
+
+        if operation == "patch":
+            return await self.client.patch(
+                f"{self.prefix}/{actor_id}",
+                json={"first_name": f"Load{self.random.randrange(1000)}"},
+            )
+
+        return await self.client.get(f"{self.prefix}/{actor_id}")
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+
+    return sorted_values[index]
+
+
+def pool_wait_samples(metrics: str, stack: str) -> dict[str, float]:
+    """Returns the count and the sum of the pool wait of a stack from `GET /metrics`."""
+
+    samples = {}
+
+    for field in ("count", "sum"):
+        prefix = f'database_pool_wait_seconds_{field}{{engine="{stack}"}} '
+
+        for line in metrics.splitlines():
+            if line.startswith(prefix):
+                samples[field] = float(line.removeprefix(prefix))
+
+    return samples
+
+
+def pool_wait(before: str, after: str, stack: str) -> dict[str, Optional[float]]:
+    """Returns the pool wait of a stack between two responses of `GET /metrics`."""
+
+    before_samples = pool_wait_samples(before, stack)
+    after_samples = pool_wait_samples(after, stack)
+
+    if not after_samples:
+        return {"checkouts": None, "mean_ms": None, "total_s": None}
+
+    checkouts = int(after_samples["count"] - before_samples.get("count", 0))
+    total = after_samples["sum"] - before_samples.get("sum", 0)
+
+    return {
+        "checkouts": checkouts,
+        "mean_ms": total / checkouts * 1000 if checkouts else 0.0,
+        "total_s": total,
+    }
+
+
+async def run_stack(
+    base_url: str, stack: str, arguments: argparse.Namespace
+) -> list[dict[str, Any]]:
+    prefix = STACKS[stack]
+    limits = httpx.Limits(max_connections=max(arguments.concurrency))
+
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+        response = await client.post(
+            f"{prefix}/bulk",
+            json=[{"first_name": "Load", "last_name": "Seed"}] * arguments.actors,
+        )
+        actor_ids = response.raise_for_status().json()["actor_ids"]
+        results = []
+
+        for concurrency in arguments.concurrency:
+            workload = Workload(
+                client, prefix, arguments.mix, actor_ids, arguments.seed
+            )
+            before = (await client.get("/metrics")).text
+            await workload.run(concurrency, arguments.duration)
+            after = (await client.get("/metrics")).text
+
+            latencies = sorted(workload.latencies)
+            results.append(
+                {
+                    "concurrency": concurrency,
+                    "requests": len(latencies),
+                    "errors": workload.errors,
+                    "operations": workload.counts,
+                    "throughput_rps": len(latencies) / arguments.duration,
+                    "latency_ms": {
+                        "mean": statistics.fmean(latencies) * 1000,
+                        "p50": percentile(latencies, 0.50) * 1000,
+                        "p95": percentile(latencies, 0.95) * 1000,
+                        "p99": percentile(latencies, 0.99) * 1000,
+                    },
+                    "pool_wait": pool_wait(before, after, stack),
+                }
+            )
+
+        return results
+
+
+def peak_rss_mib(pid: int) -> Optional[float]:
+    """Returns the peak resident set size of a process, if the platform reports it."""
+
+    try:
+        status = pathlib.Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+
+    for line in status.splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+
+    return None
+
+
+def free_port() -> int:
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+
+        return listener.getsockname()[1]
+
+
+def serve_and_run(
+    stack: str, arguments: argparse.Namespace, environment: dict[str, str]
+) -> dict[str, Any]:
+    """Starts a server process for one stack, runs all concurrency levels, stops it."""
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            APPLICATIONS[arguments.database],
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=environment,
+    )
+
+    try:
+        wait_until_ready(base_url, server)
+        levels = asyncio.run(run_stack(base_url, stack, arguments))
+        rss = peak_rss_mib(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {"stack": stack, "peak_rss_mib": rss, "levels": levels}
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"The server exited with code {server.returncode}")
+
+        try:
+            httpx.get(f"{base_url}/").raise_for_status()
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+    raise TimeoutError(f"The server did not start within {timeout} seconds")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+
+    for item in value.split(","):
+        operation, _, weight = item.partition("=")
+
+        if operation not in OPERATIONS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid operation weight '{item}'")
+
+        mix[operation] = int(weight)
+
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", choices=APPLICATIONS, default="sqlite")
+    parser.add_argument("--stacks", nargs="+", choices=STACKS, default=list(STACKS))
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 8, 32],
+        help="comma-separated numbers of concurrent clients",
+    )
+    parser.add_argument("--duration", type=float, default=10, help="seconds per level")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default="create=1,read=7,patch=1,delete=1",
+        help="comma-separated relative weights of the operations",
+    )
+    parser.add_argument("--actors", type=int, default=1000, help="actors to seed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=pathlib.Path)
+    arguments = parser.parse_args()
+
+    commit = git_commit()
+    output = arguments.output or pathlib.Path(
+        "benchmarks", "results", f"load-{commit or 'unknown'}-{arguments.database}.json"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        environment = {**os.environ}
+
+        if arguments.database == "sqlite":
+            # The stacks are served one after the other, so they share one file.
+            environment["BENCHMARK_SQLITE_PATH"] = str(
+                pathlib.Path(directory) / "load.db"
+            )
+
+        stacks = [
+            serve_and_run(stack, arguments, environment) for stack in arguments.stacks
+        ]
+
+    report = {
+        "commit": commit,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "database": arguments.database,
+        "duration_s": arguments.duration,
+        "mix": arguments.mix,
+        "seeded_actors": arguments.actors,
+        "stacks": stacks,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+
+    print(
+        f"{'stack':<7}{'clients':>8}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'wait ms':>9}{'errors':>8}{'RSS MiB':>9}"
+    )
+
+    for stack in stacks:
+        for level in stack["levels"]:
+            latency = level["latency_ms"]
+            wait = level["pool_wait"]["mean_ms"]
+            print(
+                f"{stack['stack']:<7}{level['concurrency']:>8}"
+                f"{level['throughput_rps']:>10.0f}{latency['p50']:>9.1f}"
+                f"{latency['p95']:>9.1f}{latency['p99']:>9.1f}"
+                f"{wait if wait is not None else float('nan'):>9.2f}"
+                f"{level['errors']:>8}{stack['peak_rss_mib'] or float('nan'):>9.0f}"
+            )
+
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
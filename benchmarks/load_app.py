@@ -0,0 +1,11 @@
+"""The application with both actor stacks on a SQLite database, for `benchmarks.load`.
+
+The database file is read from the `BENCHMARK_SQLITE_PATH` environment variable, see
+`myapi.local` for the engines.
+"""
+
+import os
+
+from myapi import local
+
+app = local.create_app(os.environ["BENCHMARK_SQLITE_PATH"])
@@ -0,0 +1,149 @@
+"""Measures throughput and memory of reading many actors through the actor mapper.
+
+Run the benchmark with `uv run python -m benchmarks.row_mapping`. By default it reads
+1,000,000 rows from a temporary SQLite database, pass `--database-url` to run it
+against PostgreSQL. The `orm` row reads the same rows as ORM entities and copies
+them into actors, which is what the mapper did before reads were mapped from rows.
+"""
+
+import argparse
+import gc
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+import sqlalchemy
+from sqlalchemy import orm
+
+from myapi.actors import queries, service
+from myapi.shared.database import models
+
+# Last name of the benchmark actors, used to remove them from the database afterwards.
+MARKER = "benchmark-row-mapping"
+
+
+def read_orm_entities(session: orm.Session) -> int:
+    db_actors = session.scalars(sqlalchemy.select(models.Actor))
+    actors = [
+        service.Actor(
+            actor_id=db_actor.id,
+            first_name=db_actor.first_name,
+            last_name=db_actor.last_name,
+        )
+        for db_actor in db_actors
+    ]
+
+    return len(actors)
+
+
+def read_actors(session: orm.Session) -> int:
+    return len(queries.SQLAlchemyActorMapper(session).read_actors())
+
+
+def stream_actors(session: orm.Session, batch_size: int) -> int:
+    return sum(
+        len(actors)
+        for actors in queries.SQLAlchemyActorMapper(session).stream_actors(batch_size)
+    )
+
+
+def measure(
+    sessionmaker: orm.sessionmaker, read: Callable[[orm.Session], int]
+) -> tuple[int, float, float]:
+    """Reads the actors twice, once for the wall time and once for the peak memory.
+
+    Returns:
+        tuple[int, float, float]: Number of actors, seconds and peak MiB allocated.
+    """
+
+    gc.collect()
+
+    with sessionmaker() as session:
+        start = time.perf_counter()
+        rows = read(session)
+        seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        with sessionmaker() as session:
+            read(session)
+
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return rows, seconds, peak / 2**20
+
+
+def insert_rows(sessionmaker: orm.sessionmaker, rows: int) -> None:
+    batch_size = 10_000
+
+    for offset in range(0, rows, batch_size):
+        with sessionmaker.begin() as session:
+            session.execute(
+                sqlalchemy.insert(models.actor_table),
+                [
+                    {"first_name": f"Actor{index}", "last_name": MARKER}
+                    for index in range(offset, min(offset + batch_size, rows))
+                ],
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="URL of the benchmark database")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    arguments = parser.parse_args()
+
+    paths: dict[str, Callable[[orm.Session], int]] = {
+        "orm": read_orm_entities,
+        "read_actors": read_actors,
+        "stream_actors": lambda session: stream_actors(session, arguments.batch_size),
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = arguments.database_url or (
+            f"sqlite:///{pathlib.Path(directory) / 'benchmark.db'}"
+        )
+        engine = sqlalchemy.create_engine(database_url)
+        models.Actor.metadata.create_all(engine)
+        sessionmaker = orm.sessionmaker(engine, expire_on_commit=False)
+
+        try:
+            insert_rows(sessionmaker, arguments.rows)
+            results = {
+                name: measure(sessionmaker, read) for name, read in paths.items()
+            }
+        finally:
+            with sessionmaker.begin() as session:
+                session.execute(
+                    sqlalchemy.delete(models.Actor).where(
+                        models.Actor.last_name == MARKER
+                    )
+                )
+
+            engine.dispose()
+
+    actor = service.Actor(1, "First", "Last")
+    actor_size = sys.getsizeof(actor)
+
+    if hasattr(actor, "__dict__"):
+        actor_size += sys.getsizeof(vars(actor))
+
+    print(f"size of one actor without its values: {actor_size} bytes")
+    print(f"{'path':<16}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'peak MiB':>10}")
+
+    for name, (rows, seconds, peak) in results.items():
+        print(
+            f"{name:<16}{rows:>10}{seconds:>10.2f}{rows / seconds:>12.0f}{peak:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
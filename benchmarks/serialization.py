@@ -0,0 +1,97 @@
+"""Compares the CPU time of the default and the fast JSON response path per response.
+
+Run the benchmark with `uv run python -m benchmarks.serialization`. The default path
+mirrors what FastAPI does with a `response_model`: the returned dataclasses are
+converted to dictionaries, validated into the response model, serialized and
+encoded with the standard library. The fast path encodes the dataclasses directly,
+with orjson if it is installed.
+"""
+
+import argparse
+import dataclasses
+import json
+import time
+from typing import Any, Callable
+
+import pydantic
+
+from myapi.actors import schemas, service
+from myapi.shared import serialization
+
+
+def encode_with_response_model(
+    adapter: pydantic.TypeAdapter[Any], content: Any
+) -> bytes:
+    if dataclasses.is_dataclass(content) and not isinstance(content, type):
+        content = dataclasses.asdict(content)
+    else:
+        content = {
+            **content,
+            "actors": [dataclasses.asdict(actor) for actor in content["actors"]],
+        }
+
+    validated = adapter.validate_python(content)
+
+    return json.dumps(
+        adapter.dump_python(validated, mode="json"),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode()
+
+
+def measure(encode: Callable[[], bytes], repetitions: int) -> float:
+    """Encodes the same response repeatedly.
+
+    Returns:
+        float: CPU time per response in microseconds.
+    """
+
+    start = time.process_time()
+
+    for _ in range(repetitions):
+        encode()
+
+    return (time.process_time() - start) / repetitions * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repetitions", type=int, default=10_000)
+    arguments = parser.parse_args()
+
+    actors = [
+        service.Actor(actor_id, f"First{actor_id}", f"Last{actor_id}")
+        for actor_id in range(1, 1001)
+    ]
+    payloads: dict[str, tuple[pydantic.TypeAdapter[Any], Any]] = {
+        "1 actor": (pydantic.TypeAdapter(schemas.ReadActorResponse), actors[0]),
+        "1000 actors": (
+            pydantic.TypeAdapter(schemas.ReadActorsResponse),
+            {"actors": actors, "next": None, "missing_actor_ids": []},
+        ),
+    }
+    encoder = "orjson" if serialization.orjson is not None else "json"
+
+    print(f"fast path encoder: {encoder}")
+    print(f"{'payload':<14}{'default us':>12}{'fast us':>12}{'speed-up':>10}")
+
+    for name, (adapter, content) in payloads.items():
+        # Larger payloads are encoded less often to keep the run time in check.
+        size = 1 if dataclasses.is_dataclass(content) else len(content["actors"])
+        repetitions = max(arguments.repetitions // size, 10)
+
+        assert json.loads(encode_with_response_model(adapter, content)) == json.loads(
+            serialization.dumps(content)
+        )
+
+        default = measure(
+            lambda: encode_with_response_model(adapter, content), repetitions
+        )
+        fast = measure(lambda: serialization.dumps(content), repetitions)
+
+        print(f"{name:<14}{default:>12.1f}{fast:>12.1f}{default / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
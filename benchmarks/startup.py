@@ -0,0 +1,93 @@
+"""Measures the cold start of the application: import time and time to first request.
+
+Run the benchmark with `uv run python -m benchmarks.startup`. Every run starts a fresh
+interpreter that imports `myapi.main`, runs the application lifespan and sends a first
+request to `--path`. The database is configured through the usual `DATABASE_*`
+environment variables; the default path `/` does not connect to the database.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PHASES = ("import", "startup", "first_request", "process")
+
+# Engines are created on startup, but only connect to the database on the first query.
+DEFAULT_ENVIRONMENT = {
+    "DATABASE_HOST": "127.0.0.1",
+    "DATABASE_USER": "postgres",
+    "DATABASE_PASSWORD": "postgrespassword",
+}
+
+
+def measure_once(path: str) -> dict[str, float]:
+    """Measures the phases of a cold start in the current interpreter.
+
+    Returns:
+        dict[str, float]: Elapsed wall time of each phase in seconds.
+    """
+
+    start = time.perf_counter()
+    main = importlib.import_module("myapi.main")
+    imported = time.perf_counter()
+
+    from fastapi import testclient
+
+    with testclient.TestClient(main.app) as client:
+        started = time.perf_counter()
+        client.get(path).raise_for_status()
+        responded = time.perf_counter()
+
+    return {
+        "import": imported - start,
+        "startup": started - imported,
+        "first_request": responded - started,
+    }
+
+
+def measure_process(path: str) -> dict[str, float]:
+    """Measures a cold start in a fresh interpreter, including the interpreter startup.
+
+    Returns:
+        dict[str, float]: Elapsed wall time of each phase in seconds.
+    """
+
+    environment = {**DEFAULT_ENVIRONMENT, **os.environ}
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--once", "--path", path],
+        env=environment,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    return {**json.loads(output), "process": time.perf_counter() - start}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/", help="path of the first request")
+    parser.add_argument("--once", action="store_true", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.once:
+        print(json.dumps(measure_once(arguments.path)))
+        return
+
+    runs = [measure_process(arguments.path) for _ in range(arguments.runs)]
+
+    print(f"{'phase':<16}{'median ms':>12}{'max ms':>12}")
+    for phase in PHASES:
+        timings = [run[phase] * 1000 for run in runs]
+        print(f"{phase:<16}{statistics.median(timings):>12.1f}{max(timings):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
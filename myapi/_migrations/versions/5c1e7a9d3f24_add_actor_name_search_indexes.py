@@ -0,0 +1,54 @@
+"""add actor name search indexes
+
+Revision ID: 5c1e7a9d3f24
+Revises: 8d3b9e51a7c2
+Create Date: 2026-10-18 11:02:17.284915
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c1e7a9d3f24"
+down_revision: Union[str, None] = "8d3b9e51a7c2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The extension is left installed on downgrade, other objects may depend on it.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "actor_first_name_trgm_idx",
+        "actor",
+        ["first_name"],
+        postgresql_using="gin",
+        postgresql_ops={"first_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "actor_last_name_trgm_idx",
+        "actor",
+        ["last_name"],
+        postgresql_using="gin",
+        postgresql_ops={"last_name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "actor_lower_first_name_pattern_idx",
+        "actor",
+        [sa.text("lower(first_name) text_pattern_ops")],
+    )
+    op.create_index(
+        "actor_lower_last_name_pattern_idx",
+        "actor",
+        [sa.text("lower(last_name) text_pattern_ops")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("actor_lower_last_name_pattern_idx", table_name="actor")
+    op.drop_index("actor_lower_first_name_pattern_idx", table_name="actor")
+    op.drop_index("actor_last_name_trgm_idx", table_name="actor")
+    op.drop_index("actor_first_name_trgm_idx", table_name="actor")
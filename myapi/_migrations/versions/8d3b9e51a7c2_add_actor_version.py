@@ -0,0 +1,30 @@
+"""add actor version
+
+Revision ID: 8d3b9e51a7c2
+Revises: 2fc5672004b8
+Create Date: 2026-10-18 09:12:41.503218
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8d3b9e51a7c2"
+down_revision: Union[str, None] = "2fc5672004b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The server default fills the version of existing actors without a rewrite.
+    op.add_column(
+        "actor",
+        sa.Column("version", sa.INTEGER(), server_default=sa.text("1"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("actor", "version")
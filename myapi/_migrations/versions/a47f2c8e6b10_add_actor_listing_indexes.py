@@ -0,0 +1,43 @@
+"""add actor listing indexes
+
+Revision ID: a47f2c8e6b10
+Revises: 5c1e7a9d3f24
+Create Date: 2026-10-18 13:26:51.730462
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a47f2c8e6b10"
+down_revision: Union[str, None] = "5c1e7a9d3f24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The names are collated by code point, as they are compared by the listings.
+    op.create_index(
+        "actor_last_name_first_name_id_idx",
+        "actor",
+        [
+            sa.text('last_name COLLATE "C"'),
+            sa.text('first_name COLLATE "C"'),
+            "id",
+        ],
+    )
+    op.create_index(
+        "actor_last_name_id_idx", "actor", [sa.text('last_name COLLATE "C"'), "id"]
+    )
+    op.create_index(
+        "actor_first_name_id_idx", "actor", [sa.text('first_name COLLATE "C"'), "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("actor_first_name_id_idx", table_name="actor")
+    op.drop_index("actor_last_name_id_idx", table_name="actor")
+    op.drop_index("actor_last_name_first_name_id_idx", table_name="actor")
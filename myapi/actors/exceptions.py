@@ -9,3 +9,21 @@ class ActorNotFoundError(Exception):
         self.actor_id = actor_id
 
         super().__init__(f"Actor with ID '{self.actor_id}' does not exist")
+
+
+class ActorVersionMismatchError(Exception):
+    """Raised if an actor exists, but not in one of the expected versions.
+
+    Args:
+        actor_id (int): Primary key of the actor to be modified.
+        version (int): Current version of the actor.
+    """
+
+    def __init__(self, actor_id: int, version: int) -> None:
+        self.actor_id = actor_id
+        self.version = version
+
+        super().__init__(
+            f"Actor with ID '{self.actor_id}' has been modified, "
+            f"its current version is {self.version}"
+        )
@@ -1,12 +1,36 @@
+import itertools
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    ContextManager,
+    Iterable,
+    Iterator,
+    NoReturn,
+    Optional,
+    Sequence,
+)
+
+import sqlalchemy
 from sqlalchemy import orm
 
 from myapi.actors import exceptions, service
-from myapi.shared.database import models
+from myapi.shared.database import expressions, identifiers, models, statements
+
+# Rows that are inserted per statement by imports into databases without `COPY`.
+IMPORT_BATCH_SIZE = 1000
+# Columns that an import writes, in the order of the imported names.
+IMPORT_COLUMNS = ("first_name", "last_name")
 
 
 class SQLAlchemyActorMapper(service.ActorMapper):
-    def __init__(self, database_session: orm.Session) -> None:
+    def __init__(
+        self,
+        database_session: orm.Session,
+        id_allocator: Optional[identifiers.IdentifierAllocator] = None,
+    ) -> None:
         self._db = database_session
+        self._id_allocator = id_allocator
 
     def create_actor(self, first_name: str, last_name: str) -> service.Actor:
         """Creates a new actor in the database and returns its primary key.
@@ -19,17 +43,124 @@ class SQLAlchemyActorMapper(service.ActorMapper):
             actor.Actor: Instance of the created actor.
         """
 
-        db_actor = models.Actor(first_name=first_name, last_name=last_name)
+        if self._id_allocator is not None:
+            actor_ids = self._id_allocator.allocate()
+
+            return self._insert_actors(actor_ids, [(first_name, last_name)])[0]
+
+        statement = (
+            sqlalchemy.insert(models.actor_table)
+            .values(first_name=first_name, last_name=last_name)
+            .returning(*statements.ACTOR_COLUMNS)
+        )
+        result = self._db.execute(statement)
+
+        return service.Actor(*result.one())
+
+    def create_actors(self, names: Sequence[tuple[str, str]]) -> list[service.Actor]:
+        """Creates many new actors in the database and returns them in input order.
+
+        All actors are written with one multi-row `INSERT ... RETURNING` statement per
+        page of rows instead of one statement per actor. With an identifier
+        allocator, their primary keys are known in advance and the rows are inserted
+        without `RETURNING`, which lets the driver pipeline them.
+
+        Args:
+            names (Sequence[tuple[str, str]]): First and last names of the actors to be
+                created.
+
+        Returns:
+            list[service.Actor]: Instances of the created actors in the order of the
+                given names.
+        """
+
+        if not names:
+            return []
+
+        if self._id_allocator is not None:
+            actor_ids = self._id_allocator.allocate(len(names))
+
+            return self._insert_actors(actor_ids, names)
 
-        self._db.add(db_actor)
-        self._db.flush()
+        statement = sqlalchemy.insert(models.actor_table).returning(
+            *statements.ACTOR_COLUMNS, sort_by_parameter_order=True
+        )
+        parameters = [
+            {"first_name": first_name, "last_name": last_name}
+            for first_name, last_name in names
+        ]
+        rows = self._db.execute(statement, parameters).all()
+
+        return statements.to_actors(service.Actor, rows)
 
-        return service.Actor(
-            actor_id=db_actor.id,
-            first_name=db_actor.first_name,
-            last_name=db_actor.last_name,
+    def _insert_actors(
+        self, actor_ids: Sequence[int], names: Sequence[tuple[str, str]]
+    ) -> list[service.Actor]:
+        actors = [
+            service.Actor(actor_id, first_name, last_name, models.INITIAL_VERSION)
+            for actor_id, (first_name, last_name) in zip(actor_ids, names)
+        ]
+        self._db.execute(
+            sqlalchemy.insert(models.actor_table),
+            [
+                {
+                    "id": actor.actor_id,
+                    "first_name": actor.first_name,
+                    "last_name": actor.last_name,
+                }
+                for actor in actors
+            ],
         )
 
+        return actors
+
+    def import_actors(self, names: Iterable[tuple[str, str]]) -> int:
+        """Streams new actors into the database without returning them.
+
+        On PostgreSQL, the rows are sent with a single `COPY ... FROM STDIN` as they
+        are read, which skips the planning and the round trip of a statement per row
+        and holds only a small buffer of rows in memory. Other databases insert them
+        in batches of `IMPORT_BATCH_SIZE` rows.
+
+        Args:
+            names (Iterable[tuple[str, str]]): First and last names of the actors to
+                be created.
+
+        Returns:
+            int: Number of created actors.
+        """
+
+        if self._db.get_bind().dialect.name != "postgresql":
+            return self._insert_in_batches(names)
+
+        count = 0
+        dbapi_connection = self._db.connection().connection.driver_connection
+        # Only the connection of an invalidated session lacks its driver connection.
+        assert dbapi_connection is not None
+        statement = (
+            f"COPY {models.actor_table.name} ({', '.join(IMPORT_COLUMNS)}) FROM STDIN"
+        )
+
+        with dbapi_connection.cursor() as cursor, cursor.copy(statement) as copy:
+            for name in names:
+                copy.write_row(name)
+                count += 1
+
+        return count
+
+    def _insert_in_batches(self, names: Iterable[tuple[str, str]]) -> int:
+        count = 0
+        statement = sqlalchemy.insert(models.actor_table)
+        names = iter(names)
+
+        while batch := list(itertools.islice(names, IMPORT_BATCH_SIZE)):
+            self._db.execute(
+                statement, [dict(zip(IMPORT_COLUMNS, name)) for name in batch]
+            )
+            count += len(batch)
+
+        return count
+
     def read_actors(self) -> list[service.Actor]:
         """Returns all actors from the database in a list.
 
@@ -37,16 +168,140 @@ class SQLAlchemyActorMapper(service.ActorMapper):
             list[actor.Actor]: List of actor instances.
         """
 
-        db_actors = self._db.query(models.Actor).all()
+        rows = self._db.execute(sqlalchemy.select(*statements.ACTOR_COLUMNS))
 
-        return [
-            service.Actor(
-                actor_id=db_actor.id,
-                first_name=db_actor.first_name,
-                last_name=db_actor.last_name,
-            )
-            for db_actor in db_actors
-        ]
+        return statements.to_actors(service.Actor, rows)
+
+    def read_actors_page(
+        self, limit: int, after_actor_id: Optional[int] = None
+    ) -> service.ActorPage:
+        """Returns a page of actors that follow the given primary key.
+
+        The page is selected with a keyset on the primary key instead of an offset,
+        so every page costs a single index range scan regardless of its position.
+
+        Args:
+            limit (int): Maximum number of actors on the page.
+            after_actor_id (Optional[int]): Primary key of the last actor on the
+                previous page, or None to start from the first actor.
+
+        Returns:
+            service.ActorPage: The actors on the page and the primary key to continue
+                after, or None if this is the last page.
+        """
+
+        statement = (
+            sqlalchemy.select(*statements.ACTOR_COLUMNS)
+            .order_by(models.actor_table.c.id)
+            .limit(limit + 1)
+        )
+
+        if after_actor_id is not None:
+            statement = statement.where(models.actor_table.c.id > after_actor_id)
+
+        rows = self._db.execute(statement).all()
+        actors = statements.to_actors(service.Actor, rows[:limit])
+        next_actor_id = actors[-1].actor_id if len(rows) > limit else None
+
+        return service.ActorPage(actors=actors, next_actor_id=next_actor_id)
+
+    def stream_actors(self, batch_size: int) -> Iterator[list[service.Actor]]:
+        """Streams all actors from the database in batches of the given size.
+
+        The rows are fetched through a server-side cursor, so only a single batch of
+        actors is held in memory at any time.
+
+        Args:
+            batch_size (int): Number of actors that are fetched per batch.
+
+        Yields:
+            Iterator[list[service.Actor]]: Batches of actor instances ordered by their
+                primary key.
+        """
+
+        statement = (
+            sqlalchemy.select(*statements.ACTOR_COLUMNS)
+            .order_by(models.actor_table.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        for rows in self._db.execute(statement).partitions():
+            yield statements.to_actors(service.Actor, rows)
+
+    def filter_actors(
+        self,
+        actor_filter: service.ActorFilter,
+        limit: int,
+        after: Optional[tuple[Any, ...]] = None,
+    ) -> service.ActorListingPage:
+        """Returns a page of the actors that match a filter, in the order of the filter.
+
+        Every supported combination of criteria and order is answered by a range scan
+        of an index that also provides the order, see `statements.select_filtered_actors`. The
+        page is continued with a keyset on the sort key.
+
+        Args:
+            actor_filter (service.ActorFilter): Criteria and order of the actors.
+            limit (int): Maximum number of actors on the page.
+            after (Optional[tuple[Any, ...]]): Sort key of the last actor on the
+                previous page, or None to start from the first actor.
+
+        Raises:
+            UnsupportedActorFilterError: Raised if no index serves the combination of
+                criteria and order.
+
+        Returns:
+            service.ActorListingPage: The actors on the page and the sort key to
+                continue after, or None if this is the last page.
+        """
+
+        dialect = self._db.get_bind().dialect
+        statement = statements.select_filtered_actors(
+            actor_filter, limit + 1, dialect, after
+        )
+        rows = self._db.execute(statement).all()
+        actors = statements.to_actors(service.Actor, rows[:limit])
+        next_key = (
+            statements.sort_key(actors[-1], actor_filter.order)
+            if len(rows) > limit
+            else None
+        )
+
+        return service.ActorListingPage(actors=actors, next_key=next_key)
+
+    def search_actors(
+        self,
+        query: str,
+        limit: int,
+        prefix: bool = False,
+        after: Optional[tuple[int, int]] = None,
+    ) -> service.ActorSearchPage:
+        """Returns a page of the actors whose names match a search query.
+
+        The matches are ranked and continued with a keyset on their rank and primary
+        key, see `statements.select_matching_actors`.
+
+        Args:
+            query (str): The text to be found in the first or last name.
+            limit (int): Maximum number of actors on the page.
+            prefix (bool): Only match names that start with the query, e.g. to
+                autocomplete it.
+            after (Optional[tuple[int, int]]): Rank and primary key of the last match
+                on the previous page, or None to start from the best match.
+
+        Returns:
+            service.ActorSearchPage: The matching actors on the page and the key to
+                continue after, or None if this is the last page.
+        """
+
+        statement = statements.select_matching_actors(query, limit + 1, prefix, after)
+        rows = self._db.execute(statement).all()
+        actors = statements.to_actors(service.Actor, (row[:-1] for row in rows[:limit]))
+        next_key = (
+            (rows[limit - 1][-1], actors[-1].actor_id) if len(rows) > limit else None
+        )
+
+        return service.ActorSearchPage(actors=actors, next_key=next_key)
 
     def read_actor(self, actor_id: int) -> service.Actor:
         """Returns the actor with the given primary key.
@@ -61,45 +316,140 @@ class SQLAlchemyActorMapper(service.ActorMapper):
             actor.Actor: Instance of the actor that matches the given ID.
         """
 
-        db_actor = self._db.get(models.Actor, actor_id)
+        statement = sqlalchemy.select(*statements.ACTOR_COLUMNS).where(
+            models.actor_table.c.id == actor_id
+        )
+        row = self._db.execute(statement).one_or_none()
 
-        if not db_actor:
+        if not row:
             raise exceptions.ActorNotFoundError(actor_id)
 
-        return service.Actor(
-            actor_id=db_actor.id,
-            first_name=db_actor.first_name,
-            last_name=db_actor.last_name,
+        return service.Actor(*row)
+
+    def read_actor_version(self, actor_id: int) -> int:
+        """Returns the version of the actor with the given primary key.
+
+        The version is incremented by every update of the actor, so it can be
+        compared to a version that was read before without reading the actor.
+
+        Args:
+            actor_id (int): Primary key of the actor to be selected.
+
+        Raises:
+            ActorNotFoundError: Raised if no actor exists for the given actor ID.
+
+        Returns:
+            int: The current version of the actor.
+        """
+
+        statement = sqlalchemy.select(models.actor_table.c.version).where(
+            models.actor_table.c.id == actor_id
         )
+        result = self._db.execute(statement)
+        version = result.scalar_one_or_none()
 
-    def update_actor_first_name(self, actor_id: int, first_name: str) -> service.Actor:
-        """Updates the first name of a particular actor and returns it.
+        if version is None:
+            raise exceptions.ActorNotFoundError(actor_id)
+
+        return version
+
+    def read_actors_by_ids(self, actor_ids: Sequence[int]) -> list[service.Actor]:
+        """Returns the actors with the given primary keys in the given order.
+
+        All actors are read by a single indexed query. Primary keys without an actor
+        are skipped.
+
+        Args:
+            actor_ids (Sequence[int]): Primary keys of the actors to be selected.
+
+        Returns:
+            list[service.Actor]: Instances of the existing actors in the order of the
+                given primary keys.
+        """
+
+        if not actor_ids:
+            return []
+
+        statement = statements.select_actors_by_ids(
+            actor_ids, self._db.get_bind().dialect
+        )
+        rows = self._db.execute(statement)
+        actors = {
+            actor.actor_id: actor for actor in statements.to_actors(service.Actor, rows)
+        }
+
+        return [actors[actor_id] for actor_id in actor_ids if actor_id in actors]
+
+    def update_actor(
+        self,
+        actor_id: int,
+        expected_versions: Optional[Collection[int]] = None,
+        **changes: str,
+    ) -> service.Actor:
+        """Updates the given attributes of a particular actor and returns it.
+
+        The actor is updated, its version incremented and returned by a single
+        `UPDATE ... RETURNING` statement. Without any changes, the actor is only read.
 
         Args:
             actor_id (int): Primary key of the actor to be updated.
-            first_name (str): Value of the first name to be set.
+            expected_versions (Optional[Collection[int]]): Versions of the actor that
+                may be updated, or None to update any version.
+            **changes (str): Values of the attributes to be set, by attribute name.
 
         Raises:
             ActorNotFoundError: Raised if no actor exists for the given actor ID.
+            ActorVersionMismatchError: Raised if the actor is not in one of the
+                expected versions.
 
         Returns:
             actor.Actor: Instance of the updated actor.
         """
 
-        db_actor = self._db.get(models.Actor, actor_id)
+        if not changes:
+            actor = self.read_actor(actor_id)
 
-        if not db_actor:
-            raise exceptions.ActorNotFoundError(actor_id)
+            if expected_versions is not None and actor.version not in expected_versions:
+                raise exceptions.ActorVersionMismatchError(actor_id, actor.version)
 
-        db_actor.first_name = first_name
-        self._db.flush()
+            return actor
 
-        return service.Actor(
-            actor_id=db_actor.id,
-            first_name=db_actor.first_name,
-            last_name=db_actor.last_name,
+        statement = (
+            sqlalchemy.update(models.actor_table)
+            .where(models.actor_table.c.id == actor_id)
+            .values(**changes, version=models.actor_table.c.version + 1)
+            .returning(*statements.ACTOR_COLUMNS)
         )
 
+        if expected_versions is not None:
+            statement = statement.where(
+                models.actor_table.c.version.in_(expected_versions)
+            )
+
+        result = self._db.execute(statement)
+        row = result.one_or_none()
+
+        if not row:
+            self._raise_unmodified(actor_id, expected_versions)
+
+        return service.Actor(*row)
+
+    def update_actor_first_name(self, actor_id: int, first_name: str) -> service.Actor:
+        """Updates the first name of a particular actor and returns it.
+
+        Args:
+            actor_id (int): Primary key of the actor to be updated.
+            first_name (str): Value of the first name to be set.
+
+        Raises:
+            ActorNotFoundError: Raised if no actor exists for the given actor ID.
+
+        Returns:
+            actor.Actor: Instance of the updated actor.
+        """
+
+        return self.update_actor(actor_id, first_name=first_name)
+
     def update_actor_last_name(self, actor_id: int, last_name: str) -> service.Actor:
         """Updates the last name of a particular actor and returns it.
 
@@ -114,33 +464,102 @@ class SQLAlchemyActorMapper(service.ActorMapper):
             actor.Actor: Instance of the updated actor.
         """
 
-        db_actor = self._db.get(models.Actor, actor_id)
+        return self.update_actor(actor_id, last_name=last_name)
 
-        if not db_actor:
-            raise exceptions.ActorNotFoundError(actor_id)
+    def delete_actors(self, actor_ids: Sequence[int]) -> list[int]:
+        """Deletes many actors from the database and returns the deleted primary keys.
 
-        db_actor.last_name = last_name
-        self._db.flush()
+        All actors are deleted by a single `DELETE ... RETURNING` statement, so missing
+        actors are detected without loading any actor first.
+
+        Args:
+            actor_ids (Sequence[int]): Primary keys of the actors to be deleted.
 
-        return service.Actor(
-            actor_id=db_actor.id,
-            first_name=db_actor.first_name,
-            last_name=db_actor.last_name,
+        Returns:
+            list[int]: Primary keys of the actors that existed and were deleted.
+        """
+
+        if not actor_ids:
+            return []
+
+        dialect = self._db.get_bind().dialect
+        statement = (
+            sqlalchemy.delete(models.actor_table)
+            .where(expressions.any_of(models.actor_table.c.id, actor_ids, dialect))
+            .returning(models.actor_table.c.id)
         )
+        result = self._db.execute(statement)
+
+        return list(result.scalars())
 
-    def delete_actor(self, actor_id: int) -> None:
+    def delete_actor(
+        self, actor_id: int, expected_versions: Optional[Collection[int]] = None
+    ) -> None:
         """Deletes a particular actor from the database.
 
         Args:
             actor_id (int): Primary key of the actor to be deleted.
+            expected_versions (Optional[Collection[int]]): Versions of the actor that
+                may be deleted, or None to delete any version.
 
         Raises:
             ActorNotFoundError: Raised if no actor exists for the given actor ID.
+            ActorVersionMismatchError: Raised if the actor is not in one of the
+                expected versions.
         """
 
-        db_actor = self._db.get(models.Actor, actor_id)
+        statement = (
+            sqlalchemy.delete(models.actor_table)
+            .where(models.actor_table.c.id == actor_id)
+            .returning(models.actor_table.c.id)
+        )
+
+        if expected_versions is not None:
+            statement = statement.where(
+                models.actor_table.c.version.in_(expected_versions)
+            )
+
+        result = self._db.execute(statement)
+
+        if result.first() is None:
+            self._raise_unmodified(actor_id, expected_versions)
 
-        if not db_actor:
+    def _raise_unmodified(
+        self, actor_id: int, expected_versions: Optional[Collection[int]]
+    ) -> NoReturn:
+        # Explains why no row matched: the actor is missing or in another version.
+        if expected_versions is None:
             raise exceptions.ActorNotFoundError(actor_id)
 
-        self._db.delete(db_actor)
+        raise exceptions.ActorVersionMismatchError(
+            actor_id, self.read_actor_version(actor_id)
+        )
+
+
+def create_id_allocator(
+    session_factory: Callable[[], ContextManager[orm.Session]],
+    block_size: int,
+) -> identifiers.IdentifierAllocator:
+    """Creates an allocator of actor IDs that reserves blocks of the ID sequence.
+
+    Only PostgreSQL has sequences. The blocks are reserved through their own sessions,
+    outside the transactions of the requests, so rolled back requests skip their IDs.
+
+    Args:
+        session_factory (Callable[[], ContextManager[orm.Session]]):
+            Opens a session to the database for every block.
+        block_size (int): Number of IDs that are reserved at once.
+
+    Returns:
+        identifiers.IdentifierAllocator: The allocator of actor IDs.
+    """
+
+    def reserve(count: int) -> list[int]:
+        with session_factory() as database_session:
+            return list(
+                database_session.scalars(
+                    identifiers.select_next_values(models.actor_id_sequence, count)
+                )
+            )
+
+    return identifiers.IdentifierAllocator(reserve, block_size)
@@ -1,26 +1,166 @@
-from typing import Annotated, Iterator
+import contextlib
+from typing import Annotated, Any, AsyncIterator, Iterator, Optional
 
 import fastapi
+from fastapi import responses
+from sqlalchemy import orm
+
+from myapi.actors import caching, exceptions, queries, schemas, service
+from myapi.shared import (
+    cache,
+    conditional,
+    configuration,
+    dependencies,
+    export,
+    imports,
+    metrics,
+    pagination,
+    parameters,
+    payloads,
+    serialization,
+    timing,
+)
+from myapi.shared.database import identifiers, session, statements
+
+EXPORT_FIELDNAMES = ("actor_id", "first_name", "last_name")
+IMPORT_FIELDNAMES = ("first_name", "last_name")
+SEARCH_QUERY_MAX_LENGTH = 100
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 100
+# Types of the values of the sort key in the cursor of a filtered listing, per order.
+CURSOR_TYPES = {
+    service.ActorOrder.ID: (int,),
+    service.ActorOrder.NAME: (str, str, int),
+}
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: fastapi.FastAPI) -> AsyncIterator[dict[str, Any]]:
+    """Creates the database engine and the actor ID allocator on startup.
+
+    Yields:
+        AsyncIterator[dict[str, Any]]: The lifespan state of the router.
+    """
+
+    async with dependencies.database_lifespan(app) as state:
+        yield {
+            **state,
+            "id_allocator": configure_id_allocator(state["database_session_factory"]),
+        }
 
-from myapi.actors import exceptions, queries, schemas, service
-from myapi.shared import dependencies
 
 router = fastapi.APIRouter(
     prefix="/actors",
     tags=["actors"],
+    lifespan=lifespan,
+    route_class=timing.TimedRoute,
 )
 
 
+def configure_id_allocator(
+    session_factory: session.SQLAlchemySessionFactory,
+) -> Optional[identifiers.IdentifierAllocator]:
+    """Creates the actor ID allocator of this process, or None if it is disabled.
+
+    Returns:
+        Optional[identifiers.IdentifierAllocator]: The allocator
+            that reserves blocks of actor IDs.
+    """
+
+    identifier_configuration = configuration.IdentifierConfiguration.from_environment()
+
+    if identifier_configuration.block_size <= 0:
+        return None
+
+    id_allocator = queries.create_id_allocator(
+        session_factory.get_session, identifier_configuration.block_size
+    )
+    metrics.register_counters(
+        "actor_id_allocator",
+        "Allocated identifiers and reserved blocks of the actor ID allocator.",
+        id_allocator.statistics,
+        engine="sync",
+    )
+
+    return id_allocator
+
+
+def get_id_allocator(
+    request: fastapi.Request,
+) -> Optional[identifiers.IdentifierAllocator]:
+    """Returns the actor ID allocator of this process, or None if it is disabled.
+
+    Returns:
+        Optional[identifiers.IdentifierAllocator]: The allocator
+            that reserves blocks of actor IDs.
+    """
+
+    return request.state.id_allocator
+
+
 def get_actor_mapper(
-    database_session=fastapi.Depends(dependencies.get_database_session),
-) -> Iterator[service.ActorMapper]:
-    """A generator for concrete instances of the Actor data mapper.
+    database_session=fastapi.Depends(
+        dependencies.get_database_session, scope="function"
+    ),
+    actor_cache=fastapi.Depends(cache.get_actor_cache),
+    id_allocator=fastapi.Depends(get_id_allocator),
+) -> service.ActorMapper:
+    """Returns a concrete instance of the Actor data mapper.
 
-    Yields:
-        Iterator[service.ActorMapper]: A concrete instance of an Actor data mapper.
+    The session is committed and its connection returned to the pool as soon as
+    the path operation returns, before the response is sent.
+
+    Returns:
+        service.ActorMapper: A concrete instance of an Actor data mapper.
+    """
+
+    return decorate_actor_mapper(
+        queries.SQLAlchemyActorMapper(database_session, id_allocator),
+        actor_cache,
+        database_session,
+    )
+
+
+def get_read_only_actor_mapper(
+    database_session=fastapi.Depends(
+        dependencies.get_read_only_database_session, scope="function"
+    ),
+    actor_cache=fastapi.Depends(cache.get_actor_cache),
+) -> service.ActorMapper:
+    """Returns a concrete instance of the Actor data mapper for read-only requests.
+
+    The session does not open a transaction and returns its connection to the pool
+    as soon as the path operation returns, before the response is sent.
+
+    Returns:
+        service.ActorMapper: A concrete instance of an Actor data mapper.
+    """
+
+    return decorate_actor_mapper(
+        queries.SQLAlchemyActorMapper(database_session), actor_cache
+    )
+
+
+def decorate_actor_mapper(
+    actor_mapper: service.ActorMapper,
+    actor_cache: Optional[cache.ActorCache],
+    database_session: Optional[orm.Session] = None,
+) -> service.ActorMapper:
+    """Decorates the mapper with the read-through actor cache if caching is enabled.
+
+    The cache invalidates the actors that are written in `database_session` again
+    once its transaction ends.
     """
 
-    yield queries.SQLAlchemyActorMapper(database_session)
+    if actor_cache is None:
+        return actor_mapper
+
+    return caching.CachingActorMapper(
+        actor_mapper,
+        actor_cache,
+        cache.get_cache_configuration().negative_ttl,
+        database_session,
+    )
 
 
 @router.post("/", response_model=schemas.ReadActorResponse)
@@ -28,46 +168,376 @@ def create_actor(
     actor: schemas.CreateActorRequest,
     actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
 ):
-    return actor_mapper.create_actor(actor.first_name, actor.last_name)
+    return serialization.json_response(
+        actor_mapper.create_actor(actor.first_name, actor.last_name)
+    )
+
+
+async def get_bulk_actors(
+    request: fastapi.Request,
+) -> list[schemas.CreateActorRequest]:
+    """Reads the actors to be created from a JSON array or an NDJSON stream.
+
+    Returns:
+        list[schemas.CreateActorRequest]: The validated actors in input order.
+    """
+
+    return await payloads.read_records(request, schemas.CreateActorRequest)
+
+
+@router.post(
+    "/bulk",
+    response_model=schemas.CreateActorsResponse,
+    openapi_extra=payloads.bulk_request_body("CreateActorRequest"),
+)
+def create_actors(
+    actors: Annotated[
+        list[schemas.CreateActorRequest], fastapi.Depends(get_bulk_actors)
+    ],
+    actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+):
+    created_actors = actor_mapper.create_actors(
+        [(actor.first_name, actor.last_name) for actor in actors]
+    )
+
+    return {"actor_ids": [actor.actor_id for actor in created_actors]}
+
+
+@router.post(
+    "/import",
+    response_model=schemas.ImportActorsResponse,
+    openapi_extra=imports.import_request_body(),
+)
+def import_actors(
+    request: fastapi.Request,
+    actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+):
+    parser = imports.RecordParser(
+        imports.get_import_format(request),
+        schemas.CreateActorRequest,
+        IMPORT_FIELDNAMES,
+    )
+    # The path operation runs in a worker thread, which reads the body from the loop.
+    actors = parser.parse(imports.iterate_from_thread(request.stream()))
+
+    try:
+        imported = actor_mapper.import_actors(
+            (actor.first_name, actor.last_name) for actor in actors
+        )
+    except imports.ImportFormatError as exc:
+        raise fastapi.HTTPException(status_code=400, detail=exc.args[0])
+
+    return {
+        "imported": imported,
+        "rejected": parser.report.rejected,
+        "lines": parser.report.lines,
+        "errors": parser.report.errors,
+    }
+
+
+@router.get("/", response_model=schemas.ReadActorsResponse)
+def read_actors(
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+    limit: Annotated[
+        int, fastapi.Query(ge=1, le=pagination.MAX_PAGE_SIZE)
+    ] = pagination.DEFAULT_PAGE_SIZE,
+    cursor: Annotated[Optional[str], fastapi.Query(alias="next")] = None,
+    ids: Annotated[
+        Optional[str],
+        fastapi.Query(description="Comma-separated list of actor IDs to be read"),
+    ] = None,
+    last_name: Annotated[
+        Optional[str], fastapi.Query(description="Last name of the actors to be read")
+    ] = None,
+    first_name: Annotated[
+        Optional[str], fastapi.Query(description="First name of the actors to be read")
+    ] = None,
+    prefix: Annotated[
+        bool, fastapi.Query(description="Match the last name as a prefix")
+    ] = False,
+    order: Annotated[service.ActorOrder, fastapi.Query(alias="sort")] = (
+        service.ActorOrder.ID
+    ),
+):
+    actor_filter = service.ActorFilter(last_name, first_name, prefix, order)
+
+    if ids is not None:
+        if actor_filter != service.ActorFilter():
+            raise fastapi.HTTPException(
+                status_code=400,
+                detail="IDs cannot be combined with filters or a sort order",
+            )
+
+        return serialization.json_response(
+            lookup_response(parameters.parse_ids(ids), actor_mapper)
+        )
+
+    if actor_filter != service.ActorFilter():
+        return serialization.json_response(
+            filter_response(actor_filter, limit, cursor, actor_mapper)
+        )
+
+    after_actor_id = None
+
+    if cursor is not None:
+        try:
+            (after_actor_id,) = pagination.decode_cursor(cursor, int)
+        except pagination.InvalidCursorError as exc:
+            raise fastapi.HTTPException(status_code=400, detail=exc.args[0])
+
+    page = actor_mapper.read_actors_page(limit, after_actor_id)
+
+    return serialization.json_response(
+        {
+            "actors": page.actors,
+            "next": (
+                pagination.encode_cursor(page.next_actor_id)
+                if page.next_actor_id is not None
+                else None
+            ),
+            "missing_actor_ids": [],
+        }
+    )
+
+
+def filter_response(
+    actor_filter: service.ActorFilter,
+    limit: int,
+    cursor: Optional[str],
+    actor_mapper: service.ActorMapper,
+) -> dict[str, Any]:
+    after = None
+
+    try:
+        if cursor is not None:
+            after = tuple(
+                pagination.decode_cursor(cursor, *CURSOR_TYPES[actor_filter.order])
+            )
+
+        page = actor_mapper.filter_actors(actor_filter, limit, after)
+    except (
+        pagination.InvalidCursorError,
+        statements.UnsupportedActorFilterError,
+    ) as exc:
+        raise fastapi.HTTPException(status_code=400, detail=exc.args[0])
+
+    return {
+        "actors": page.actors,
+        "next": (
+            pagination.encode_cursor(*page.next_key)
+            if page.next_key is not None
+            else None
+        ),
+        "missing_actor_ids": [],
+    }
+
+
+@router.post("/lookup", response_model=schemas.ReadActorsResponse)
+def lookup_actors(
+    lookup: schemas.ReadActorsRequest,
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+):
+    return serialization.json_response(
+        lookup_response(parameters.unique_ids(lookup.actor_ids), actor_mapper)
+    )
+
+
+def lookup_response(
+    actor_ids: list[int], actor_mapper: service.ActorMapper
+) -> dict[str, Any]:
+    actors = actor_mapper.read_actors_by_ids(actor_ids)
+    found_actor_ids = {actor.actor_id for actor in actors}
+
+    return {
+        "actors": actors,
+        "next": None,
+        "missing_actor_ids": [
+            actor_id for actor_id in actor_ids if actor_id not in found_actor_ids
+        ],
+    }
+
+
+@router.get("/search", response_model=schemas.ReadActorsResponse)
+def search_actors(
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+    query: Annotated[
+        str, fastapi.Query(alias="q", min_length=1, max_length=SEARCH_QUERY_MAX_LENGTH)
+    ],
+    limit: Annotated[
+        int, fastapi.Query(ge=1, le=pagination.MAX_PAGE_SIZE)
+    ] = pagination.DEFAULT_PAGE_SIZE,
+    cursor: Annotated[Optional[str], fastapi.Query(alias="next")] = None,
+):
+    page = actor_mapper.search_actors(query, limit, after=decode_search_cursor(cursor))
+
+    return serialization.json_response(search_response(page))
+
+
+@router.get("/autocomplete", response_model=schemas.ReadActorsResponse)
+def autocomplete_actors(
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+    query: Annotated[
+        str, fastapi.Query(alias="q", min_length=1, max_length=SEARCH_QUERY_MAX_LENGTH)
+    ],
+    limit: Annotated[
+        int, fastapi.Query(ge=1, le=AUTOCOMPLETE_MAX_LIMIT)
+    ] = AUTOCOMPLETE_DEFAULT_LIMIT,
+    cursor: Annotated[Optional[str], fastapi.Query(alias="next")] = None,
+):
+    page = actor_mapper.search_actors(
+        query, limit, prefix=True, after=decode_search_cursor(cursor)
+    )
+
+    return serialization.json_response(search_response(page))
+
+
+def decode_search_cursor(cursor: Optional[str]) -> Optional[tuple[int, int]]:
+    """Decodes the cursor of a search page into the rank and ID to continue after.
+
+    Raises:
+        fastapi.HTTPException: Raised with status 400 if the cursor is invalid.
+    """
+
+    if cursor is None:
+        return None
+
+    try:
+        rank, actor_id = pagination.decode_cursor(cursor, int, int)
+    except pagination.InvalidCursorError as exc:
+        raise fastapi.HTTPException(status_code=400, detail=exc.args[0])
+
+    return rank, actor_id
+
+
+def search_response(page: service.ActorSearchPage) -> dict[str, Any]:
+    return {
+        "actors": page.actors,
+        "next": (
+            pagination.encode_cursor(*page.next_key)
+            if page.next_key is not None
+            else None
+        ),
+        "missing_actor_ids": [],
+    }
+
+
+@router.get("/export", response_class=responses.StreamingResponse)
+def export_actors(
+    session_factory: Annotated[
+        session.SQLAlchemySessionFactory,
+        fastapi.Depends(dependencies.get_database_session_factory),
+    ],
+    export_format: Annotated[
+        export.ExportFormat, fastapi.Query(alias="format")
+    ] = export.ExportFormat.NDJSON,
+):
+    def generate_export() -> Iterator[bytes]:
+        yield export.encode_header(export_format, EXPORT_FIELDNAMES)
+
+        with session_factory.get_session() as database_session:
+            actor_mapper = queries.SQLAlchemyActorMapper(database_session)
+
+            for actors in actor_mapper.stream_actors(export.EXPORT_BATCH_SIZE):
+                yield export.encode_records(export_format, EXPORT_FIELDNAMES, actors)
+
+    return responses.StreamingResponse(
+        generate_export(),
+        media_type=export_format.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="actors.{export_format.value}"'
+        },
+    )
 
 
 @router.get("/{actor_id}", response_model=schemas.ReadActorResponse)
 def read_actor(
     actor_id: int,
-    actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+    response: fastapi.Response,
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+    if_none_match: Annotated[Optional[str], fastapi.Header()] = None,
 ):
     try:
-        return actor_mapper.read_actor(actor_id)
+        # A single read serves both outcomes, as a changed actor is sent right away.
+        actor = actor_mapper.read_actor(actor_id)
     except exceptions.ActorNotFoundError as exc:
         raise fastapi.HTTPException(status_code=404, detail=exc.args[0])
 
+    if if_none_match is not None and not conditional.none_match(
+        if_none_match, actor.version
+    ):
+        return conditional.not_modified(actor.version)
+
+    response.headers["ETag"] = conditional.format_etag(actor.version)
+
+    return serialization.json_response(actor, response)
+
 
 @router.patch("/{actor_id}", response_model=schemas.ReadActorResponse)
 def update_actor(
     actor_id: int,
     new_attributes: schemas.UpdateActorRequest,
+    response: fastapi.Response,
     actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+    if_match: Annotated[Optional[str], fastapi.Header()] = None,
 ):
-    try:
-        if new_attributes.first_name:
-            actor_mapper.update_actor_first_name(actor_id, new_attributes.first_name)
-
-        if new_attributes.last_name:
-            actor_mapper.update_actor_last_name(actor_id, new_attributes.last_name)
+    changes = {
+        attribute: value
+        for attribute, value in new_attributes.model_dump().items()
+        if value
+    }
 
-        return actor_mapper.read_actor(actor_id)
+    try:
+        actor = actor_mapper.update_actor(
+            actor_id, conditional.expected_versions(if_match), **changes
+        )
     except exceptions.ActorNotFoundError as exc:
         raise fastapi.HTTPException(status_code=404, detail=exc.args[0])
+    except exceptions.ActorVersionMismatchError as exc:
+        raise fastapi.HTTPException(status_code=412, detail=exc.args[0])
+
+    response.headers["ETag"] = conditional.format_etag(actor.version)
+
+    return serialization.json_response(actor, response)
+
+
+@router.delete("/", response_model=schemas.DeleteActorsResponse)
+def delete_actors(
+    actor_ids: Annotated[list[int], fastapi.Depends(parameters.get_ids)],
+    actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+):
+    deleted_actor_ids = set(actor_mapper.delete_actors(actor_ids))
+
+    return {
+        "actor_ids": [
+            actor_id for actor_id in actor_ids if actor_id in deleted_actor_ids
+        ],
+        "missing_actor_ids": [
+            actor_id for actor_id in actor_ids if actor_id not in deleted_actor_ids
+        ],
+    }
 
 
 @router.delete("/{actor_id}", response_model=schemas.DeleteActorResponse)
 def delete_actor(
     actor_id: int,
     actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+    if_match: Annotated[Optional[str], fastapi.Header()] = None,
 ):
     try:
-        actor_mapper.delete_actor(actor_id)
+        actor_mapper.delete_actor(actor_id, conditional.expected_versions(if_match))
     except exceptions.ActorNotFoundError as exc:
         raise fastapi.HTTPException(status_code=404, detail=exc.args[0])
+    except exceptions.ActorVersionMismatchError as exc:
+        raise fastapi.HTTPException(status_code=412, detail=exc.args[0])
 
     return {"actor_id": actor_id}
@@ -1,12 +1,58 @@
 import abc
 import dataclasses
+import enum
+from typing import Any, Collection, Iterable, Iterator, Optional, Sequence
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True, slots=True)
 class Actor:
     actor_id: int
     first_name: str
     last_name: str
+    # Incremented by every update, not part of the serialized representation.
+    version: int = dataclasses.field(default=1, metadata={"serialize": False})
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ActorPage:
+    actors: list[Actor]
+    next_actor_id: Optional[int]
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ActorSearchPage:
+    actors: list[Actor]
+    # Rank of the last match and primary key of its actor, to continue after.
+    next_key: Optional[tuple[int, int]]
+
+
+class ActorOrder(str, enum.Enum):
+    ID = "id"
+    NAME = "last_name,first_name"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ActorFilter:
+    """Criteria and order of a listing of actors.
+
+    Attributes:
+        last_name (Optional[str]): Last name of the listed actors, if any.
+        first_name (Optional[str]): First name of the listed actors, if any.
+        prefix (bool): Match the names as prefixes instead of exactly.
+        order (ActorOrder): Order of the listed actors, ties are ordered by ID.
+    """
+
+    last_name: Optional[str] = None
+    first_name: Optional[str] = None
+    prefix: bool = False
+    order: ActorOrder = ActorOrder.ID
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ActorListingPage:
+    actors: list[Actor]
+    # Values of the sort key of the last actor, to continue after.
+    next_key: Optional[tuple[Any, ...]]
 
 
 class ActorMapper(abc.ABC):
@@ -21,14 +67,68 @@ class ActorMapper(abc.ABC):
     def create_actor(self, first_name: str, last_name: str) -> Actor:
         """Template method to create a new actor in the database."""
 
+    @abc.abstractmethod
+    def create_actors(self, names: Sequence[tuple[str, str]]) -> list[Actor]:
+        """Template method to create many new actors in the database at once."""
+
+    @abc.abstractmethod
+    def import_actors(self, names: Iterable[tuple[str, str]]) -> int:
+        """Template method to stream many new actors into the database."""
+
     @abc.abstractmethod
     def read_actors(self) -> list[Actor]:
         """Template method to read all actors from the database."""
 
+    @abc.abstractmethod
+    def read_actors_page(
+        self, limit: int, after_actor_id: Optional[int] = None
+    ) -> ActorPage:
+        """Template method to read a page of actors ordered by their primary key."""
+
+    @abc.abstractmethod
+    def stream_actors(self, batch_size: int) -> Iterator[list[Actor]]:
+        """Template method to stream all actors from the database in batches."""
+
+    @abc.abstractmethod
+    def filter_actors(
+        self,
+        actor_filter: ActorFilter,
+        limit: int,
+        after: Optional[tuple[Any, ...]] = None,
+    ) -> ActorListingPage:
+        """Template method to read a page of the actors that match a filter."""
+
+    @abc.abstractmethod
+    def search_actors(
+        self,
+        query: str,
+        limit: int,
+        prefix: bool = False,
+        after: Optional[tuple[int, int]] = None,
+    ) -> ActorSearchPage:
+        """Template method to search actors by name, best matches first."""
+
     @abc.abstractmethod
     def read_actor(self, actor_id: int) -> Actor:
         """Template method to read a particular actor by its primary key."""
 
+    @abc.abstractmethod
+    def read_actor_version(self, actor_id: int) -> int:
+        """Template method to read the version of a particular actor."""
+
+    @abc.abstractmethod
+    def read_actors_by_ids(self, actor_ids: Sequence[int]) -> list[Actor]:
+        """Template method to read many actors by their primary keys at once."""
+
+    @abc.abstractmethod
+    def update_actor(
+        self,
+        actor_id: int,
+        expected_versions: Optional[Collection[int]] = None,
+        **changes: str,
+    ) -> Actor:
+        """Template method to update attributes of a particular actor."""
+
     @abc.abstractmethod
     def update_actor_first_name(self, actor_id: int, first_name: str) -> Actor:
         """Template method to update the first name of a particular actor."""
@@ -38,5 +138,11 @@ class ActorMapper(abc.ABC):
         """Template method to update the last name of a particular actor."""
 
     @abc.abstractmethod
-    def delete_actor(self, actor_id: int) -> None:
+    def delete_actor(
+        self, actor_id: int, expected_versions: Optional[Collection[int]] = None
+    ) -> None:
         """Template method to delete a particular actor from the database."""
+
+    @abc.abstractmethod
+    def delete_actors(self, actor_ids: Sequence[int]) -> list[int]:
+        """Template method to delete many actors from the database at once."""
@@ -0,0 +1,241 @@
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Collection,
+    Mapping,
+    Optional,
+    Sequence,
+)
+
+from sqlalchemy import event, orm
+from sqlalchemy.ext import asyncio
+
+from myapi.async_actors import exceptions, service
+from myapi.shared import cache
+
+# Errors of writes which reveal that the cached actor is stale.
+STALE_ERRORS = (exceptions.ActorNotFoundError, exceptions.ActorVersionMismatchError)
+
+
+class CachingActorMapper(service.ActorMapper):
+    """Read-through cache of actors that decorates another actor mapper.
+
+    Actors are read from the cache by their primary key and loaded from the decorated
+    mapper on a miss. Writes through the mappers of either router fence the affected
+    entries, so the cache is only stale for writes of other processes, at most for
+    the TTL.
+
+    Until the transaction of a write commits, concurrent requests still read the
+    previous row, which the fence keeps out of the cache. Rows that the session reads
+    back before its transaction ends are removed by fencing the written actors once
+    more when it ends.
+
+    Args:
+        actor_mapper (service.ActorMapper): The decorated actor mapper.
+        actor_cache (cache.ActorCache): The cache that is shared by all mappers of a
+            process.
+        negative_ttl (float): Seconds for which missing actors are cached, no missing
+            actors are cached if zero.
+        session (Optional[asyncio.AsyncSession]): The session whose transaction the
+            writes of the decorated mapper belong to, or None if they are committed
+            when the mapper returns.
+    """
+
+    def __init__(
+        self,
+        actor_mapper: service.ActorMapper,
+        actor_cache: cache.ActorCache,
+        negative_ttl: float = 0,
+        session: Optional[asyncio.AsyncSession] = None,
+    ) -> None:
+        self._mapper = actor_mapper
+        self._cache = actor_cache
+        self._negative_ttl = negative_ttl
+        self._session = session.sync_session if session is not None else None
+        self._written_versions: dict[int, Optional[int]] = {}
+
+    def _fence(self, versions: Mapping[int, Optional[int]]) -> None:
+        """Fences written actors now and again when the transaction ends."""
+
+        for actor_id, version in versions.items():
+            self._cache.fence(actor_id, version)
+
+        if self._session is None or not versions:
+            return
+
+        if not self._written_versions:
+            # Rolled back writes may have been read back and cached in the session.
+            for identifier in ("after_commit", "after_rollback"):
+                event.listen(self._session, identifier, self._fence_written)
+
+        self._written_versions.update(versions)
+
+    def _fence_written(self, session: orm.Session) -> None:
+        for actor_id, version in self._written_versions.items():
+            self._cache.fence(actor_id, version)
+
+    async def create_actor(self, first_name: str, last_name: str) -> service.Actor:
+        actor = await self._mapper.create_actor(first_name, last_name)
+        self._fence({actor.actor_id: actor.version})
+
+        return actor
+
+    async def create_actors(
+        self, names: Sequence[tuple[str, str]]
+    ) -> list[service.Actor]:
+        actors = await self._mapper.create_actors(names)
+
+        self._fence({actor.actor_id: actor.version for actor in actors})
+
+        return actors
+
+    async def import_actors(self, names: AsyncIterable[tuple[str, str]]) -> int:
+        # The IDs of imported actors are not known, but only missing actors could be
+        # cached for them, which the negative TTL bounds.
+        return await self._mapper.import_actors(names)
+
+    async def read_actors(self) -> list[service.Actor]:
+        return await self._mapper.read_actors()
+
+    async def read_actors_page(
+        self, limit: int, after_actor_id: Optional[int] = None
+    ) -> service.ActorPage:
+        return await self._mapper.read_actors_page(limit, after_actor_id)
+
+    def stream_actors(self, batch_size: int) -> AsyncIterator[list[service.Actor]]:
+        return self._mapper.stream_actors(batch_size)
+
+    async def filter_actors(
+        self,
+        actor_filter: service.ActorFilter,
+        limit: int,
+        after: Optional[tuple[Any, ...]] = None,
+    ) -> service.ActorListingPage:
+        return await self._mapper.filter_actors(actor_filter, limit, after)
+
+    async def search_actors(
+        self,
+        query: str,
+        limit: int,
+        prefix: bool = False,
+        after: Optional[tuple[int, int]] = None,
+    ) -> service.ActorSearchPage:
+        return await self._mapper.search_actors(query, limit, prefix, after)
+
+    async def read_actor(self, actor_id: int) -> service.Actor:
+        cached_actor = self._cache.get(actor_id)
+
+        if cached_actor is cache.NOT_FOUND:
+            raise exceptions.ActorNotFoundError(actor_id)
+
+        if isinstance(cached_actor, tuple):
+            return service.Actor(*cached_actor)
+
+        try:
+            actor = await self._mapper.read_actor(actor_id)
+        except exceptions.ActorNotFoundError:
+            if self._negative_ttl > 0:
+                self._cache.put_missing(actor_id, self._negative_ttl)
+            raise
+
+        self._cache.put(actor)
+
+        return actor
+
+    async def read_actor_version(self, actor_id: int) -> int:
+        cached_actor = self._cache.get(actor_id)
+
+        if cached_actor is cache.NOT_FOUND:
+            raise exceptions.ActorNotFoundError(actor_id)
+
+        if isinstance(cached_actor, tuple):
+            return cached_actor[3]
+
+        return await self._mapper.read_actor_version(actor_id)
+
+    async def read_actors_by_ids(self, actor_ids: Sequence[int]) -> list[service.Actor]:
+        actors: dict[int, service.Actor] = {}
+        uncached_actor_ids: list[int] = []
+
+        for actor_id in actor_ids:
+            cached_actor = self._cache.get(actor_id)
+
+            if isinstance(cached_actor, tuple):
+                actors[actor_id] = service.Actor(*cached_actor)
+            elif cached_actor is not cache.NOT_FOUND:
+                uncached_actor_ids.append(actor_id)
+
+        if uncached_actor_ids:
+            for actor in await self._mapper.read_actors_by_ids(uncached_actor_ids):
+                actors[actor.actor_id] = actor
+                self._cache.put(actor)
+
+            if self._negative_ttl > 0:
+                for actor_id in uncached_actor_ids:
+                    if actor_id not in actors:
+                        self._cache.put_missing(actor_id, self._negative_ttl)
+
+        return [actors[actor_id] for actor_id in actor_ids if actor_id in actors]
+
+    async def update_actor(
+        self,
+        actor_id: int,
+        expected_versions: Optional[Collection[int]] = None,
+        **changes: str,
+    ) -> service.Actor:
+        try:
+            actor = await self._mapper.update_actor(
+                actor_id, expected_versions, **changes
+            )
+        except STALE_ERRORS:
+            self._cache.invalidate(actor_id)
+            raise
+
+        self._fence({actor_id: actor.version})
+
+        return actor
+
+    async def update_actor_first_name(
+        self, actor_id: int, first_name: str
+    ) -> service.Actor:
+        try:
+            actor = await self._mapper.update_actor_first_name(actor_id, first_name)
+        except STALE_ERRORS:
+            self._cache.invalidate(actor_id)
+            raise
+
+        self._fence({actor_id: actor.version})
+
+        return actor
+
+    async def update_actor_last_name(
+        self, actor_id: int, last_name: str
+    ) -> service.Actor:
+        try:
+            actor = await self._mapper.update_actor_last_name(actor_id, last_name)
+        except STALE_ERRORS:
+            self._cache.invalidate(actor_id)
+            raise
+
+        self._fence({actor_id: actor.version})
+
+        return actor
+
+    async def delete_actor(
+        self, actor_id: int, expected_versions: Optional[Collection[int]] = None
+    ) -> None:
+        try:
+            await self._mapper.delete_actor(actor_id, expected_versions)
+        except STALE_ERRORS:
+            self._cache.invalidate(actor_id)
+            raise
+
+        self._fence({actor_id: None})
+
+    async def delete_actors(self, actor_ids: Sequence[int]) -> list[int]:
+        deleted_actor_ids = await self._mapper.delete_actors(actor_ids)
+        # None of the actors exists anymore, whether it was deleted or missing.
+        self._fence(dict.fromkeys(actor_ids))
+
+        return deleted_actor_ids
@@ -1,13 +1,49 @@
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Collection,
+    NoReturn,
+    Optional,
+    Sequence,
+    Union,
+)
+
 import sqlalchemy
+from sqlalchemy import exc
 from sqlalchemy.ext import asyncio
 
 from myapi.async_actors import exceptions, service
-from myapi.shared.database import models
+from myapi.shared import batching, coalescing
+from myapi.shared.database import expressions, identifiers, models, statements
+
+# Errors of a statement that are caused by the values of a row, not by the database.
+ROW_ERRORS = (exc.IntegrityError, exc.DataError)
+
+# Rows that are inserted per statement by imports into databases without `COPY`.
+IMPORT_BATCH_SIZE = 1000
+# Columns that an import writes, in the order of the imported names.
+IMPORT_COLUMNS = ("first_name", "last_name")
 
 
 class SQLAlchemyActorMapper(service.ActorMapper):
-    def __init__(self, async_session: asyncio.AsyncSession) -> None:
+    def __init__(
+        self,
+        async_session: asyncio.AsyncSession,
+        actor_reads: Optional[coalescing.SingleFlight[int, service.Actor]] = None,
+        actor_loader: Optional[batching.BatchLoader[int, service.Actor]] = None,
+        actor_writer: Optional[
+            batching.BatchWriter[tuple[str, str], service.Actor]
+        ] = None,
+        id_allocator: Optional[identifiers.AsyncIdentifierAllocator] = None,
+    ) -> None:
         self.session = async_session
+        self.actor_reads = actor_reads
+        self.actor_loader = actor_loader
+        self.actor_writer = actor_writer
+        self.id_allocator = id_allocator
 
     async def create_actor(self, first_name: str, last_name: str) -> service.Actor:
         """Creates a new actor in the database and returns its primary key.
@@ -20,17 +56,139 @@ class SQLAlchemyActorMapper(service.ActorMapper):
             actor.Actor: Instance of the created actor.
         """
 
-        db_actor = models.Actor(first_name=first_name, last_name=last_name)
+        if self.actor_writer is not None:
+            # The actor is committed with concurrently created actors in a transaction
+            # of the writer, not in the transaction of this mapper's session.
+            return await self.actor_writer.write((first_name, last_name))
+
+        if self.id_allocator is not None:
+            actor_ids = await self.id_allocator.allocate()
+
+            return (await self._insert_actors(actor_ids, [(first_name, last_name)]))[0]
+
+        statement = (
+            sqlalchemy.insert(models.actor_table)
+            .values(first_name=first_name, last_name=last_name)
+            .returning(*statements.ACTOR_COLUMNS)
+        )
+        result = await self.session.execute(statement)
+
+        return service.Actor(*result.one())
+
+    async def create_actors(
+        self, names: Sequence[tuple[str, str]]
+    ) -> list[service.Actor]:
+        """Creates many new actors in the database and returns them in input order.
+
+        All actors are written with one multi-row `INSERT ... RETURNING` statement per
+        page of rows instead of one statement per actor. With an identifier
+        allocator, their primary keys are known in advance and the rows are inserted
+        without `RETURNING`, which lets the driver pipeline them.
+
+        Args:
+            names (Sequence[tuple[str, str]]): First and last names of the actors to be
+                created.
+
+        Returns:
+            list[service.Actor]: Instances of the created actors in the order of the
+                given names.
+        """
+
+        if not names:
+            return []
+
+        if self.id_allocator is not None:
+            actor_ids = await self.id_allocator.allocate(len(names))
+
+            return await self._insert_actors(actor_ids, names)
+
+        statement = sqlalchemy.insert(models.actor_table).returning(
+            *statements.ACTOR_COLUMNS, sort_by_parameter_order=True
+        )
+        parameters = [
+            {"first_name": first_name, "last_name": last_name}
+            for first_name, last_name in names
+        ]
+        result = await self.session.execute(statement, parameters)
+        rows = result.all()
+
+        return statements.to_actors(service.Actor, rows)
+
+    async def _insert_actors(
+        self, actor_ids: Sequence[int], names: Sequence[tuple[str, str]]
+    ) -> list[service.Actor]:
+        actors = [
+            service.Actor(actor_id, first_name, last_name, models.INITIAL_VERSION)
+            for actor_id, (first_name, last_name) in zip(actor_ids, names)
+        ]
+        await self.session.execute(
+            sqlalchemy.insert(models.actor_table),
+            [
+                {
+                    "id": actor.actor_id,
+                    "first_name": actor.first_name,
+                    "last_name": actor.last_name,
+                }
+                for actor in actors
+            ],
+        )
+
+        return actors
+
+    async def import_actors(self, names: AsyncIterable[tuple[str, str]]) -> int:
+        """Streams new actors into the database without returning them.
 
-        self.session.add(db_actor)
-        await self.session.flush()
+        On PostgreSQL, the rows are sent with a single `COPY ... FROM STDIN` as they
+        are read, which skips the planning and the round trip of a statement per row
+        and holds only a small buffer of rows in memory. Other databases insert them
+        in batches of `IMPORT_BATCH_SIZE` rows.
+
+        Args:
+            names (AsyncIterable[tuple[str, str]]): First and last names of the actors
+                to be created.
+
+        Returns:
+            int: Number of created actors.
+        """
 
-        return service.Actor(
-            actor_id=db_actor.id,
-            first_name=db_actor.first_name,
-            last_name=db_actor.last_name,
+        if self.session.get_bind().dialect.name != "postgresql":
+            return await self._insert_in_batches(names)
+
+        connection = await self.session.connection()
+        # The asyncpg adapter begins the transaction of the session only with its
+        # first statement, and a COPY on the driver connection before it would be
+        # committed on its own, even if the session is rolled back afterwards.
+        await connection.exec_driver_sql("SELECT 1")
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        # Only the connection of an invalidated session lacks its driver connection.
+        assert driver_connection is not None
+        status = await driver_connection.copy_records_to_table(
+            models.actor_table.name, records=names, columns=IMPORT_COLUMNS
         )
 
+        # The status of the statement is `COPY <rows>`.
+        return int(status.split()[-1])
+
+    async def _insert_in_batches(self, names: AsyncIterable[tuple[str, str]]) -> int:
+        count = 0
+        statement = sqlalchemy.insert(models.actor_table)
+        batch: list[dict[str, str]] = []
+
+        async for name in names:
+            batch.append(dict(zip(IMPORT_COLUMNS, name)))
+
+            if len(batch) == IMPORT_BATCH_SIZE:
+                await self.session.execute(statement, batch)
+                count += len(batch)
+                batch = []
+
+        if batch:
+            await self.session.execute(statement, batch)
+            count += len(batch)
+
+        return count
+
     async def read_actors(self) -> list[service.Actor]:
         """Returns all actors from the database in a list.
 
@@ -38,18 +196,146 @@ class SQLAlchemyActorMapper(service.ActorMapper):
             list[actor.Actor]: List of actor instances.
         """
 
-        statement = sqlalchemy.select(models.Actor)
+        rows = await self.session.execute(sqlalchemy.select(*statements.ACTOR_COLUMNS))
+
+        return statements.to_actors(service.Actor, rows)
+
+    async def read_actors_page(
+        self, limit: int, after_actor_id: Optional[int] = None
+    ) -> service.ActorPage:
+        """Returns a page of actors that follow the given primary key.
+
+        The page is selected with a keyset on the primary key instead of an offset,
+        so every page costs a single index range scan regardless of its position.
+
+        Args:
+            limit (int): Maximum number of actors on the page.
+            after_actor_id (Optional[int]): Primary key of the last actor on the
+                previous page, or None to start from the first actor.
+
+        Returns:
+            service.ActorPage: The actors on the page and the primary key to continue
+                after, or None if this is the last page.
+        """
+
+        statement = (
+            sqlalchemy.select(*statements.ACTOR_COLUMNS)
+            .order_by(models.actor_table.c.id)
+            .limit(limit + 1)
+        )
+
+        if after_actor_id is not None:
+            statement = statement.where(models.actor_table.c.id > after_actor_id)
+
         result = await self.session.execute(statement)
-        db_actors = result.scalars().all()
+        rows = result.all()
+        actors = statements.to_actors(service.Actor, rows[:limit])
+        next_actor_id = actors[-1].actor_id if len(rows) > limit else None
 
-        return [
-            service.Actor(
-                actor_id=db_actor.id,
-                first_name=db_actor.first_name,
-                last_name=db_actor.last_name,
-            )
-            for db_actor in db_actors
-        ]
+        return service.ActorPage(actors=actors, next_actor_id=next_actor_id)
+
+    async def stream_actors(
+        self, batch_size: int
+    ) -> AsyncIterator[list[service.Actor]]:
+        """Streams all actors from the database in batches of the given size.
+
+        The rows are fetched through a server-side cursor, so only a single batch of
+        actors is held in memory at any time.
+
+        Args:
+            batch_size (int): Number of actors that are fetched per batch.
+
+        Yields:
+            AsyncIterator[list[service.Actor]]: Batches of actor instances ordered by
+                their primary key.
+        """
+
+        statement = (
+            sqlalchemy.select(*statements.ACTOR_COLUMNS)
+            .order_by(models.actor_table.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.session.stream(statement)
+
+        async for rows in result.partitions():
+            yield statements.to_actors(service.Actor, rows)
+
+    async def filter_actors(
+        self,
+        actor_filter: service.ActorFilter,
+        limit: int,
+        after: Optional[tuple[Any, ...]] = None,
+    ) -> service.ActorListingPage:
+        """Returns a page of the actors that match a filter, in the order of the filter.
+
+        Every supported combination of criteria and order is answered by a range scan
+        of an index that also provides the order, see `statements.select_filtered_actors`. The
+        page is continued with a keyset on the sort key.
+
+        Args:
+            actor_filter (service.ActorFilter): Criteria and order of the actors.
+            limit (int): Maximum number of actors on the page.
+            after (Optional[tuple[Any, ...]]): Sort key of the last actor on the
+                previous page, or None to start from the first actor.
+
+        Raises:
+            UnsupportedActorFilterError: Raised if no index serves the combination of
+                criteria and order.
+
+        Returns:
+            service.ActorListingPage: The actors on the page and the sort key to
+                continue after, or None if this is the last page.
+        """
+
+        dialect = self.session.get_bind().dialect
+        statement = statements.select_filtered_actors(
+            actor_filter, limit + 1, dialect, after
+        )
+        result = await self.session.execute(statement)
+        rows = result.all()
+        actors = statements.to_actors(service.Actor, rows[:limit])
+        next_key = (
+            statements.sort_key(actors[-1], actor_filter.order)
+            if len(rows) > limit
+            else None
+        )
+
+        return service.ActorListingPage(actors=actors, next_key=next_key)
+
+    async def search_actors(
+        self,
+        query: str,
+        limit: int,
+        prefix: bool = False,
+        after: Optional[tuple[int, int]] = None,
+    ) -> service.ActorSearchPage:
+        """Returns a page of the actors whose names match a search query.
+
+        The matches are ranked and continued with a keyset on their rank and primary
+        key, see `statements.select_matching_actors`.
+
+        Args:
+            query (str): The text to be found in the first or last name.
+            limit (int): Maximum number of actors on the page.
+            prefix (bool): Only match names that start with the query, e.g. to
+                autocomplete it.
+            after (Optional[tuple[int, int]]): Rank and primary key of the last match
+                on the previous page, or None to start from the best match.
+
+        Returns:
+            service.ActorSearchPage: The matching actors on the page and the key to
+                continue after, or None if this is the last page.
+        """
+
+        statement = statements.select_matching_actors(query, limit + 1, prefix, after)
+        result = await self.session.execute(statement)
+        rows = result.all()
+        actors = statements.to_actors(service.Actor, (row[:-1] for row in rows[:limit]))
+        next_key = (
+            (rows[limit - 1][-1], actors[-1].actor_id) if len(rows) > limit else None
+        )
+
+        return service.ActorSearchPage(actors=actors, next_key=next_key)
 
     async def read_actor(self, actor_id: int) -> service.Actor:
         """Returns the actor with the given primary key.
@@ -64,47 +350,158 @@ class SQLAlchemyActorMapper(service.ActorMapper):
             actor.Actor: Instance of the actor that matches the given ID.
         """
 
-        db_actor = await self.session.get(models.Actor, actor_id)
+        if self.actor_reads is None:
+            return await self._read_actor(actor_id)
 
-        if not db_actor:
+        # Concurrent reads of the same actor share the query of the first reader.
+        return await self.actor_reads.call(actor_id, lambda: self._read_actor(actor_id))
+
+    async def _read_actor(self, actor_id: int) -> service.Actor:
+        if self.actor_loader is not None:
+            actor = await self.actor_loader.load(actor_id)
+
+            if not actor:
+                raise exceptions.ActorNotFoundError(actor_id)
+
+            return actor
+
+        statement = sqlalchemy.select(*statements.ACTOR_COLUMNS).where(
+            models.actor_table.c.id == actor_id
+        )
+        result = await self.session.execute(statement)
+        row = result.one_or_none()
+
+        if not row:
             raise exceptions.ActorNotFoundError(actor_id)
 
-        return service.Actor(
-            actor_id=db_actor.id,
-            first_name=db_actor.first_name,
-            last_name=db_actor.last_name,
+        return service.Actor(*row)
+
+    async def read_actor_version(self, actor_id: int) -> int:
+        """Returns the version of the actor with the given primary key.
+
+        The version is incremented by every update of the actor, so it can be
+        compared to a version that was read before without reading the actor.
+
+        Args:
+            actor_id (int): Primary key of the actor to be selected.
+
+        Raises:
+            ActorNotFoundError: Raised if no actor exists for the given actor ID.
+
+        Returns:
+            int: The current version of the actor.
+        """
+
+        statement = sqlalchemy.select(models.actor_table.c.version).where(
+            models.actor_table.c.id == actor_id
         )
+        result = await self.session.execute(statement)
+        version = result.scalar_one_or_none()
 
-    async def update_actor_first_name(
-        self, actor_id: int, first_name: str
+        if version is None:
+            raise exceptions.ActorNotFoundError(actor_id)
+
+        return version
+
+    async def read_actors_by_ids(self, actor_ids: Sequence[int]) -> list[service.Actor]:
+        """Returns the actors with the given primary keys in the given order.
+
+        All actors are read by a single indexed query. Primary keys without an actor
+        are skipped.
+
+        Args:
+            actor_ids (Sequence[int]): Primary keys of the actors to be selected.
+
+        Returns:
+            list[service.Actor]: Instances of the existing actors in the order of the
+                given primary keys.
+        """
+
+        if not actor_ids:
+            return []
+
+        statement = statements.select_actors_by_ids(
+            actor_ids, self.session.get_bind().dialect
+        )
+        rows = await self.session.execute(statement)
+        actors = {
+            actor.actor_id: actor for actor in statements.to_actors(service.Actor, rows)
+        }
+
+        return [actors[actor_id] for actor_id in actor_ids if actor_id in actors]
+
+    async def update_actor(
+        self,
+        actor_id: int,
+        expected_versions: Optional[Collection[int]] = None,
+        **changes: str,
     ) -> service.Actor:
-        """Updates the first name of a particular actor and returns it.
+        """Updates the given attributes of a particular actor and returns it.
+
+        The actor is updated, its version incremented and returned by a single
+        `UPDATE ... RETURNING` statement. Without any changes, the actor is only read.
 
         Args:
             actor_id (int): Primary key of the actor to be updated.
-            first_name (str): Value of the first name to be set.
+            expected_versions (Optional[Collection[int]]): Versions of the actor that
+                may be updated, or None to update any version.
+            **changes (str): Values of the attributes to be set, by attribute name.
 
         Raises:
             ActorNotFoundError: Raised if no actor exists for the given actor ID.
+            ActorVersionMismatchError: Raised if the actor is not in one of the
+                expected versions.
 
         Returns:
             actor.Actor: Instance of the updated actor.
         """
 
-        db_actor = await self.session.get(models.Actor, actor_id)
+        if not changes:
+            actor = await self.read_actor(actor_id)
 
-        if not db_actor:
-            raise exceptions.ActorNotFoundError(actor_id)
+            if expected_versions is not None and actor.version not in expected_versions:
+                raise exceptions.ActorVersionMismatchError(actor_id, actor.version)
 
-        db_actor.first_name = first_name
-        await self.session.flush()
+            return actor
 
-        return service.Actor(
-            actor_id=db_actor.id,
-            first_name=db_actor.first_name,
-            last_name=db_actor.last_name,
+        statement = (
+            sqlalchemy.update(models.actor_table)
+            .where(models.actor_table.c.id == actor_id)
+            .values(**changes, version=models.actor_table.c.version + 1)
+            .returning(*statements.ACTOR_COLUMNS)
         )
 
+        if expected_versions is not None:
+            statement = statement.where(
+                models.actor_table.c.version.in_(expected_versions)
+            )
+
+        result = await self.session.execute(statement)
+        row = result.one_or_none()
+
+        if not row:
+            await self._raise_unmodified(actor_id, expected_versions)
+
+        return service.Actor(*row)
+
+    async def update_actor_first_name(
+        self, actor_id: int, first_name: str
+    ) -> service.Actor:
+        """Updates the first name of a particular actor and returns it.
+
+        Args:
+            actor_id (int): Primary key of the actor to be updated.
+            first_name (str): Value of the first name to be set.
+
+        Raises:
+            ActorNotFoundError: Raised if no actor exists for the given actor ID.
+
+        Returns:
+            actor.Actor: Instance of the updated actor.
+        """
+
+        return await self.update_actor(actor_id, first_name=first_name)
+
     async def update_actor_last_name(
         self, actor_id: int, last_name: str
     ) -> service.Actor:
@@ -121,33 +518,194 @@ class SQLAlchemyActorMapper(service.ActorMapper):
             actor.Actor: Instance of the updated actor.
         """
 
-        db_actor = await self.session.get(models.Actor, actor_id)
+        return await self.update_actor(actor_id, last_name=last_name)
 
-        if not db_actor:
-            raise exceptions.ActorNotFoundError(actor_id)
+    async def delete_actors(self, actor_ids: Sequence[int]) -> list[int]:
+        """Deletes many actors from the database and returns the deleted primary keys.
+
+        All actors are deleted by a single `DELETE ... RETURNING` statement, so missing
+        actors are detected without loading any actor first.
 
-        db_actor.last_name = last_name
-        await self.session.flush()
+        Args:
+            actor_ids (Sequence[int]): Primary keys of the actors to be deleted.
 
-        return service.Actor(
-            actor_id=db_actor.id,
-            first_name=db_actor.first_name,
-            last_name=db_actor.last_name,
+        Returns:
+            list[int]: Primary keys of the actors that existed and were deleted.
+        """
+
+        if not actor_ids:
+            return []
+
+        dialect = self.session.get_bind().dialect
+        statement = (
+            sqlalchemy.delete(models.actor_table)
+            .where(expressions.any_of(models.actor_table.c.id, actor_ids, dialect))
+            .returning(models.actor_table.c.id)
         )
+        result = await self.session.execute(statement)
 
-    async def delete_actor(self, actor_id: int) -> None:
+        return list(result.scalars())
+
+    async def delete_actor(
+        self, actor_id: int, expected_versions: Optional[Collection[int]] = None
+    ) -> None:
         """Deletes a particular actor from the database.
 
         Args:
             actor_id (int): Primary key of the actor to be deleted.
+            expected_versions (Optional[Collection[int]]): Versions of the actor that
+                may be deleted, or None to delete any version.
 
         Raises:
             ActorNotFoundError: Raised if no actor exists for the given actor ID.
+            ActorVersionMismatchError: Raised if the actor is not in one of the
+                expected versions.
         """
 
-        db_actor = await self.session.get(models.Actor, actor_id)
+        statement = (
+            sqlalchemy.delete(models.actor_table)
+            .where(models.actor_table.c.id == actor_id)
+            .returning(models.actor_table.c.id)
+        )
 
-        if not db_actor:
+        if expected_versions is not None:
+            statement = statement.where(
+                models.actor_table.c.version.in_(expected_versions)
+            )
+
+        result = await self.session.execute(statement)
+
+        if result.first() is None:
+            await self._raise_unmodified(actor_id, expected_versions)
+
+    async def _raise_unmodified(
+        self, actor_id: int, expected_versions: Optional[Collection[int]]
+    ) -> NoReturn:
+        # Explains why no row matched: the actor is missing or in another version.
+        if expected_versions is None:
             raise exceptions.ActorNotFoundError(actor_id)
 
-        await self.session.delete(db_actor)
+        raise exceptions.ActorVersionMismatchError(
+            actor_id, await self.read_actor_version(actor_id)
+        )
+
+
+def create_actor_loader(
+    session_factory: Callable[[], AsyncContextManager[asyncio.AsyncSession]],
+    window: float = 0,
+    max_batch_size: int = 1000,
+) -> batching.BatchLoader[int, service.Actor]:
+    """Creates a loader that reads concurrently requested actors with a single query.
+
+    The batches are read through their own sessions, outside the transactions of the
+    requests that asked for the actors.
+
+    Args:
+        session_factory (Callable[[], AsyncContextManager[asyncio.AsyncSession]]):
+            Opens a session to the database for every batch.
+        window (float): Seconds to wait for more actor IDs after the first ID of a
+            batch, or zero to only wait for the current iteration of the event loop.
+        max_batch_size (int): Number of actor IDs after which a batch is read at once.
+
+    Returns:
+        batching.BatchLoader[int, service.Actor]: The loader of actors by their ID.
+    """
+
+    async def read_actors_by_id(actor_ids: list[int]) -> dict[int, service.Actor]:
+        async with session_factory() as async_session:
+            statement = statements.select_actors_by_ids(
+                actor_ids, async_session.get_bind().dialect
+            )
+            result = await async_session.execute(statement)
+
+            return {
+                actor.actor_id: actor
+                for actor in statements.to_actors(service.Actor, result)
+            }
+
+    return batching.BatchLoader(read_actors_by_id, window, max_batch_size)
+
+
+def create_actor_writer(
+    session_factory: Callable[[], AsyncContextManager[asyncio.AsyncSession]],
+    window: float = 0,
+    max_batch_size: int = 1000,
+) -> batching.BatchWriter[tuple[str, str], service.Actor]:
+    """Creates a writer that inserts concurrently created actors with a single query.
+
+    Every batch is inserted with one multi-row `INSERT ... RETURNING` and committed
+    in a transaction of its own, outside the transactions of the requests that
+    created the actors. If a row violates a constraint, the batch is rolled back and
+    its rows are inserted again one by one, each in a savepoint, so that only the
+    caller of the bad row receives its error.
+
+    Args:
+        session_factory (Callable[[], AsyncContextManager[asyncio.AsyncSession]]):
+            Opens a session to the database that commits when it is closed.
+        window (float): Seconds to wait for more actors after the first actor of a
+            batch, or zero to only wait for the current iteration of the event loop.
+        max_batch_size (int): Number of actors after which a batch is inserted at once.
+
+    Returns:
+        batching.BatchWriter[tuple[str, str], service.Actor]: The writer of actors by
+            their first and last names.
+    """
+
+    async def insert_actors(
+        names: list[tuple[str, str]],
+    ) -> list[Union[service.Actor, Exception]]:
+        try:
+            async with session_factory() as async_session:
+                return list(
+                    await SQLAlchemyActorMapper(async_session).create_actors(names)
+                )
+        except ROW_ERRORS:
+            if len(names) == 1:
+                raise
+
+        outcomes: list[Union[service.Actor, Exception]] = []
+
+        async with session_factory() as async_session:
+            actor_mapper = SQLAlchemyActorMapper(async_session)
+
+            for first_name, last_name in names:
+                try:
+                    async with async_session.begin_nested():
+                        actor = await actor_mapper.create_actor(first_name, last_name)
+                except ROW_ERRORS as error:
+                    outcomes.append(error)
+                else:
+                    outcomes.append(actor)
+
+        return outcomes
+
+    return batching.BatchWriter(insert_actors, window, max_batch_size)
+
+
+def create_id_allocator(
+    session_factory: Callable[[], AsyncContextManager[asyncio.AsyncSession]],
+    block_size: int,
+) -> identifiers.AsyncIdentifierAllocator:
+    """Creates an allocator of actor IDs that reserves blocks of the ID sequence.
+
+    Only PostgreSQL has sequences. The blocks are reserved through their own sessions,
+    outside the transactions of the requests, so rolled back requests skip their IDs.
+
+    Args:
+        session_factory (Callable[[], AsyncContextManager[asyncio.AsyncSession]]):
+            Opens a session to the database for every block.
+        block_size (int): Number of IDs that are reserved at once.
+
+    Returns:
+        identifiers.AsyncIdentifierAllocator: The allocator of actor IDs.
+    """
+
+    async def reserve(count: int) -> list[int]:
+        async with session_factory() as async_session:
+            result = await async_session.scalars(
+                identifiers.select_next_values(models.actor_id_sequence, count)
+            )
+
+            return list(result)
+
+    return identifiers.AsyncIdentifierAllocator(reserve, block_size)
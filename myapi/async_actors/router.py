@@ -1,26 +1,280 @@
-from typing import Annotated, Iterator
+import contextlib
+from typing import Annotated, Any, AsyncIterator, Optional
 
 import fastapi
+from fastapi import responses
+from sqlalchemy.ext import asyncio
+
+from myapi.async_actors import caching, exceptions, queries, schemas, service
+from myapi.shared import (
+    batching,
+    cache,
+    coalescing,
+    conditional,
+    configuration,
+    dependencies,
+    export,
+    imports,
+    metrics,
+    pagination,
+    parameters,
+    payloads,
+    serialization,
+    timing,
+)
+from myapi.shared.database import async_session, identifiers, statements
+
+EXPORT_FIELDNAMES = ("actor_id", "first_name", "last_name")
+IMPORT_FIELDNAMES = ("first_name", "last_name")
+SEARCH_QUERY_MAX_LENGTH = 100
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 100
+# Types of the values of the sort key in the cursor of a filtered listing, per order.
+CURSOR_TYPES = {
+    service.ActorOrder.ID: (int,),
+    service.ActorOrder.NAME: (str, str, int),
+}
+
+actor_reads: coalescing.SingleFlight[int, service.Actor] = coalescing.SingleFlight()
+metrics.register_counters(
+    "actor_reads",
+    "Executed and coalesced reads of single actors.",
+    actor_reads.statistics,
+    engine="async",
+)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: fastapi.FastAPI) -> AsyncIterator[dict[str, Any]]:
+    """Creates the asynchronous database engine and the actor batchers on startup.
+
+    Yields:
+        AsyncIterator[dict[str, Any]]: The lifespan state of the router.
+    """
+
+    async with dependencies.async_database_lifespan(app) as state:
+        yield {
+            **state,
+            "actor_loader": configure_actor_loader(
+                state["async_database_session_factory"]
+            ),
+            "actor_writer": configure_actor_writer(
+                state["async_database_session_factory"]
+            ),
+            "async_id_allocator": configure_id_allocator(
+                state["async_database_session_factory"]
+            ),
+        }
 
-from myapi.async_actors import exceptions, queries, schemas, service
-from myapi.shared import dependencies
 
 router = fastapi.APIRouter(
     prefix="/async/actors",
     tags=["async-actors"],
+    lifespan=lifespan,
+    route_class=timing.TimedRoute,
 )
 
 
+def configure_actor_loader(
+    session_factory: async_session.SQLAlchemyAsyncSessionFactory,
+) -> Optional[batching.BatchLoader[int, service.Actor]]:
+    """Creates the actor loader of this process, or None if batching is disabled.
+
+    Returns:
+        Optional[batching.BatchLoader[int, service.Actor]]: The loader that batches
+            concurrent reads of actors by their ID.
+    """
+
+    batch_configuration = configuration.BatchConfiguration.from_environment()
+
+    if batch_configuration.max_size <= 0:
+        return None
+
+    actor_loader = queries.create_actor_loader(
+        session_factory.get_session,
+        batch_configuration.window,
+        batch_configuration.max_size,
+    )
+    metrics.register_counters(
+        "actor_loader",
+        "Pending loads and batches of the actor loader.",
+        actor_loader.statistics,
+        engine="async",
+    )
+
+    return actor_loader
+
+
+def get_actor_loader(
+    request: fastapi.Request,
+) -> Optional[batching.BatchLoader[int, service.Actor]]:
+    """Returns the actor loader of this process, or None if batching is disabled.
+
+    Returns:
+        Optional[batching.BatchLoader[int, service.Actor]]: The loader that batches
+            concurrent reads of actors by their ID.
+    """
+
+    return request.state.actor_loader
+
+
+def configure_actor_writer(
+    session_factory: async_session.SQLAlchemyAsyncSessionFactory,
+) -> Optional[batching.BatchWriter[tuple[str, str], service.Actor]]:
+    """Creates the actor writer of this process, or None if write batching is disabled.
+
+    Returns:
+        Optional[batching.BatchWriter[tuple[str, str], service.Actor]]: The writer
+            that batches concurrent creations of actors.
+    """
+
+    write_batch_configuration = configuration.WriteBatchConfiguration.from_environment()
+
+    if write_batch_configuration.max_size <= 0:
+        return None
+
+    actor_writer = queries.create_actor_writer(
+        session_factory.get_session,
+        write_batch_configuration.window,
+        write_batch_configuration.max_size,
+    )
+    metrics.register_counters(
+        "actor_writer",
+        "Pending writes, batches and failures of the actor writer.",
+        actor_writer.statistics,
+        engine="async",
+    )
+
+    return actor_writer
+
+
+def get_actor_writer(
+    request: fastapi.Request,
+) -> Optional[batching.BatchWriter[tuple[str, str], service.Actor]]:
+    """Returns the actor writer of this process, or None if write batching is disabled.
+
+    Returns:
+        Optional[batching.BatchWriter[tuple[str, str], service.Actor]]: The writer
+            that batches concurrent creations of actors.
+    """
+
+    return request.state.actor_writer
+
+
+def configure_id_allocator(
+    session_factory: async_session.SQLAlchemyAsyncSessionFactory,
+) -> Optional[identifiers.AsyncIdentifierAllocator]:
+    """Creates the actor ID allocator of this process, or None if it is disabled.
+
+    Returns:
+        Optional[identifiers.AsyncIdentifierAllocator]: The allocator
+            that reserves blocks of actor IDs.
+    """
+
+    identifier_configuration = configuration.IdentifierConfiguration.from_environment()
+
+    if identifier_configuration.block_size <= 0:
+        return None
+
+    id_allocator = queries.create_id_allocator(
+        session_factory.get_session, identifier_configuration.block_size
+    )
+    metrics.register_counters(
+        "actor_id_allocator",
+        "Allocated identifiers and reserved blocks of the actor ID allocator.",
+        id_allocator.statistics,
+        engine="async",
+    )
+
+    return id_allocator
+
+
+def get_id_allocator(
+    request: fastapi.Request,
+) -> Optional[identifiers.AsyncIdentifierAllocator]:
+    """Returns the actor ID allocator of this process, or None if it is disabled.
+
+    Returns:
+        Optional[identifiers.AsyncIdentifierAllocator]: The allocator
+            that reserves blocks of actor IDs.
+    """
+
+    return request.state.async_id_allocator
+
+
 def get_actor_mapper(
-    database_session=fastapi.Depends(dependencies.get_async_database_session),
-) -> Iterator[service.ActorMapper]:
-    """A generator for concrete instances of the Actor data mapper.
+    database_session=fastapi.Depends(
+        dependencies.get_async_database_session, scope="function"
+    ),
+    actor_cache=fastapi.Depends(cache.get_actor_cache),
+    actor_writer=fastapi.Depends(get_actor_writer),
+    id_allocator=fastapi.Depends(get_id_allocator),
+) -> service.ActorMapper:
+    """Returns a concrete instance of the Actor data mapper.
 
-    Yields:
-        Iterator[service.ActorMapper]: A concrete instance of an Actor data mapper.
+    The session is committed and its connection returned to the pool as soon as
+    the path operation returns, before the response is sent. With write batching,
+    created actors are committed by the actor writer instead, and the session does
+    not check out a connection for them.
+
+    Reads are neither shared with nor batched across other requests, as they must
+    see the uncommitted writes of this session, and other requests must not.
+
+    Returns:
+        service.ActorMapper: A concrete instance of an Actor data mapper.
     """
 
-    yield queries.SQLAlchemyActorMapper(database_session)
+    return decorate_actor_mapper(
+        queries.SQLAlchemyActorMapper(
+            database_session, actor_writer=actor_writer, id_allocator=id_allocator
+        ),
+        actor_cache,
+        database_session,
+    )
+
+
+def get_read_only_actor_mapper(
+    database_session=fastapi.Depends(
+        dependencies.get_async_read_only_database_session, scope="function"
+    ),
+    actor_cache=fastapi.Depends(cache.get_actor_cache),
+    actor_loader=fastapi.Depends(get_actor_loader),
+) -> service.ActorMapper:
+    """Returns a concrete instance of the Actor data mapper for read-only requests.
+
+    The session does not open a transaction and returns its connection to the pool
+    as soon as the path operation returns, before the response is sent.
+
+    Returns:
+        service.ActorMapper: A concrete instance of an Actor data mapper.
+    """
+
+    return decorate_actor_mapper(
+        queries.SQLAlchemyActorMapper(database_session, actor_reads, actor_loader),
+        actor_cache,
+    )
+
+
+def decorate_actor_mapper(
+    actor_mapper: service.ActorMapper,
+    actor_cache: Optional[cache.ActorCache],
+    database_session: Optional[asyncio.AsyncSession] = None,
+) -> service.ActorMapper:
+    """Decorates the mapper with the read-through actor cache if caching is enabled.
+
+    The cache invalidates the actors that are written in `database_session` again
+    once its transaction ends.
+    """
+
+    if actor_cache is None:
+        return actor_mapper
+
+    return caching.CachingActorMapper(
+        actor_mapper,
+        actor_cache,
+        cache.get_cache_configuration().negative_ttl,
+        database_session,
+    )
 
 
 @router.post("/", response_model=schemas.ReadActorResponse)
@@ -28,50 +282,380 @@ async def create_actor(
     actor: schemas.CreateActorRequest,
     actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
 ):
-    return await actor_mapper.create_actor(actor.first_name, actor.last_name)
+    return serialization.json_response(
+        await actor_mapper.create_actor(actor.first_name, actor.last_name)
+    )
+
+
+async def get_bulk_actors(
+    request: fastapi.Request,
+) -> list[schemas.CreateActorRequest]:
+    """Reads the actors to be created from a JSON array or an NDJSON stream.
+
+    Returns:
+        list[schemas.CreateActorRequest]: The validated actors in input order.
+    """
+
+    return await payloads.read_records(request, schemas.CreateActorRequest)
+
+
+@router.post(
+    "/bulk",
+    response_model=schemas.CreateActorsResponse,
+    openapi_extra=payloads.bulk_request_body("CreateActorRequest"),
+)
+async def create_actors(
+    actors: Annotated[
+        list[schemas.CreateActorRequest], fastapi.Depends(get_bulk_actors)
+    ],
+    actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+):
+    created_actors = await actor_mapper.create_actors(
+        [(actor.first_name, actor.last_name) for actor in actors]
+    )
+
+    return {"actor_ids": [actor.actor_id for actor in created_actors]}
+
+
+@router.post(
+    "/import",
+    response_model=schemas.ImportActorsResponse,
+    openapi_extra=imports.import_request_body(),
+)
+async def import_actors(
+    request: fastapi.Request,
+    actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+):
+    parser = imports.RecordParser(
+        imports.get_import_format(request),
+        schemas.CreateActorRequest,
+        IMPORT_FIELDNAMES,
+    )
+
+    async def read_names() -> AsyncIterator[tuple[str, str]]:
+        async for actor in parser.parse_async(request.stream()):
+            yield actor.first_name, actor.last_name
+
+    try:
+        imported = await actor_mapper.import_actors(read_names())
+    except imports.ImportFormatError as exc:
+        raise fastapi.HTTPException(status_code=400, detail=exc.args[0])
+
+    return {
+        "imported": imported,
+        "rejected": parser.report.rejected,
+        "lines": parser.report.lines,
+        "errors": parser.report.errors,
+    }
+
+
+@router.get("/", response_model=schemas.ReadActorsResponse)
+async def read_actors(
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+    limit: Annotated[
+        int, fastapi.Query(ge=1, le=pagination.MAX_PAGE_SIZE)
+    ] = pagination.DEFAULT_PAGE_SIZE,
+    cursor: Annotated[Optional[str], fastapi.Query(alias="next")] = None,
+    ids: Annotated[
+        Optional[str],
+        fastapi.Query(description="Comma-separated list of actor IDs to be read"),
+    ] = None,
+    last_name: Annotated[
+        Optional[str], fastapi.Query(description="Last name of the actors to be read")
+    ] = None,
+    first_name: Annotated[
+        Optional[str], fastapi.Query(description="First name of the actors to be read")
+    ] = None,
+    prefix: Annotated[
+        bool, fastapi.Query(description="Match the last name as a prefix")
+    ] = False,
+    order: Annotated[service.ActorOrder, fastapi.Query(alias="sort")] = (
+        service.ActorOrder.ID
+    ),
+):
+    actor_filter = service.ActorFilter(last_name, first_name, prefix, order)
+
+    if ids is not None:
+        if actor_filter != service.ActorFilter():
+            raise fastapi.HTTPException(
+                status_code=400,
+                detail="IDs cannot be combined with filters or a sort order",
+            )
+
+        return serialization.json_response(
+            await lookup_response(parameters.parse_ids(ids), actor_mapper)
+        )
+
+    if actor_filter != service.ActorFilter():
+        return serialization.json_response(
+            await filter_response(actor_filter, limit, cursor, actor_mapper)
+        )
+
+    after_actor_id = None
+
+    if cursor is not None:
+        try:
+            (after_actor_id,) = pagination.decode_cursor(cursor, int)
+        except pagination.InvalidCursorError as exc:
+            raise fastapi.HTTPException(status_code=400, detail=exc.args[0])
+
+    page = await actor_mapper.read_actors_page(limit, after_actor_id)
+
+    return serialization.json_response(
+        {
+            "actors": page.actors,
+            "next": (
+                pagination.encode_cursor(page.next_actor_id)
+                if page.next_actor_id is not None
+                else None
+            ),
+            "missing_actor_ids": [],
+        }
+    )
+
+
+async def filter_response(
+    actor_filter: service.ActorFilter,
+    limit: int,
+    cursor: Optional[str],
+    actor_mapper: service.ActorMapper,
+) -> dict[str, Any]:
+    after = None
+
+    try:
+        if cursor is not None:
+            after = tuple(
+                pagination.decode_cursor(cursor, *CURSOR_TYPES[actor_filter.order])
+            )
+
+        page = await actor_mapper.filter_actors(actor_filter, limit, after)
+    except (
+        pagination.InvalidCursorError,
+        statements.UnsupportedActorFilterError,
+    ) as exc:
+        raise fastapi.HTTPException(status_code=400, detail=exc.args[0])
+
+    return {
+        "actors": page.actors,
+        "next": (
+            pagination.encode_cursor(*page.next_key)
+            if page.next_key is not None
+            else None
+        ),
+        "missing_actor_ids": [],
+    }
+
+
+@router.post("/lookup", response_model=schemas.ReadActorsResponse)
+async def lookup_actors(
+    lookup: schemas.ReadActorsRequest,
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+):
+    return serialization.json_response(
+        await lookup_response(parameters.unique_ids(lookup.actor_ids), actor_mapper)
+    )
+
+
+async def lookup_response(
+    actor_ids: list[int], actor_mapper: service.ActorMapper
+) -> dict[str, Any]:
+    actors = await actor_mapper.read_actors_by_ids(actor_ids)
+    found_actor_ids = {actor.actor_id for actor in actors}
+
+    return {
+        "actors": actors,
+        "next": None,
+        "missing_actor_ids": [
+            actor_id for actor_id in actor_ids if actor_id not in found_actor_ids
+        ],
+    }
+
+
+@router.get("/search", response_model=schemas.ReadActorsResponse)
+async def search_actors(
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+    query: Annotated[
+        str, fastapi.Query(alias="q", min_length=1, max_length=SEARCH_QUERY_MAX_LENGTH)
+    ],
+    limit: Annotated[
+        int, fastapi.Query(ge=1, le=pagination.MAX_PAGE_SIZE)
+    ] = pagination.DEFAULT_PAGE_SIZE,
+    cursor: Annotated[Optional[str], fastapi.Query(alias="next")] = None,
+):
+    page = await actor_mapper.search_actors(
+        query, limit, after=decode_search_cursor(cursor)
+    )
+
+    return serialization.json_response(search_response(page))
+
+
+@router.get("/autocomplete", response_model=schemas.ReadActorsResponse)
+async def autocomplete_actors(
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+    query: Annotated[
+        str, fastapi.Query(alias="q", min_length=1, max_length=SEARCH_QUERY_MAX_LENGTH)
+    ],
+    limit: Annotated[
+        int, fastapi.Query(ge=1, le=AUTOCOMPLETE_MAX_LIMIT)
+    ] = AUTOCOMPLETE_DEFAULT_LIMIT,
+    cursor: Annotated[Optional[str], fastapi.Query(alias="next")] = None,
+):
+    page = await actor_mapper.search_actors(
+        query, limit, prefix=True, after=decode_search_cursor(cursor)
+    )
+
+    return serialization.json_response(search_response(page))
+
+
+def decode_search_cursor(cursor: Optional[str]) -> Optional[tuple[int, int]]:
+    """Decodes the cursor of a search page into the rank and ID to continue after.
+
+    Raises:
+        fastapi.HTTPException: Raised with status 400 if the cursor is invalid.
+    """
+
+    if cursor is None:
+        return None
+
+    try:
+        rank, actor_id = pagination.decode_cursor(cursor, int, int)
+    except pagination.InvalidCursorError as exc:
+        raise fastapi.HTTPException(status_code=400, detail=exc.args[0])
+
+    return rank, actor_id
+
+
+def search_response(page: service.ActorSearchPage) -> dict[str, Any]:
+    return {
+        "actors": page.actors,
+        "next": (
+            pagination.encode_cursor(*page.next_key)
+            if page.next_key is not None
+            else None
+        ),
+        "missing_actor_ids": [],
+    }
+
+
+@router.get("/export", response_class=responses.StreamingResponse)
+async def export_actors(
+    session_factory: Annotated[
+        async_session.SQLAlchemyAsyncSessionFactory,
+        fastapi.Depends(dependencies.get_async_database_session_factory),
+    ],
+    export_format: Annotated[
+        export.ExportFormat, fastapi.Query(alias="format")
+    ] = export.ExportFormat.NDJSON,
+):
+    async def generate_export() -> AsyncIterator[bytes]:
+        yield export.encode_header(export_format, EXPORT_FIELDNAMES)
+
+        async with session_factory.get_session() as database_session:
+            actor_mapper = queries.SQLAlchemyActorMapper(database_session)
+
+            async for actors in actor_mapper.stream_actors(export.EXPORT_BATCH_SIZE):
+                yield export.encode_records(export_format, EXPORT_FIELDNAMES, actors)
+
+    return responses.StreamingResponse(
+        generate_export(),
+        media_type=export_format.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="actors.{export_format.value}"'
+        },
+    )
 
 
 @router.get("/{actor_id}", response_model=schemas.ReadActorResponse)
 async def read_actor(
     actor_id: int,
-    actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+    response: fastapi.Response,
+    actor_mapper: Annotated[
+        service.ActorMapper, fastapi.Depends(get_read_only_actor_mapper)
+    ],
+    if_none_match: Annotated[Optional[str], fastapi.Header()] = None,
 ):
     try:
-        return await actor_mapper.read_actor(actor_id)
+        # A single read serves both outcomes, as a changed actor is sent right away.
+        actor = await actor_mapper.read_actor(actor_id)
     except exceptions.ActorNotFoundError as exc:
         raise fastapi.HTTPException(status_code=404, detail=exc.args[0])
 
+    if if_none_match is not None and not conditional.none_match(
+        if_none_match, actor.version
+    ):
+        return conditional.not_modified(actor.version)
+
+    response.headers["ETag"] = conditional.format_etag(actor.version)
+
+    return serialization.json_response(actor, response)
+
 
 @router.patch("/{actor_id}", response_model=schemas.ReadActorResponse)
 async def update_actor(
     actor_id: int,
     new_attributes: schemas.UpdateActorRequest,
+    response: fastapi.Response,
     actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+    if_match: Annotated[Optional[str], fastapi.Header()] = None,
 ):
-    try:
-        if new_attributes.first_name:
-            await actor_mapper.update_actor_first_name(
-                actor_id, new_attributes.first_name
-            )
-
-        if new_attributes.last_name:
-            await actor_mapper.update_actor_last_name(
-                actor_id, new_attributes.last_name
-            )
+    changes = {
+        attribute: value
+        for attribute, value in new_attributes.model_dump().items()
+        if value
+    }
 
-        return await actor_mapper.read_actor(actor_id)
+    try:
+        actor = await actor_mapper.update_actor(
+            actor_id, conditional.expected_versions(if_match), **changes
+        )
     except exceptions.ActorNotFoundError as exc:
         raise fastapi.HTTPException(status_code=404, detail=exc.args[0])
+    except exceptions.ActorVersionMismatchError as exc:
+        raise fastapi.HTTPException(status_code=412, detail=exc.args[0])
+
+    response.headers["ETag"] = conditional.format_etag(actor.version)
+
+    return serialization.json_response(actor, response)
+
+
+@router.delete("/", response_model=schemas.DeleteActorsResponse)
+async def delete_actors(
+    actor_ids: Annotated[list[int], fastapi.Depends(parameters.get_ids)],
+    actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+):
+    deleted_actor_ids = set(await actor_mapper.delete_actors(actor_ids))
+
+    return {
+        "actor_ids": [
+            actor_id for actor_id in actor_ids if actor_id in deleted_actor_ids
+        ],
+        "missing_actor_ids": [
+            actor_id for actor_id in actor_ids if actor_id not in deleted_actor_ids
+        ],
+    }
 
 
 @router.delete("/{actor_id}", response_model=schemas.DeleteActorResponse)
 async def delete_actor(
     actor_id: int,
     actor_mapper: Annotated[service.ActorMapper, fastapi.Depends(get_actor_mapper)],
+    if_match: Annotated[Optional[str], fastapi.Header()] = None,
 ):
     try:
-        await actor_mapper.delete_actor(actor_id)
+        await actor_mapper.delete_actor(
+            actor_id, conditional.expected_versions(if_match)
+        )
     except exceptions.ActorNotFoundError as exc:
         raise fastapi.HTTPException(status_code=404, detail=exc.args[0])
+    except exceptions.ActorVersionMismatchError as exc:
+        raise fastapi.HTTPException(status_code=412, detail=exc.args[0])
 
     return {"actor_id": actor_id}
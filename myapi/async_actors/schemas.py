@@ -8,12 +8,38 @@ class CreateActorRequest(pydantic.BaseModel):
     last_name: str
 
 
+class CreateActorsResponse(pydantic.BaseModel):
+    actor_ids: list[int]
+
+
+class ImportLineError(pydantic.BaseModel):
+    line: int
+    message: str
+
+
+class ImportActorsResponse(pydantic.BaseModel):
+    imported: int
+    rejected: int
+    lines: int
+    errors: list[ImportLineError]
+
+
 class ReadActorResponse(pydantic.BaseModel):
     actor_id: int
     first_name: str
     last_name: str
 
 
+class ReadActorsRequest(pydantic.BaseModel):
+    actor_ids: list[int]
+
+
+class ReadActorsResponse(pydantic.BaseModel):
+    actors: list[ReadActorResponse]
+    next: Optional[str] = None
+    missing_actor_ids: list[int] = []
+
+
 class UpdateActorRequest(pydantic.BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
@@ -21,3 +47,8 @@ class UpdateActorRequest(pydantic.BaseModel):
 
 class DeleteActorResponse(pydantic.BaseModel):
     actor_id: int
+
+
+class DeleteActorsResponse(pydantic.BaseModel):
+    actor_ids: list[int]
+    missing_actor_ids: list[int]
@@ -0,0 +1,95 @@
+"""The application with both actor stacks on a local SQLite database.
+
+It serves the load tests of `benchmarks.load` and the router tests, which run without
+a PostgreSQL server. The lifespan of the routers is replaced by one that creates
+SQLite engines instead of PostgreSQL engines: the sync stack uses the pysqlite driver
+and the async stack the aiosqlite driver.
+"""
+
+import contextlib
+from typing import Any, AsyncIterator
+
+import fastapi
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.ext import asyncio
+from starlette import types
+
+from myapi import main
+from myapi.actors import router as actor_router
+from myapi.async_actors import router as async_actor_router
+from myapi.shared import dependencies
+from myapi.shared.database import async_session, models, session
+
+
+def configure_connection(dbapi_connection, connection_record) -> None:
+    # Readers do not block the writer in WAL mode, writers wait for each other.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
+
+
+def create_lifespan(database_path: str) -> types.StatefulLifespan[fastapi.FastAPI]:
+    """Creates the lifespan that provides the state of the routers on SQLite.
+
+    Args:
+        database_path (str): The path of the database file, which is created with
+            the tables of the models if it does not exist.
+
+    Returns:
+        types.StatefulLifespan[fastapi.FastAPI]: The lifespan.
+    """
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: fastapi.FastAPI) -> AsyncIterator[dict[str, Any]]:
+        engine = sqlalchemy.create_engine(f"sqlite:///{database_path}")
+        async_engine = asyncio.create_async_engine(
+            f"sqlite+aiosqlite:///{database_path}"
+        )
+        event.listen(engine, "connect", configure_connection)
+        event.listen(async_engine.sync_engine, "connect", configure_connection)
+        models.Actor.metadata.create_all(engine)
+
+        database_session_factory = session.SQLAlchemySessionFactory(engine)
+        async_database_session_factory = async_session.SQLAlchemyAsyncSessionFactory(
+            async_engine
+        )
+        dependencies.register_database_metrics("sync", database_session_factory)
+        dependencies.register_database_metrics("async", async_database_session_factory)
+
+        try:
+            yield {
+                "database_session_factory": database_session_factory,
+                "async_database_session_factory": async_database_session_factory,
+                "actor_loader": async_actor_router.configure_actor_loader(
+                    async_database_session_factory
+                ),
+                "actor_writer": async_actor_router.configure_actor_writer(
+                    async_database_session_factory
+                ),
+                "id_allocator": actor_router.configure_id_allocator(
+                    database_session_factory
+                ),
+                "async_id_allocator": async_actor_router.configure_id_allocator(
+                    async_database_session_factory
+                ),
+            }
+        finally:
+            engine.dispose()
+            await async_engine.dispose()
+
+    return lifespan
+
+
+def create_app(database_path: str) -> fastapi.FastAPI:
+    """Creates the application on a SQLite database.
+
+    Args:
+        database_path (str): The path of the database file.
+
+    Returns:
+        fastapi.FastAPI: The application, separate from `myapi.main.app`.
+    """
+
+    return main.create_app(create_lifespan(database_path))
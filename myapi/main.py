@@ -1,14 +1,57 @@
+from typing import Optional
+
 import fastapi
+from fastapi import responses
+from starlette import types
 
 from myapi.actors import router as actor_router
 from myapi.async_actors import router as async_actor_router
+from myapi.shared import metrics, timing
+from myapi.shared.database import diagnostics
+
+
+def create_app(
+    lifespan: Optional[types.StatefulLifespan[fastapi.FastAPI]] = None,
+) -> fastapi.FastAPI:
+    """Creates the application with both actor routers.
+
+    Args:
+        lifespan (Optional[types.StatefulLifespan[fastapi.FastAPI]]): Replaces the lifespans of the
+            routers, which create the PostgreSQL engines, e.g. to run the routers on
+            another database. It must provide the same lifespan state.
+
+    Returns:
+        fastapi.FastAPI: The application.
+    """
+
+    app = fastapi.FastAPI()
+    app.add_middleware(diagnostics.StatementCheckMiddleware)
+    app.add_middleware(timing.ServerTimingMiddleware)
+    app.add_middleware(metrics.RequestMetricsMiddleware)
 
-app = fastapi.FastAPI()
+    app.include_router(actor_router.router, tags=["actors"])
+    app.include_router(async_actor_router.router, tags=["async-actors"])
 
-app.include_router(actor_router.router, tags=["actors"])
-app.include_router(async_actor_router.router, tags=["async-actors"])
+    if lifespan is not None:
+        # Including a router merges its lifespan into the one of the application.
+        app.router.lifespan_context = lifespan
+
+    app.add_api_route("/", index)
+    app.add_api_route(
+        "/metrics", read_metrics, response_class=responses.PlainTextResponse
+    )
+
+    return app
 
 
-@app.get("/")
 def index():
     return {"message": "Welcome to my API"}
+
+
+def read_metrics():
+    return responses.PlainTextResponse(
+        metrics.render(), media_type=metrics.CONTENT_TYPE
+    )
+
+
+app = create_app()
@@ -0,0 +1,227 @@
+import asyncio
+from typing import (
+    Awaitable,
+    Callable,
+    Generic,
+    Hashable,
+    Mapping,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ItemT = TypeVar("ItemT")
+ValueT = TypeVar("ValueT")
+
+
+class BatchLoader(Generic[KeyT, ValueT]):
+    """Merges concurrent loads of different keys into a single batch load.
+
+    Keys that are requested within the same iteration of the event loop, or within
+    the given window, are loaded by a single call of the batch function. Every
+    caller receives the value of its own key. Equal keys are only loaded once.
+
+    Args:
+        load_batch (Callable[[list[KeyT]], Awaitable[Mapping[KeyT, ValueT]]]): Loads
+            the values of many keys at once. Keys without a value are omitted.
+        window (float): Seconds to wait for more keys after the first key of a batch,
+            or zero to only wait for the current iteration of the event loop.
+        max_batch_size (int): Number of keys after which a batch is loaded at once.
+    """
+
+    def __init__(
+        self,
+        load_batch: Callable[[list[KeyT]], Awaitable[Mapping[KeyT, ValueT]]],
+        window: float = 0,
+        max_batch_size: int = 1000,
+    ) -> None:
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.loads = 0
+        self.batches = 0
+
+        self._load_batch = load_batch
+        self._pending: dict[KeyT, asyncio.Future[Optional[ValueT]]] = {}
+        self._dispatch_handle: Optional[asyncio.Handle] = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: KeyT) -> Optional[ValueT]:
+        """Loads the value of a key together with other concurrently requested keys.
+
+        Args:
+            key (KeyT): The key to be loaded.
+
+        Returns:
+            Optional[ValueT]: The value of the key, or None if the key has no value.
+        """
+
+        self.loads += 1
+        pending_load = self._pending.get(key)
+
+        if pending_load is None:
+            loop = asyncio.get_running_loop()
+            pending_load = loop.create_future()
+            self._pending[key] = pending_load
+
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._dispatch_handle is None:
+                if self.window > 0:
+                    self._dispatch_handle = loop.call_later(self.window, self._dispatch)
+                else:
+                    self._dispatch_handle = loop.call_soon(self._dispatch)
+
+        # A cancelled caller must not cancel the load for other callers of the key.
+        return await asyncio.shield(pending_load)
+
+    def _dispatch(self) -> None:
+        if self._dispatch_handle is not None:
+            self._dispatch_handle.cancel()
+            self._dispatch_handle = None
+
+        batch, self._pending = self._pending, {}
+        self.batches += 1
+
+        task = asyncio.get_running_loop().create_task(self._resolve(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _resolve(
+        self, batch: dict[KeyT, asyncio.Future[Optional[ValueT]]]
+    ) -> None:
+        try:
+            values = await self._load_batch(list(batch))
+        except Exception as exc:
+            for pending_load in batch.values():
+                if not pending_load.done():
+                    pending_load.set_exception(exc)
+                    # Mark the exception as retrieved in case all callers are gone.
+                    pending_load.exception()
+            return
+
+        for key, pending_load in batch.items():
+            if not pending_load.done():
+                pending_load.set_result(values.get(key))
+
+    def statistics(self) -> dict[str, int]:
+        """Returns the number of loaded keys and executed batches.
+
+        Returns:
+            dict[str, int]: Values of the counters by name.
+        """
+
+        return {
+            "pending": len(self._pending),
+            "loads": self.loads,
+            "batches": self.batches,
+        }
+
+
+class BatchWriter(Generic[ItemT, ValueT]):
+    """Merges concurrent writes of items into a single batch write.
+
+    Items that are written within the same iteration of the event loop, or within the
+    given window, are written by a single call of the batch function in the order of
+    their writes. The batch function returns one outcome per item, a value or an
+    exception, so every caller receives its own value and an item that cannot be
+    written only fails its own caller. If the batch function raises, every caller of
+    the batch fails.
+
+    Args:
+        write_batch (Callable[[list[ItemT]], Awaitable[list[Union[ValueT, Exception]]]]):
+            Writes many items at once and returns the outcomes in the order of the
+            items.
+        window (float): Seconds to wait for more items after the first item of a
+            batch, or zero to only wait for the current iteration of the event loop.
+        max_batch_size (int): Number of items after which a batch is written at once.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[list[ItemT]], Awaitable[list[Union[ValueT, Exception]]]],
+        window: float = 0,
+        max_batch_size: int = 1000,
+    ) -> None:
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.writes = 0
+        self.batches = 0
+        self.failures = 0
+
+        self._write_batch = write_batch
+        self._pending: list[tuple[ItemT, asyncio.Future[ValueT]]] = []
+        self._dispatch_handle: Optional[asyncio.Handle] = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    async def write(self, item: ItemT) -> ValueT:
+        """Writes an item together with other concurrently written items.
+
+        A caller that is cancelled does not withdraw its item, which is written with
+        its batch regardless.
+
+        Args:
+            item (ItemT): The item to be written.
+
+        Returns:
+            ValueT: The value that the batch function returned for the item.
+        """
+
+        self.writes += 1
+        loop = asyncio.get_running_loop()
+        pending_write: asyncio.Future[ValueT] = loop.create_future()
+        self._pending.append((item, pending_write))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._dispatch_handle is None:
+            if self.window > 0:
+                self._dispatch_handle = loop.call_later(self.window, self._dispatch)
+            else:
+                self._dispatch_handle = loop.call_soon(self._dispatch)
+
+        return await asyncio.shield(pending_write)
+
+    def _dispatch(self) -> None:
+        if self._dispatch_handle is not None:
+            self._dispatch_handle.cancel()
+            self._dispatch_handle = None
+
+        batch, self._pending = self._pending, []
+        self.batches += 1
+
+        task = asyncio.get_running_loop().create_task(self._resolve(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _resolve(self, batch: list[tuple[ItemT, asyncio.Future[ValueT]]]) -> None:
+        try:
+            outcomes = await self._write_batch([item for item, _ in batch])
+        except Exception as exc:
+            outcomes = [exc] * len(batch)
+
+        for (_, pending_write), outcome in zip(batch, outcomes):
+            if pending_write.done():
+                continue
+
+            if isinstance(outcome, Exception):
+                self.failures += 1
+                pending_write.set_exception(outcome)
+                # Mark the exception as retrieved in case the caller is gone.
+                pending_write.exception()
+            else:
+                pending_write.set_result(outcome)
+
+    def statistics(self) -> dict[str, int]:
+        """Returns the number of written items, executed batches and failed items.
+
+        Returns:
+            dict[str, int]: Values of the counters by name.
+        """
+
+        return {
+            "pending": len(self._pending),
+            "writes": self.writes,
+            "batches": self.batches,
+            "failures": self.failures,
+        }
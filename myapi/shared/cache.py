@@ -0,0 +1,310 @@
+import collections
+import dataclasses
+import functools
+import operator
+import threading
+import time
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar, Union
+
+from myapi.shared import configuration, metrics
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ValueT = TypeVar("ValueT")
+
+# Primary key, first name, last name and version of a cached actor.
+ActorRow = tuple[int, str, str, int]
+
+NOT_FOUND = object()
+
+_actor_row = operator.attrgetter("actor_id", "first_name", "last_name", "version")
+
+
+class LRUCache(Generic[KeyT, ValueT]):
+    """A bounded, thread-safe least-recently-used cache with expiring entries.
+
+    Args:
+        max_size (int): Maximum number of entries before the least recently used
+            entry is evicted.
+        ttl (float): Default number of seconds after which an entry expires.
+        clock (Callable[[], float]): Monotonic clock that returns the current time.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._clock = clock
+        self._entries: collections.OrderedDict[KeyT, tuple[float, ValueT]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: KeyT) -> Optional[ValueT]:
+        """Returns the value of an entry and marks it as most recently used.
+
+        Args:
+            key (KeyT): Key of the entry.
+
+        Returns:
+            Optional[ValueT]: The cached value, or None if there is no unexpired entry.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+            return value
+
+    def put(self, key: KeyT, value: ValueT, ttl: Optional[float] = None) -> None:
+        """Adds or replaces an entry and evicts the least recently used entries.
+
+        Args:
+            key (KeyT): Key of the entry.
+            value (ValueT): Value of the entry.
+            ttl (Optional[float]): Seconds until the entry expires, defaults to `ttl`
+                of the cache.
+        """
+
+        with self._lock:
+            self._put(key, value, ttl)
+
+    def put_unless(
+        self,
+        key: KeyT,
+        value: ValueT,
+        reject: Callable[[ValueT], bool],
+        ttl: Optional[float] = None,
+    ) -> bool:
+        """Adds or replaces an entry unless `reject` is True for the current value.
+
+        The current value is checked and replaced atomically.
+
+        Args:
+            key (KeyT): Key of the entry.
+            value (ValueT): Value of the entry.
+            reject (Callable[[ValueT], bool]): Returns True if the unexpired value of
+                an existing entry must be kept.
+            ttl (Optional[float]): Seconds until the entry expires, defaults to `ttl`
+                of the cache.
+
+        Returns:
+            bool: True if the entry was added or replaced.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] > self._clock() and reject(entry[1]):
+                return False
+
+            self._put(key, value, ttl)
+
+            return True
+
+    def _put(self, key: KeyT, value: ValueT, ttl: Optional[float]) -> None:
+        self._entries[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: KeyT) -> None:
+        """Removes an entry from the cache if it exists.
+
+        Args:
+            key (KeyT): Key of the entry.
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def statistics(self) -> dict[str, int]:
+        """Returns the counters and the current size of the cache.
+
+        Returns:
+            dict[str, int]: Values of the counters by name.
+        """
+
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ActorFence:
+    """Entry of a written actor, which keeps rows older than the write out of the cache.
+
+    Attributes:
+        version (Optional[int]): Version of the actor after the write, or None if it
+            was deleted.
+    """
+
+    version: Optional[int]
+
+
+class ActorCache:
+    """Cache of actors by primary key, shared by the mappers of both actor routers.
+
+    Actors are cached as rows, so the actors of either router are served from the
+    same entries. A write replaces the entry of an actor with a fence instead of
+    removing it, so a read that started before the write cannot put the previous row
+    back. Rows are only put if they are not older than the cached row or fence.
+
+    Args:
+        max_size (int): Maximum number of cached actors, fences and missing actors.
+        ttl (float): Default number of seconds after which an entry expires.
+        clock (Callable[[], float]): Monotonic clock that returns the current time.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.entries: LRUCache[int, Union[ActorRow, ActorFence, object]] = LRUCache(
+            max_size, ttl, clock
+        )
+
+    def get(self, actor_id: int) -> Union[ActorRow, object, None]:
+        """Returns the row of a cached actor, `NOT_FOUND` or None on a miss.
+
+        Args:
+            actor_id (int): Primary key of the actor.
+
+        Returns:
+            Union[ActorRow, object, None]: The row, `NOT_FOUND` if the actor is cached
+                as missing, or None if it is not cached or was written recently.
+        """
+
+        entry = self.entries.get(actor_id)
+
+        return None if isinstance(entry, ActorFence) else entry
+
+    def put(self, actor: Any) -> None:
+        """Caches an actor that was read, unless a newer row or fence is cached.
+
+        Args:
+            actor (Any): The actor of either router.
+        """
+
+        row: ActorRow = _actor_row(actor)
+        self.entries.put_unless(row[0], row, functools.partial(_is_newer, row[3]))
+
+    def put_missing(self, actor_id: int, ttl: float) -> None:
+        """Caches that an actor does not exist, unless it is cached or was created.
+
+        Args:
+            actor_id (int): Primary key of the missing actor.
+            ttl (float): Seconds for which the actor is cached as missing.
+        """
+
+        self.entries.put_unless(actor_id, NOT_FOUND, _exists, ttl)
+
+    def fence(self, actor_id: int, version: Optional[int]) -> None:
+        """Replaces the entry of a written actor with a fence.
+
+        Args:
+            actor_id (int): Primary key of the written actor.
+            version (Optional[int]): Version of the actor after the write, or None if
+                it was deleted.
+        """
+
+        self.entries.put(actor_id, ActorFence(version))
+
+    def invalidate(self, actor_id: int) -> None:
+        """Removes the entry of an actor, e.g. if a write of it failed.
+
+        Args:
+            actor_id (int): Primary key of the actor.
+        """
+
+        self.entries.invalidate(actor_id)
+
+    def statistics(self) -> dict[str, int]:
+        """Returns the counters and the current size of the cache.
+
+        Returns:
+            dict[str, int]: Values of the counters by name.
+        """
+
+        return self.entries.statistics()
+
+
+def _is_newer(version: int, entry: Union[ActorRow, ActorFence, object]) -> bool:
+    if isinstance(entry, ActorFence):
+        return entry.version is None or entry.version > version
+
+    return isinstance(entry, tuple) and entry[3] > version
+
+
+def _exists(entry: Union[ActorRow, ActorFence, object]) -> bool:
+    return isinstance(entry, tuple) or (
+        isinstance(entry, ActorFence) and entry.version is not None
+    )
+
+
+@functools.cache
+def get_cache_configuration() -> configuration.CacheConfiguration:
+    """Returns the configuration of the actor cache from the environment.
+
+    Returns:
+        configuration.CacheConfiguration: The configuration of the actor cache.
+    """
+
+    return configuration.CacheConfiguration.from_environment()
+
+
+@functools.cache
+def get_actor_cache() -> Optional[ActorCache]:
+    """Returns the actor cache of this process, or None if caching is disabled.
+
+    Returns:
+        Optional[ActorCache]: The actor cache that is shared by all requests of both
+            actor routers.
+    """
+
+    cache_configuration = get_cache_configuration()
+
+    if cache_configuration.size <= 0:
+        return None
+
+    actor_cache = ActorCache(cache_configuration.size, cache_configuration.ttl)
+    metrics.register_counters(
+        "actor_cache",
+        "Size, hits, misses, evictions and expirations of the actor cache.",
+        actor_cache.statistics,
+    )
+
+    return actor_cache
@@ -0,0 +1,76 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ValueT = TypeVar("ValueT")
+
+
+class SingleFlight(Generic[KeyT, ValueT]):
+    """Coalesces concurrent calls with the same key into a single call.
+
+    The first caller of a key executes the call, every caller that arrives while the
+    call is in flight waits for it and receives the same result or exception.
+    """
+
+    def __init__(self) -> None:
+        self.executed = 0
+        self.coalesced = 0
+
+        self._calls: dict[KeyT, asyncio.Future[ValueT]] = {}
+
+    async def call(
+        self, key: KeyT, function: Callable[[], Awaitable[ValueT]]
+    ) -> ValueT:
+        """Awaits the call in flight for the given key or executes a new call.
+
+        Args:
+            key (KeyT): Key that identifies equal calls.
+            function (Callable[[], Awaitable[ValueT]]): Executes the call.
+
+        Returns:
+            ValueT: The result of the call.
+        """
+
+        while (call := self._calls.get(key)) is not None:
+            self.coalesced += 1
+
+            try:
+                return await asyncio.shield(call)
+            except asyncio.CancelledError:
+                # Only retry if the executing caller was cancelled, not this caller.
+                current_task = asyncio.current_task()
+                if not call.cancelled() or (current_task and current_task.cancelling()):
+                    raise
+
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        self.executed += 1
+
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except BaseException as exc:
+            call.set_exception(exc)
+            # Mark the exception as retrieved in case nobody else awaits the call.
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def statistics(self) -> dict[str, int]:
+        """Returns the number of executed and coalesced calls.
+
+        Returns:
+            dict[str, int]: Values of the counters by name.
+        """
+
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,83 @@
+import re
+from typing import Optional
+
+import fastapi
+
+ENTITY_TAG = re.compile(r'(W/)?"([^"]*)"')
+# Versions are stored in a 32-bit integer column, so longer tags never match.
+VERSION_TAG = re.compile(r"[0-9]{1,10}")
+MAX_VERSION = 2**31 - 1
+
+
+def format_etag(version: int) -> str:
+    """Returns the strong entity tag of a resource in the given version.
+
+    Args:
+        version (int): Version of the resource, incremented by every update.
+
+    Returns:
+        str: The value of the `ETag` header.
+    """
+
+    return f'"{version}"'
+
+
+def none_match(if_none_match: str, version: int) -> bool:
+    """Evaluates an `If-None-Match` header against the current version of a resource.
+
+    Entity tags are compared weakly, as required for `If-None-Match`.
+
+    Args:
+        if_none_match (str): Value of the `If-None-Match` request header.
+        version (int): Current version of the resource.
+
+    Returns:
+        bool: True if the request is satisfied, i.e. no entity tag matches.
+    """
+
+    if if_none_match.strip() == "*":
+        return False
+
+    return version not in _versions(if_none_match, weak=True)
+
+
+def expected_versions(if_match: Optional[str]) -> Optional[list[int]]:
+    """Returns the versions of a resource that an `If-Match` header accepts.
+
+    Entity tags are compared strongly, so weak entity tags never match.
+
+    Args:
+        if_match (Optional[str]): Value of the `If-Match` request header, if any.
+
+    Returns:
+        Optional[list[int]]: The accepted versions, or None if any version is
+            accepted.
+    """
+
+    if if_match is None or if_match.strip() == "*":
+        return None
+
+    return _versions(if_match, weak=False)
+
+
+def not_modified(version: int) -> fastapi.Response:
+    """Returns a `304 Not Modified` response for a resource in the given version.
+
+    Args:
+        version (int): Current version of the resource.
+
+    Returns:
+        fastapi.Response: A response without body that repeats the entity tag.
+    """
+
+    return fastapi.Response(status_code=304, headers={"ETag": format_etag(version)})
+
+
+def _versions(header: str, weak: bool) -> list[int]:
+    versions = (
+        int(opaque_tag)
+        for weak_prefix, opaque_tag in ENTITY_TAG.findall(header)
+        if VERSION_TAG.fullmatch(opaque_tag) and (weak or not weak_prefix)
+    )
+
+    return [version for version in versions if version <= MAX_VERSION]
@@ -9,6 +9,11 @@ class DatabaseConfiguration:
     user: str
     password: str
     name: str
+    pool_size: int = 50
+    max_overflow: int = 0
+    pool_timeout: float = 30
+    pool_recycle: int = -1
+    slow_statement_milliseconds: float = 0
 
     @classmethod
     def from_environment(cls):
@@ -21,4 +26,148 @@ class DatabaseConfiguration:
         except KeyError as exc:
             raise EnvironmentError(f"Missing environment variable '{exc.args[0]}'")
 
-        return cls(host, port, user, password, name)
+        try:
+            pool_size = int(os.environ.get("DATABASE_POOL_SIZE", "50"))
+            max_overflow = int(os.environ.get("DATABASE_MAX_OVERFLOW", "0"))
+            pool_timeout = float(os.environ.get("DATABASE_POOL_TIMEOUT", "30"))
+            pool_recycle = int(os.environ.get("DATABASE_POOL_RECYCLE", "-1"))
+            slow_statement_milliseconds = float(
+                os.environ.get("DATABASE_SLOW_STATEMENT_MILLISECONDS", "0")
+            )
+        except ValueError as exc:
+            raise EnvironmentError(f"Invalid database pool configuration: {exc}")
+
+        return cls(
+            host,
+            port,
+            user,
+            password,
+            name,
+            pool_size,
+            max_overflow,
+            pool_timeout,
+            pool_recycle,
+            slow_statement_milliseconds,
+        )
+
+
+@dataclasses.dataclass
+class CacheConfiguration:
+    size: int
+    ttl: float
+    negative_ttl: float
+
+    @classmethod
+    def from_environment(cls):
+        try:
+            size = int(os.environ.get("ACTOR_CACHE_SIZE", "0"))
+            ttl = float(os.environ.get("ACTOR_CACHE_TTL", "5"))
+            negative_ttl = float(os.environ.get("ACTOR_CACHE_NEGATIVE_TTL", "0"))
+        except ValueError as exc:
+            raise EnvironmentError(f"Invalid cache configuration: {exc}")
+
+        return cls(size, ttl, negative_ttl)
+
+
+@dataclasses.dataclass
+class BatchConfiguration:
+    max_size: int
+    window: float
+
+    @classmethod
+    def from_environment(cls):
+        try:
+            max_size = int(os.environ.get("ACTOR_BATCH_MAX_SIZE", "0"))
+            window_microseconds = int(
+                os.environ.get("ACTOR_BATCH_WINDOW_MICROSECONDS", "0")
+            )
+        except ValueError as exc:
+            raise EnvironmentError(f"Invalid batch configuration: {exc}")
+
+        return cls(max_size, window_microseconds / 1_000_000)
+
+
+@dataclasses.dataclass
+class WriteBatchConfiguration:
+    max_size: int
+    window: float
+
+    @classmethod
+    def from_environment(cls):
+        try:
+            max_size = int(os.environ.get("ACTOR_WRITE_BATCH_MAX_SIZE", "0"))
+            window_microseconds = int(
+                os.environ.get("ACTOR_WRITE_BATCH_WINDOW_MICROSECONDS", "0")
+            )
+        except ValueError as exc:
+            raise EnvironmentError(f"Invalid write batch configuration: {exc}")
+
+        return cls(max_size, window_microseconds / 1_000_000)
+
+
+@dataclasses.dataclass
+class IdentifierConfiguration:
+    block_size: int
+
+    @classmethod
+    def from_environment(cls):
+        try:
+            block_size = int(os.environ.get("ACTOR_ID_BLOCK_SIZE", "0"))
+        except ValueError as exc:
+            raise EnvironmentError(f"Invalid identifier configuration: {exc}")
+
+        return cls(block_size)
+
+
+@dataclasses.dataclass
+class SerializationConfiguration:
+    fast_json: bool
+
+    @classmethod
+    def from_environment(cls):
+        return cls(_flag_from_environment("FAST_JSON_RESPONSES", "false"))
+
+
+@dataclasses.dataclass
+class ServerTimingConfiguration:
+    enabled: bool
+    statements: bool
+
+    @classmethod
+    def from_environment(cls):
+        return cls(
+            enabled=_flag_from_environment("SERVER_TIMING", "true"),
+            statements=_flag_from_environment("SERVER_TIMING_STATEMENTS", "false"),
+        )
+
+
+@dataclasses.dataclass
+class StatementCheckConfiguration:
+    sample_rate: float
+    threshold: int
+    strict: bool
+
+    @classmethod
+    def from_environment(cls):
+        try:
+            sample_rate = float(os.environ.get("STATEMENT_CHECK_SAMPLE_RATE", "0.01"))
+            threshold = int(os.environ.get("STATEMENT_CHECK_THRESHOLD", "3"))
+        except ValueError as exc:
+            raise EnvironmentError(f"Invalid statement check configuration: {exc}")
+
+        return cls(
+            sample_rate,
+            threshold,
+            _flag_from_environment("STATEMENT_CHECK_STRICT", "false"),
+        )
+
+
+def _flag_from_environment(name: str, default: str) -> bool:
+    value = os.environ.get(name, default).lower()
+
+    if value not in ("true", "false"):
+        raise EnvironmentError(
+            f"Invalid configuration: {name} must be 'true' or 'false', not '{value}'"
+        )
+
+    return value == "true"
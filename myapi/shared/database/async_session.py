@@ -4,18 +4,65 @@ from typing import AsyncIterator
 
 from sqlalchemy.ext import asyncio
 
+from myapi.shared import statistics
+from myapi.shared.database import instrumentation
+
 logger = logging.getLogger(__name__)
 
 
 class SQLAlchemyAsyncSessionFactory:
-    def __init__(self, host: str, port: int, user: str, password: str, name: str):
-        database_url = rf"postgresql+asyncpg://{user}:{password}@{host}:{port}/{name}"
-        self.engine = asyncio.create_async_engine(
-            database_url, pool_size=50, max_overflow=0
-        )
+    def __init__(self, engine: asyncio.AsyncEngine, slow_statement_seconds: float = 0):
+        self.engine = engine
         self.sessionmaker = asyncio.async_sessionmaker(
             bind=self.engine, expire_on_commit=False
         )
+        self.read_only_sessionmaker = asyncio.async_sessionmaker(
+            bind=self.engine.execution_options(isolation_level="AUTOCOMMIT"),
+            expire_on_commit=False,
+        )
+        self.connection_hold_time = statistics.Histogram()
+        self.pool_wait_time = statistics.Histogram()
+        self.statement_time: dict[str, statistics.Histogram] = {}
+        instrumentation.observe_connection_hold_time(
+            self.engine.sync_engine, self.connection_hold_time
+        )
+        instrumentation.observe_pool_wait_time(
+            self.engine.sync_engine, self.pool_wait_time
+        )
+        instrumentation.observe_statement_time(
+            self.engine.sync_engine, self.statement_time, slow_statement_seconds
+        )
+
+    @classmethod
+    def from_configuration(
+        cls,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        name: str,
+        pool_size: int = 50,
+        max_overflow: int = 0,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        slow_statement_milliseconds: float = 0,
+    ) -> "SQLAlchemyAsyncSessionFactory":
+        """Creates a factory of sessions to a PostgreSQL database through asyncpg.
+
+        Returns:
+            SQLAlchemyAsyncSessionFactory: The factory with a new engine and pool.
+        """
+
+        database_url = rf"postgresql+asyncpg://{user}:{password}@{host}:{port}/{name}"
+        engine = asyncio.create_async_engine(
+            database_url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+        )
+
+        return cls(engine, slow_statement_milliseconds / 1000)
 
     @contextlib.asynccontextmanager
     async def get_session(self) -> AsyncIterator[asyncio.AsyncSession]:
@@ -31,3 +78,27 @@ class SQLAlchemyAsyncSessionFactory:
                 yield session
             finally:
                 logger.debug("closed the asynchronous database session.")
+
+    @contextlib.asynccontextmanager
+    async def get_read_only_session(self) -> AsyncIterator[asyncio.AsyncSession]:
+        """A generator for asynchronous SQLAlchemy ORM sessions that only read from the database.
+
+        The session runs every statement in autocommit mode, so no BEGIN and COMMIT
+        statements are sent. A connection is only checked out of the pool when the
+        first statement is executed.
+
+        Yields:
+            AsyncIterator[asyncio.AsyncSession]: A read-only asynchronous SQLAlchemy ORM session to the database.
+        """
+
+        async with self.read_only_sessionmaker() as session:
+            try:
+                logger.debug("opened the read-only asynchronous database session.")
+                yield session
+            finally:
+                logger.debug("closed the read-only asynchronous database session.")
+
+    async def dispose(self) -> None:
+        """Closes all connections of the engine's pool."""
+
+        await self.engine.dispose()
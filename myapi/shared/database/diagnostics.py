@@ -0,0 +1,300 @@
+import collections
+import dataclasses
+import json
+import logging
+import random
+import re
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence
+
+import sqlalchemy
+from starlette import types
+
+from myapi.shared import configuration, timing
+
+logger = logging.getLogger(__name__)
+
+# Line of an SQLite query plan that reads a table without an index.
+SQLITE_FULL_SCAN = re.compile(r"SCAN (?:TABLE )?(\w+)(?: AS \w+)?")
+
+
+def parameters_shape(parameters: Any) -> str:
+    """Describes the parameters of a statement by their types, without their values.
+
+    Args:
+        parameters (Any): Parameters of a statement as passed to the DBAPI cursor: a
+            mapping or a sequence, or a list of them for an `executemany` call.
+
+    Returns:
+        str: The shape of the parameters, e.g. `(int, str)` or `3 x {id: int}`.
+    """
+
+    if isinstance(parameters, list):
+        shapes = {parameters_shape(row) for row in parameters}
+        shape = shapes.pop() if len(shapes) == 1 else "mixed"
+
+        return f"{len(parameters)} x {shape}"
+
+    if isinstance(parameters, Mapping):
+        pairs = ", ".join(
+            f"{name}: {type(value).__name__}" for name, value in parameters.items()
+        )
+
+        return f"{{{pairs}}}"
+
+    if isinstance(parameters, Sequence) and not isinstance(parameters, str):
+        return f"({', '.join(type(value).__name__ for value in parameters)})"
+
+    return type(parameters).__name__
+
+
+def log_slow_statement(statement: str, parameters: Any, seconds: float) -> None:
+    """Logs a statement that took longer than the configured threshold.
+
+    Args:
+        statement (str): The SQL statement.
+        parameters (Any): The parameters of the statement, only their shape is logged.
+        seconds (float): Execution time of the statement.
+    """
+
+    request_timing = timing.current()
+    route = request_timing.route if request_timing is not None else None
+
+    logger.warning(
+        "Slow statement took %.1f ms on route %s: %s with parameters %s",
+        seconds * 1000,
+        route or "-",
+        statement,
+        parameters_shape(parameters),
+    )
+
+
+@dataclasses.dataclass(frozen=True)
+class RepeatedStatement:
+    """A statement that a single request executed more than once.
+
+    Attributes:
+        statement (str): The SQL statement.
+        executions (int): Number of executions.
+        identical_executions (int): Number of executions that repeated the parameters
+            of an earlier execution, i.e. whose result was already known.
+    """
+
+    statement: str
+    executions: int
+    identical_executions: int
+
+    def __str__(self) -> str:
+        return (
+            f"{self.executions} executions, {self.identical_executions} of them "
+            f"with repeated parameters: {self.statement}"
+        )
+
+
+class RepeatedStatementsError(Exception):
+    def __init__(self, route: Optional[str], statements: list[RepeatedStatement]):
+        super().__init__(
+            f"Route {route or '-'} repeated statements: "
+            + "; ".join(map(str, statements))
+        )
+        self.route = route
+        self.statements = statements
+
+
+def find_repeated_statements(
+    executions: Iterable[tuple[str, Any]], threshold: int
+) -> list[RepeatedStatement]:
+    """Finds redundant statements and statements that could have been batched.
+
+    A statement is flagged if it was executed with the same parameters more than
+    once, or with any parameters at least `threshold` times, e.g. as one point lookup
+    per item of a list.
+
+    Args:
+        executions (Iterable[tuple[str, Any]]): The statements and their parameters in
+            the order of their execution.
+        threshold (int): Number of executions of a statement that are flagged
+            regardless of their parameters.
+
+    Returns:
+        list[RepeatedStatement]: The flagged statements in the order of their first
+            execution.
+    """
+
+    parameters_by_statement: dict[str, list[str]] = collections.defaultdict(list)
+
+    for statement, parameters in executions:
+        parameters_by_statement[statement].append(repr(parameters))
+
+    repeated = []
+
+    for statement, parameters in parameters_by_statement.items():
+        identical_executions = len(parameters) - len(set(parameters))
+
+        if identical_executions or len(parameters) >= threshold:
+            repeated.append(
+                RepeatedStatement(statement, len(parameters), identical_executions)
+            )
+
+    return repeated
+
+
+def check_statements(
+    request_timing: timing.RequestTiming, threshold: int, strict: bool
+) -> None:
+    """Flags the repeated statements of a request.
+
+    Args:
+        request_timing (timing.RequestTiming): The timing of the request, which must
+            have recorded its statements.
+        threshold (int): Number of executions of a statement that are flagged
+            regardless of their parameters.
+        strict (bool): Raise instead of logging a warning.
+
+    Raises:
+        RepeatedStatementsError: Raised in strict mode if statements were repeated.
+    """
+
+    repeated = find_repeated_statements(request_timing.executions or (), threshold)
+
+    if not repeated:
+        return
+
+    if strict:
+        raise RepeatedStatementsError(request_timing.route, repeated)
+
+    for statement in repeated:
+        logger.warning(
+            "Route %s repeated a statement: %s", request_timing.route, statement
+        )
+
+
+class StatementCheckMiddleware:
+    """ASGI middleware that flags requests which repeat statements.
+
+    A sample of the requests records its statements and is checked by
+    `check_statements` after it was handled. In strict mode every request is checked
+    and a violation raises `RepeatedStatementsError`, which fails tests that use the
+    test client. Must run inside `timing.ServerTimingMiddleware`.
+
+    Args:
+        app (types.ASGIApp): The wrapped application.
+        statement_check_configuration (Optional[configuration.StatementCheckConfiguration]):
+            The configuration, read from the environment if None.
+        sample (Callable[[], float]): Returns a random number in [0, 1) per request.
+    """
+
+    def __init__(
+        self,
+        app: types.ASGIApp,
+        statement_check_configuration: Optional[
+            configuration.StatementCheckConfiguration
+        ] = None,
+        sample: Callable[[], float] = random.random,
+    ) -> None:
+        self.app = app
+        self.configuration = (
+            statement_check_configuration
+            or configuration.StatementCheckConfiguration.from_environment()
+        )
+        self.sample = sample
+
+    async def __call__(
+        self, scope: types.Scope, receive: types.Receive, send: types.Send
+    ) -> None:
+        request_timing = timing.current()
+
+        if (
+            scope["type"] != "http"
+            or request_timing is None
+            or not (
+                self.configuration.strict
+                or self.sample() < self.configuration.sample_rate
+            )
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if request_timing.executions is None:
+            request_timing.executions = []
+
+        await self.app(scope, receive, send)
+
+        check_statements(
+            request_timing, self.configuration.threshold, self.configuration.strict
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class StatementPlan:
+    """The plan of a statement as estimated by the database.
+
+    Attributes:
+        statement (str): The SQL statement.
+        sequential_scans (list[str]): Tables that are read in full, without an index.
+        cost (Optional[float]): Estimated total cost of the statement, or None if the
+            database does not estimate costs.
+    """
+
+    statement: str
+    sequential_scans: list[str]
+    cost: Optional[float]
+
+
+def explain_statement(
+    connection: sqlalchemy.Connection, statement: str, parameters: Any
+) -> StatementPlan:
+    """Asks the database for the plan of a statement without executing it.
+
+    PostgreSQL plans are read from `EXPLAIN (FORMAT JSON)` with their estimated
+    cost, SQLite plans from `EXPLAIN QUERY PLAN`, which does not estimate costs.
+
+    Args:
+        connection (sqlalchemy.Connection): Connection to the database that the
+            statement was sent to.
+        statement (str): The SQL statement as it was passed to the DBAPI cursor.
+        parameters (Any): Its parameters, of which the first set is used if the
+            statement was executed with many.
+
+    Returns:
+        StatementPlan: The plan of the statement.
+    """
+
+    if isinstance(parameters, list):
+        parameters = parameters[0] if parameters else None
+
+    if connection.dialect.name == "postgresql":
+        result = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters or None
+        )
+        plans = result.scalar_one()
+
+        # asyncpg returns JSON as text.
+        if isinstance(plans, str):
+            plans = json.loads(plans)
+
+        plan = plans[0]["Plan"]
+        scans = [
+            node["Relation Name"]
+            for node in _plan_nodes(plan)
+            if node["Node Type"] == "Seq Scan"
+        ]
+
+        return StatementPlan(statement, scans, plan["Total Cost"])
+
+    result = connection.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters or None
+    )
+    scans = [
+        match[1]
+        for *_, detail in result
+        if (match := SQLITE_FULL_SCAN.fullmatch(detail)) is not None
+    ]
+
+    return StatementPlan(statement, scans, None)
+
+
+def _plan_nodes(plan: dict[str, Any]) -> Iterable[dict[str, Any]]:
+    yield plan
+
+    for child in plan.get("Plans", ()):
+        yield from _plan_nodes(child)
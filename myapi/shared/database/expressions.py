@@ -0,0 +1,127 @@
+import sys
+from typing import Any, Iterable
+
+import sqlalchemy
+from sqlalchemy import engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import elements
+
+
+def any_of(
+    column: sqlalchemy.ColumnElement[Any],
+    values: Iterable[Any],
+    dialect: engine.Dialect,
+) -> elements.ColumnElement[bool]:
+    """Returns a criterion that matches any of the given values.
+
+    On PostgreSQL the values are sent as a single array parameter, i.e. as
+    `column = ANY(:values)`, so the statement text and its cached plan do not depend
+    on the number of values. Other databases fall back to an expanding `IN`.
+
+    Args:
+        column (sqlalchemy.ColumnElement[Any]): The column to be compared.
+        values (Iterable[Any]): The values to be matched.
+        dialect (engine.Dialect): Dialect of the database the statement is sent to.
+
+    Returns:
+        elements.ColumnElement[bool]: The criterion for a WHERE clause.
+    """
+
+    values = list(values)
+
+    if dialect.name == "postgresql":
+        parameter = sqlalchemy.bindparam(
+            None, values, type_=postgresql.ARRAY(column.type)
+        )
+
+        return column == sqlalchemy.any_(parameter)
+
+    return column.in_(values)
+
+
+# Escape character of LIKE patterns that are built by `like_pattern`.
+LIKE_ESCAPE = "\\"
+
+
+def like_pattern(value: str, prefix: str = "", suffix: str = "") -> str:
+    """Returns a LIKE pattern that matches the given value literally.
+
+    Wildcards in the value are escaped with `LIKE_ESCAPE`, which must be passed as the
+    `escape` of the comparison. The pattern is sent as a plain parameter, so PostgreSQL
+    can derive an index range from a constant prefix.
+
+    Args:
+        value (str): The literal part of the pattern.
+        prefix (str): Wildcards before the value, e.g. `%` to match a suffix.
+        suffix (str): Wildcards after the value, e.g. `%` to match a prefix.
+
+    Returns:
+        str: The pattern.
+    """
+
+    escaped = (
+        value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+
+    return f"{prefix}{escaped}{suffix}"
+
+
+def binary_collation(
+    column: sqlalchemy.ColumnElement[str], dialect: engine.Dialect
+) -> sqlalchemy.ColumnElement[str]:
+    """Returns the column compared and ordered by code point.
+
+    On PostgreSQL the column is collated as "C", which matches indexes whose columns
+    are declared with that collation, and lets prefixes be matched by a range of the
+    index. SQLite compares text by code point by default.
+
+    Args:
+        column (sqlalchemy.ColumnElement[str]): The text column.
+        dialect (engine.Dialect): Dialect of the database the statement is sent to.
+
+    Returns:
+        sqlalchemy.ColumnElement[str]: The column with a binary collation.
+    """
+
+    if dialect.name == "postgresql":
+        return column.collate("C")
+
+    return column
+
+
+def starts_with(
+    column: sqlalchemy.ColumnElement[str], prefix: str
+) -> elements.ColumnElement[bool]:
+    """Returns a criterion that matches the values which start with the given prefix.
+
+    The prefix is matched as the range from the prefix up to its successor, which an
+    index on the column answers like any other range if the column is compared by
+    code point, see `binary_collation`. Unlike `LIKE`, it is case-sensitive on every
+    database.
+
+    Args:
+        column (sqlalchemy.ColumnElement[str]): The column, with a binary collation.
+        prefix (str): The prefix to be matched.
+
+    Returns:
+        elements.ColumnElement[bool]: The criterion for a WHERE clause.
+    """
+
+    # The successor of the prefix is the shortest string that sorts after all values
+    # which start with it. A prefix of only the largest code point has none.
+    successor = prefix.rstrip(chr(sys.maxunicode))
+
+    if not successor:
+        return column >= prefix
+
+    code_point = ord(successor[-1]) + 1
+
+    if 0xD800 <= code_point <= 0xDFFF:
+        # Surrogates cannot be encoded, the next character follows them.
+        code_point = 0xE000
+
+    successor = successor[:-1] + chr(code_point)
+
+    return sqlalchemy.and_(column >= prefix, column < successor)
@@ -0,0 +1,142 @@
+import asyncio
+import collections
+import threading
+from typing import Awaitable, Callable
+
+import sqlalchemy
+
+
+def select_next_values(
+    sequence: sqlalchemy.Sequence, count: int
+) -> sqlalchemy.Select[int]:
+    """Returns a statement that draws many values from a sequence in one round trip.
+
+    The values are unique, but not necessarily contiguous: other sessions may draw
+    from the same sequence at the same time, e.g. through the default of a column.
+
+    Args:
+        sequence (sqlalchemy.Sequence): The sequence.
+        count (int): Number of values to be drawn.
+
+    Returns:
+        sqlalchemy.Select[int]: The statement, one value per row.
+    """
+
+    return sqlalchemy.select(sequence.next_value()).select_from(
+        sqlalchemy.func.generate_series(1, count)
+    )
+
+
+class IdentifierAllocator:
+    """Hands out primary keys that were reserved in blocks, safely across threads.
+
+    A block of `block_size` keys is reserved by a single call of the reserve function
+    when the keys of the previous block ran out, so callers know the keys of new rows
+    before they are inserted, without a round trip per row. Keys of a block that are
+    not used before the process exits are skipped.
+
+    Args:
+        reserve (Callable[[int], list[int]]): Reserves the given number of unique keys.
+        block_size (int): Number of keys that are reserved at once.
+    """
+
+    def __init__(self, reserve: Callable[[int], list[int]], block_size: int) -> None:
+        self.block_size = block_size
+        self.allocations = 0
+        self.blocks = 0
+
+        self._reserve = reserve
+        self._identifiers: collections.deque[int] = collections.deque()
+        self._lock = threading.Lock()
+
+    def allocate(self, count: int = 1) -> list[int]:
+        """Returns unused keys, reserving a new block if the current one runs out.
+
+        Args:
+            count (int): Number of keys, which may exceed the block size.
+
+        Returns:
+            list[int]: The keys.
+        """
+
+        with self._lock:
+            self.allocations += 1
+            missing = count - len(self._identifiers)
+
+            if missing > 0:
+                self._identifiers.extend(self._reserve(max(missing, self.block_size)))
+                self.blocks += 1
+
+            return [self._identifiers.popleft() for _ in range(count)]
+
+    def statistics(self) -> dict[str, int]:
+        """Returns the number of allocations, reserved blocks and unused keys.
+
+        Returns:
+            dict[str, int]: Values of the counters by name.
+        """
+
+        return {
+            "allocations": self.allocations,
+            "blocks": self.blocks,
+            "available": len(self._identifiers),
+        }
+
+
+class AsyncIdentifierAllocator:
+    """Hands out primary keys that were reserved in blocks, safely across tasks.
+
+    The counterpart of `IdentifierAllocator` for an event loop: tasks that run out of
+    keys while a block is reserved wait for that block instead of reserving their own.
+
+    Args:
+        reserve (Callable[[int], Awaitable[list[int]]]): Reserves the given number of
+            unique keys.
+        block_size (int): Number of keys that are reserved at once.
+    """
+
+    def __init__(
+        self, reserve: Callable[[int], Awaitable[list[int]]], block_size: int
+    ) -> None:
+        self.block_size = block_size
+        self.allocations = 0
+        self.blocks = 0
+
+        self._reserve = reserve
+        self._identifiers: collections.deque[int] = collections.deque()
+        self._lock = asyncio.Lock()
+
+    async def allocate(self, count: int = 1) -> list[int]:
+        """Returns unused keys, reserving a new block if the current one runs out.
+
+        Args:
+            count (int): Number of keys, which may exceed the block size.
+
+        Returns:
+            list[int]: The keys.
+        """
+
+        async with self._lock:
+            self.allocations += 1
+            missing = count - len(self._identifiers)
+
+            if missing > 0:
+                self._identifiers.extend(
+                    await self._reserve(max(missing, self.block_size))
+                )
+                self.blocks += 1
+
+            return [self._identifiers.popleft() for _ in range(count)]
+
+    def statistics(self) -> dict[str, int]:
+        """Returns the number of allocations, reserved blocks and unused keys.
+
+        Returns:
+            dict[str, int]: Values of the counters by name.
+        """
+
+        return {
+            "allocations": self.allocations,
+            "blocks": self.blocks,
+            "available": len(self._identifiers),
+        }
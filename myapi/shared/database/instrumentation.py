@@ -0,0 +1,134 @@
+import functools
+import time
+
+import sqlalchemy
+from sqlalchemy import event
+
+from myapi.shared import statistics, timing
+from myapi.shared.database import diagnostics
+
+
+def observe_connection_hold_time(
+    engine: sqlalchemy.Engine, histogram: statistics.Histogram
+) -> None:
+    """Records how long connections of the engine are checked out of its pool.
+
+    Args:
+        engine (sqlalchemy.Engine): The engine whose pool is observed.
+        histogram (statistics.Histogram): Receives the hold times in seconds.
+    """
+
+    @event.listens_for(engine, "checkout")
+    def start_hold_time(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def stop_hold_time(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+
+        if checked_out_at is not None:
+            histogram.observe(time.perf_counter() - checked_out_at)
+
+
+def observe_pool_wait_time(
+    engine: sqlalchemy.Engine, histogram: statistics.Histogram
+) -> None:
+    """Records how long it takes to check a connection out of the engine's pool.
+
+    This includes waiting for a connection of a full pool and opening a new one. The
+    wait is also added to the timing of the current request.
+
+    No pool event fires before a checkout starts, so the `connect` method of the pool
+    is wrapped instead. Disposing the engine replaces its pool, whose `connect` method
+    is wrapped again when the engine signals the disposal.
+
+    Args:
+        engine (sqlalchemy.Engine): The engine whose pool is observed.
+        histogram (statistics.Histogram): Receives the wait times in seconds.
+    """
+
+    def observe(pool: sqlalchemy.Pool) -> None:
+        connect = pool.connect
+
+        @functools.wraps(connect)
+        def connect_and_observe():
+            start = time.perf_counter()
+
+            try:
+                return connect()
+            finally:
+                elapsed = time.perf_counter() - start
+                histogram.observe(elapsed)
+                timing.record_pool_wait(elapsed)
+
+        pool.connect = connect_and_observe  # type: ignore[method-assign]
+
+    @event.listens_for(engine, "engine_disposed")
+    def observe_recreated_pool(engine: sqlalchemy.Engine) -> None:
+        observe(engine.pool)
+
+    observe(engine.pool)
+
+
+# Statements often take less than a millisecond, unlike requests and pool waits.
+STATEMENT_BUCKETS = (0.0001, 0.00025, 0.0005, *statistics.DEFAULT_BUCKETS)
+
+
+def observe_statement_time(
+    engine: sqlalchemy.Engine,
+    histograms: dict[str, statistics.Histogram],
+    slow_statement_seconds: float = 0,
+) -> None:
+    """Records how long the statements of the engine take, by SQL operation.
+
+    Every statement is also added to the timing of the current request.
+
+    Args:
+        engine (sqlalchemy.Engine): The engine whose statements are observed.
+        histograms (dict[str, statistics.Histogram]): Receives the execution times in
+            seconds by operation, e.g. `SELECT`. Missing operations are added.
+        slow_statement_seconds (float): Statements that take at least as long are
+            logged as slow. No statement is logged if zero.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_statement_time(
+        connection, cursor, statement, parameters, context, executemany
+    ):
+        connection.info["statement_started_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_statement_time(
+        connection, cursor, statement, parameters, context, executemany
+    ):
+        started_at = connection.info.pop("statement_started_at", None)
+
+        if started_at is None:
+            return
+
+        elapsed = time.perf_counter() - started_at
+        operation = statement_operation(statement)
+        histogram = histograms.get(operation) or histograms.setdefault(
+            operation, statistics.Histogram(STATEMENT_BUCKETS)
+        )
+        histogram.observe(elapsed)
+        timing.record_statement(statement, parameters, context, elapsed)
+
+        if slow_statement_seconds and elapsed >= slow_statement_seconds:
+            diagnostics.log_slow_statement(statement, parameters, elapsed)
+
+
+@functools.lru_cache(maxsize=1024)
+def statement_operation(statement: str) -> str:
+    """Returns the SQL operation of a statement, i.e. its first keyword in upper case.
+
+    Args:
+        statement (str): The SQL statement.
+
+    Returns:
+        str: The operation, e.g. `SELECT`, or an empty string for an empty statement.
+    """
+
+    keywords = statement.split(None, 1)
+
+    return keywords[0].upper() if keywords else ""
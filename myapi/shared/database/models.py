@@ -9,6 +9,9 @@ POSTGRES_NAMING_CONVENTION = {
     "pk": "%(table_name)s_pkey",
 }
 
+# Version of a newly created actor.
+INITIAL_VERSION = 1
+
 
 class DataclassBase(orm.MappedAsDataclass, orm.DeclarativeBase):
     metadata = sqlalchemy.MetaData(naming_convention=POSTGRES_NAMING_CONVENTION)
@@ -22,3 +25,72 @@ class Actor(DataclassBase):
     )
     first_name: orm.MappedColumn[str] = orm.mapped_column(types.TEXT)
     last_name: orm.MappedColumn[str] = orm.mapped_column(types.TEXT)
+    version: orm.MappedColumn[int] = orm.mapped_column(
+        types.INTEGER, server_default=sqlalchemy.text(str(INITIAL_VERSION)), init=False
+    )
+
+
+# Core table of the actor entity, for statements that bypass the ORM unit of work.
+actor_table: sqlalchemy.Table = Actor.__table__  # type: ignore[assignment]
+
+# Sequence of the SERIAL primary key on PostgreSQL. It backs the default of the
+# column and the identifier allocators alike, so their keys never collide.
+actor_id_sequence = sqlalchemy.Sequence("actor_id_seq")
+
+# Trigram indexes serve substring searches, the pattern indexes prefix searches on the
+# lower-cased names, see `statements.select_matching_actors`. Other databases create
+# plain indexes instead.
+sqlalchemy.Index(
+    "actor_first_name_trgm_idx",
+    actor_table.c.first_name,
+    postgresql_using="gin",
+    postgresql_ops={"first_name": "gin_trgm_ops"},
+)
+sqlalchemy.Index(
+    "actor_last_name_trgm_idx",
+    actor_table.c.last_name,
+    postgresql_using="gin",
+    postgresql_ops={"last_name": "gin_trgm_ops"},
+)
+sqlalchemy.Index(
+    "actor_lower_first_name_pattern_idx",
+    sqlalchemy.func.lower(actor_table.c.first_name).label("lower_first_name"),
+    postgresql_ops={"lower_first_name": "text_pattern_ops"},
+)
+sqlalchemy.Index(
+    "actor_lower_last_name_pattern_idx",
+    sqlalchemy.func.lower(actor_table.c.last_name).label("lower_last_name"),
+    postgresql_ops={"lower_last_name": "text_pattern_ops"},
+)
+
+# Composite indexes serve the filtered listings in both of their orders, see
+# `statements.select_filtered_actors`. The names are collated by code point on
+# PostgreSQL, which is the default collation of SQLite.
+sqlalchemy.Index(
+    "actor_last_name_first_name_id_idx",
+    actor_table.c.last_name,
+    actor_table.c.first_name,
+    actor_table.c.id,
+    postgresql_ops={"last_name": 'COLLATE "C"', "first_name": 'COLLATE "C"'},
+)
+sqlalchemy.Index(
+    "actor_last_name_id_idx",
+    actor_table.c.last_name,
+    actor_table.c.id,
+    postgresql_ops={"last_name": 'COLLATE "C"'},
+)
+sqlalchemy.Index(
+    "actor_first_name_id_idx",
+    actor_table.c.first_name,
+    actor_table.c.id,
+    postgresql_ops={"first_name": 'COLLATE "C"'},
+)
+
+# The trigram operator classes are provided by an extension.
+sqlalchemy.event.listen(
+    actor_table,
+    "before_create",
+    sqlalchemy.DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        dialect="postgresql"
+    ),
+)
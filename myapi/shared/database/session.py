@@ -5,16 +5,61 @@ from typing import Iterator
 import sqlalchemy
 from sqlalchemy import orm
 
+from myapi.shared import statistics
+from myapi.shared.database import instrumentation
+
 logger = logging.getLogger(__name__)
 
 
 class SQLAlchemySessionFactory:
-    def __init__(self, host: str, port: int, user: str, password: str, name: str):
+    def __init__(self, engine: sqlalchemy.Engine, slow_statement_seconds: float = 0):
+        self.engine = engine
+        self.sessionmaker = orm.sessionmaker(bind=self.engine, expire_on_commit=False)
+        self.read_only_sessionmaker = orm.sessionmaker(
+            bind=self.engine.execution_options(isolation_level="AUTOCOMMIT"),
+            expire_on_commit=False,
+        )
+        self.connection_hold_time = statistics.Histogram()
+        self.pool_wait_time = statistics.Histogram()
+        self.statement_time: dict[str, statistics.Histogram] = {}
+        instrumentation.observe_connection_hold_time(
+            self.engine, self.connection_hold_time
+        )
+        instrumentation.observe_pool_wait_time(self.engine, self.pool_wait_time)
+        instrumentation.observe_statement_time(
+            self.engine, self.statement_time, slow_statement_seconds
+        )
+
+    @classmethod
+    def from_configuration(
+        cls,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        name: str,
+        pool_size: int = 50,
+        max_overflow: int = 0,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        slow_statement_milliseconds: float = 0,
+    ) -> "SQLAlchemySessionFactory":
+        """Creates a factory of sessions to a PostgreSQL database through psycopg.
+
+        Returns:
+            SQLAlchemySessionFactory: The factory with a new engine and pool.
+        """
+
         database_url = rf"postgresql+psycopg://{user}:{password}@{host}:{port}/{name}"
-        self.engine = sqlalchemy.create_engine(
-            database_url, pool_size=50, max_overflow=0
+        engine = sqlalchemy.create_engine(
+            database_url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
         )
-        self.sessionmaker = orm.sessionmaker(bind=self.engine, expire_on_commit=False)
+
+        return cls(engine, slow_statement_milliseconds / 1000)
 
     @contextlib.contextmanager
     def get_session(self) -> Iterator[orm.Session]:
@@ -30,3 +75,27 @@ class SQLAlchemySessionFactory:
                 yield session
             finally:
                 logger.debug("closed the database session.")
+
+    @contextlib.contextmanager
+    def get_read_only_session(self) -> Iterator[orm.Session]:
+        """A generator for SQLAlchemy ORM sessions that only read from the database.
+
+        The session runs every statement in autocommit mode, so no BEGIN and COMMIT
+        statements are sent. A connection is only checked out of the pool when the
+        first statement is executed.
+
+        Yields:
+            Iterator[orm.Session]: A read-only SQLAlchemy ORM session to the database.
+        """
+
+        with self.read_only_sessionmaker() as session:
+            try:
+                logger.debug("opened the read-only database session.")
+                yield session
+            finally:
+                logger.debug("closed the read-only database session.")
+
+    def dispose(self) -> None:
+        """Closes all connections of the engine's pool."""
+
+        self.engine.dispose()
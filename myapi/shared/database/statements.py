@@ -0,0 +1,295 @@
+"""Statements of the actor queries that do not depend on the stack.
+
+The sync and the async actor mapper build the same SQL, so the statements are built
+here from the actor table and only executed by the mappers.
+"""
+
+import itertools
+from typing import Any, Callable, Iterable, Optional, Protocol, Sequence, TypeVar
+
+import sqlalchemy
+from sqlalchemy import engine
+
+from myapi.shared.database import expressions, models
+
+# Columns of an actor in the order of the attributes of `Actor` in either stack.
+ACTOR_COLUMNS = (
+    models.actor_table.c.id,
+    models.actor_table.c.first_name,
+    models.actor_table.c.last_name,
+    models.actor_table.c.version,
+)
+
+# Ranks of the matches of a name search, best first.
+EXACT_MATCH = 0
+LAST_NAME_PREFIX_MATCH = 1
+FIRST_NAME_PREFIX_MATCH = 2
+SUBSTRING_MATCH = 3
+
+# Queries shorter than a trigram only match prefixes, see `select_matching_actors`.
+TRIGRAM_LENGTH = 3
+
+# Values of `ActorOrder` in either stack.
+ORDER_BY_ID = "id"
+ORDER_BY_NAME = "last_name,first_name"
+
+ActorT = TypeVar("ActorT")
+
+
+class Actor(Protocol):
+    """The attributes of an actor of either stack that its sort keys are built from."""
+
+    @property
+    def actor_id(self) -> int: ...
+
+    @property
+    def first_name(self) -> str: ...
+
+    @property
+    def last_name(self) -> str: ...
+
+
+class ActorFilter(Protocol):
+    """Criteria and order of a listing of actors, see `ActorFilter` of either stack."""
+
+    @property
+    def last_name(self) -> Optional[str]: ...
+
+    @property
+    def first_name(self) -> Optional[str]: ...
+
+    @property
+    def prefix(self) -> bool: ...
+
+    @property
+    def order(self) -> str: ...
+
+
+class UnsupportedActorFilterError(Exception):
+    """Raised if a combination of filters and order is not served by an index.
+
+    Args:
+        reason (str): Why the combination is not supported.
+    """
+
+    def __init__(self, reason: str) -> None:
+        self.reason = reason
+
+        super().__init__(f"Unsupported actor filter: {self.reason}")
+
+
+def select_actors_by_ids(
+    actor_ids: Sequence[int], dialect: engine.Dialect
+) -> sqlalchemy.Select[int, str, str, int]:
+    """Returns a statement that selects the actors with the given primary keys.
+
+    Args:
+        actor_ids (Sequence[int]): Primary keys of the actors to be selected.
+        dialect (engine.Dialect): Dialect of the database the statement is sent to.
+
+    Returns:
+        sqlalchemy.Select[int, str, str, int]: The statement in no particular order.
+    """
+
+    return sqlalchemy.select(*ACTOR_COLUMNS).where(
+        expressions.any_of(models.actor_table.c.id, actor_ids, dialect)
+    )
+
+
+def select_matching_actors(
+    query: str,
+    limit: int,
+    prefix: bool = False,
+    after: Optional[tuple[int, int]] = None,
+) -> sqlalchemy.Select[int, str, str, int, int]:
+    """Returns a statement that selects the actors whose names match a search query.
+
+    Names are matched case-insensitively. Prefixes are compared on the lower-cased
+    names, which PostgreSQL looks up in their `text_pattern_ops` indexes, substrings
+    with `ILIKE`, which it looks up in the trigram indexes. Queries shorter than a
+    trigram only match prefixes, as the trigram indexes cannot narrow them down. Other
+    databases fall back to `LIKE` without these indexes.
+
+    Exact matches of either name rank first, then prefixes of the last name, prefixes
+    of the first name and other substrings. Ties are ordered by primary key.
+
+    Args:
+        query (str): The text to be found in the first or last name.
+        limit (int): Maximum number of actors to be selected.
+        prefix (bool): Only match names that start with the query.
+        after (Optional[tuple[int, int]]): Rank and primary key of the last match that
+            was already read, or None to start from the best match.
+
+    Returns:
+        sqlalchemy.Select[int, str, str, int, int]: The statement, which selects
+            the `ACTOR_COLUMNS` followed by the rank of the match.
+    """
+
+    lower_query = query.lower()
+    first_name = sqlalchemy.func.lower(models.actor_table.c.first_name)
+    last_name = sqlalchemy.func.lower(models.actor_table.c.last_name)
+    starts_with = expressions.like_pattern(lower_query, suffix="%")
+    rank = sqlalchemy.case(
+        (
+            sqlalchemy.or_(first_name == lower_query, last_name == lower_query),
+            EXACT_MATCH,
+        ),
+        (
+            last_name.like(starts_with, escape=expressions.LIKE_ESCAPE),
+            LAST_NAME_PREFIX_MATCH,
+        ),
+        (
+            first_name.like(starts_with, escape=expressions.LIKE_ESCAPE),
+            FIRST_NAME_PREFIX_MATCH,
+        ),
+        else_=SUBSTRING_MATCH,
+    )
+
+    if prefix or len(query) < TRIGRAM_LENGTH:
+        criterion = sqlalchemy.or_(
+            last_name.like(starts_with, escape=expressions.LIKE_ESCAPE),
+            first_name.like(starts_with, escape=expressions.LIKE_ESCAPE),
+        )
+    else:
+        contains = expressions.like_pattern(query, prefix="%", suffix="%")
+        criterion = sqlalchemy.or_(
+            models.actor_table.c.last_name.ilike(
+                contains, escape=expressions.LIKE_ESCAPE
+            ),
+            models.actor_table.c.first_name.ilike(
+                contains, escape=expressions.LIKE_ESCAPE
+            ),
+        )
+
+    statement = (
+        sqlalchemy.select(*ACTOR_COLUMNS, rank.label("rank"))
+        .where(criterion)
+        .order_by(rank, models.actor_table.c.id)
+        .limit(limit)
+    )
+
+    if after is not None:
+        after_rank, after_actor_id = after
+        statement = statement.where(
+            sqlalchemy.or_(
+                rank > after_rank,
+                sqlalchemy.and_(
+                    rank == after_rank, models.actor_table.c.id > after_actor_id
+                ),
+            )
+        )
+
+    return statement
+
+
+def check_actor_filter(actor_filter: ActorFilter) -> None:
+    """Rejects combinations of criteria and order that no index serves.
+
+    Ordered by ID, exact names are looked up in the indexes on the last name and ID,
+    the first name and ID, or both names and ID. Ordered by name, the index on both
+    names and ID serves a last name or a prefix of it, and an exact last name with an
+    exact first name. Anything else would have to be sorted or scanned.
+
+    Args:
+        actor_filter (ActorFilter): Criteria and order of the actors.
+
+    Raises:
+        UnsupportedActorFilterError: Raised if the combination is not supported.
+    """
+
+    if actor_filter.order == ORDER_BY_ID and actor_filter.prefix:
+        raise UnsupportedActorFilterError(
+            f"prefixes can only be matched in the order {ORDER_BY_NAME}"
+        )
+
+    if actor_filter.order == ORDER_BY_NAME and (
+        actor_filter.first_name is not None
+        and (actor_filter.last_name is None or actor_filter.prefix)
+    ):
+        raise UnsupportedActorFilterError(
+            f"in the order {ORDER_BY_NAME}, the first name can only be "
+            "filtered with an exact last name"
+        )
+
+
+def select_filtered_actors(
+    actor_filter: ActorFilter,
+    limit: int,
+    dialect: engine.Dialect,
+    after: Optional[tuple[Any, ...]] = None,
+) -> sqlalchemy.Select[int, str, str, int]:
+    """Returns a statement that selects the actors which match a filter, in its order.
+
+    Names are compared by code point, so the composite indexes on the names, whose
+    columns are declared with the same collation, serve both the criteria and the order.
+
+    Args:
+        actor_filter (ActorFilter): Criteria and order of the actors.
+        limit (int): Maximum number of actors to be selected.
+        dialect (engine.Dialect): Dialect of the database the statement is sent to.
+        after (Optional[tuple[Any, ...]]): Sort key of the last actor that was already
+            read, or None to start from the first actor.
+
+    Raises:
+        UnsupportedActorFilterError: Raised if no index serves the combination of
+            criteria and order.
+
+    Returns:
+        sqlalchemy.Select[int, str, str, int]: The statement.
+    """
+
+    check_actor_filter(actor_filter)
+
+    last_name = expressions.binary_collation(models.actor_table.c.last_name, dialect)
+    first_name = expressions.binary_collation(models.actor_table.c.first_name, dialect)
+    statement = sqlalchemy.select(*ACTOR_COLUMNS)
+
+    # Only a last name is matched as a prefix, see `check_actor_filter`.
+    if actor_filter.last_name is not None and actor_filter.prefix:
+        statement = statement.where(
+            expressions.starts_with(last_name, actor_filter.last_name)
+        )
+    elif actor_filter.last_name is not None:
+        statement = statement.where(last_name == actor_filter.last_name)
+
+    if actor_filter.first_name is not None:
+        statement = statement.where(first_name == actor_filter.first_name)
+
+    keys: tuple[sqlalchemy.ColumnElement[Any], ...]
+
+    if actor_filter.order == ORDER_BY_NAME:
+        keys = (last_name, first_name, models.actor_table.c.id)
+    else:
+        keys = (models.actor_table.c.id,)
+
+    if after is not None:
+        statement = statement.where(
+            sqlalchemy.tuple_(*keys) > sqlalchemy.tuple_(*after)
+        )
+
+    return statement.order_by(*keys).limit(limit)
+
+
+def sort_key(actor: Actor, order: str) -> tuple[Any, ...]:
+    """Returns the values of the sort key of an actor in the given order."""
+
+    if order == ORDER_BY_NAME:
+        return (actor.last_name, actor.first_name, actor.actor_id)
+
+    return (actor.actor_id,)
+
+
+def to_actors(
+    actor_type: Callable[..., ActorT], rows: Iterable[Sequence[Any]]
+) -> list[ActorT]:
+    """Maps rows of the `ACTOR_COLUMNS` straight to actor instances, in order.
+
+    Args:
+        actor_type (Callable[..., ActorT]): The `Actor` class of the stack.
+        rows (Iterable[Sequence[Any]]): Rows of a statement that selects `ACTOR_COLUMNS`.
+
+    Returns:
+        list[ActorT]: One actor instance per row.
+    """
+
+    return list(itertools.starmap(actor_type, rows))
@@ -1,22 +1,144 @@
+import contextlib
 import dataclasses
-from typing import AsyncIterator, Iterator
+from typing import Any, AsyncIterator, Iterator, Union
 
+import fastapi
+import sqlalchemy
 from sqlalchemy import orm
 from sqlalchemy.ext import asyncio
 
-from myapi.shared import configuration
+from myapi.shared import configuration, metrics
 from myapi.shared.database import async_session, session
 
-database_configuration = configuration.DatabaseConfiguration.from_environment()
-database_session_factory = session.SQLAlchemySessionFactory(
-    **dataclasses.asdict(database_configuration)
-)
-async_database_session_factory = async_session.SQLAlchemyAsyncSessionFactory(
-    **dataclasses.asdict(database_configuration)
-)
 
+@contextlib.asynccontextmanager
+async def database_lifespan(app: fastapi.FastAPI) -> AsyncIterator[dict[str, Any]]:
+    """Creates the database engine on startup and disposes it on shutdown.
 
-def get_database_session() -> Iterator[orm.Session]:
+    Use it as the lifespan of every router that depends on `get_database_session`,
+    so the engine and its pool are only created if such a router is mounted.
+
+    Args:
+        app (fastapi.FastAPI): The application that is started.
+
+    Yields:
+        AsyncIterator[dict[str, Any]]: The lifespan state that holds the factory.
+    """
+
+    database_configuration = configuration.DatabaseConfiguration.from_environment()
+    database_session_factory = session.SQLAlchemySessionFactory.from_configuration(
+        **dataclasses.asdict(database_configuration)
+    )
+    register_database_metrics("sync", database_session_factory)
+
+    try:
+        yield {"database_session_factory": database_session_factory}
+    finally:
+        database_session_factory.dispose()
+
+
+@contextlib.asynccontextmanager
+async def async_database_lifespan(
+    app: fastapi.FastAPI,
+) -> AsyncIterator[dict[str, Any]]:
+    """Creates the asynchronous database engine on startup and disposes it on shutdown.
+
+    Use it as the lifespan of every router that depends on `get_async_database_session`,
+    so the engine and its pool are only created if such a router is mounted.
+
+    Args:
+        app (fastapi.FastAPI): The application that is started.
+
+    Yields:
+        AsyncIterator[dict[str, Any]]: The lifespan state that holds the factory.
+    """
+
+    database_configuration = configuration.DatabaseConfiguration.from_environment()
+    async_database_session_factory = (
+        async_session.SQLAlchemyAsyncSessionFactory.from_configuration(
+            **dataclasses.asdict(database_configuration)
+        )
+    )
+    register_database_metrics("async", async_database_session_factory)
+
+    try:
+        yield {"async_database_session_factory": async_database_session_factory}
+    finally:
+        await async_database_session_factory.dispose()
+
+
+def register_database_metrics(
+    engine: str,
+    database_session_factory: Union[
+        session.SQLAlchemySessionFactory, async_session.SQLAlchemyAsyncSessionFactory
+    ],
+) -> None:
+    """Exposes the pool and statement metrics of a session factory on `/metrics`.
+
+    Args:
+        engine (str): Value of the `engine` label of the metrics, e.g. `sync`.
+        database_session_factory (Union[session.SQLAlchemySessionFactory,
+            async_session.SQLAlchemyAsyncSessionFactory]): The observed factory.
+    """
+
+    pool = database_session_factory.engine.pool
+
+    if isinstance(pool, sqlalchemy.QueuePool):
+        # The pool counts its overflow from minus the pool size until it is full.
+        for name, documentation, gauge in (
+            ("size", "Number of connections the pool keeps open.", pool.size),
+            ("checked_out", "Number of connections in use.", pool.checkedout),
+            (
+                "overflow",
+                "Number of connections beyond the pool size.",
+                lambda: max(pool.overflow(), 0),
+            ),
+        ):
+            metrics.register_gauge(
+                f"database_pool_{name}_connections", documentation, gauge, engine=engine
+            )
+
+    metrics.register_histogram(
+        "database_pool_wait_seconds",
+        "Time to check a connection out of the pool, including waiting for one.",
+        database_session_factory.pool_wait_time,
+        engine=engine,
+    )
+    metrics.register_histogram(
+        "database_connection_hold_seconds",
+        "Time connections are checked out of the pool.",
+        database_session_factory.connection_hold_time,
+        engine=engine,
+    )
+    metrics.register_histograms(
+        "database_statement_duration_seconds",
+        "Time to execute statements on the database, by SQL operation.",
+        ("operation",),
+        database_session_factory.statement_time,
+        engine=engine,
+    )
+
+
+def get_database_session_factory(
+    request: fastapi.Request,
+) -> session.SQLAlchemySessionFactory:
+    """Returns the factory of SQLAlchemy ORM sessions to the database.
+
+    Use the factory instead of `get_database_session` for sessions that have to
+    outlive the request handler, e.g. to feed a streaming response.
+
+    Returns:
+        session.SQLAlchemySessionFactory: The factory of database sessions.
+    """
+
+    return request.state.database_session_factory
+
+
+def get_database_session(
+    database_session_factory: session.SQLAlchemySessionFactory = fastapi.Depends(
+        get_database_session_factory
+    ),
+) -> Iterator[orm.Session]:
     """A generator for SQLAlchemy ORM sessions to the database.
 
     Yields:
@@ -27,7 +149,42 @@ def get_database_session() -> Iterator[orm.Session]:
         yield database_session
 
 
-async def get_async_database_session() -> AsyncIterator[asyncio.AsyncSession]:
+def get_read_only_database_session(
+    database_session_factory: session.SQLAlchemySessionFactory = fastapi.Depends(
+        get_database_session_factory
+    ),
+) -> Iterator[orm.Session]:
+    """A generator for SQLAlchemy ORM sessions that only read from the database.
+
+    Yields:
+        Iterator[orm.Session]: A read-only SQLAlchemy ORM session to the database.
+    """
+
+    with database_session_factory.get_read_only_session() as database_session:
+        yield database_session
+
+
+def get_async_database_session_factory(
+    request: fastapi.Request,
+) -> async_session.SQLAlchemyAsyncSessionFactory:
+    """Returns the factory of asynchronous SQLAlchemy ORM sessions to the database.
+
+    Use the factory instead of `get_async_database_session` for sessions that have to
+    outlive the request handler, e.g. to feed a streaming response.
+
+    Returns:
+        async_session.SQLAlchemyAsyncSessionFactory: The factory of asynchronous
+            database sessions.
+    """
+
+    return request.state.async_database_session_factory
+
+
+async def get_async_database_session(
+    async_database_session_factory: async_session.SQLAlchemyAsyncSessionFactory = (
+        fastapi.Depends(get_async_database_session_factory)
+    ),
+) -> AsyncIterator[asyncio.AsyncSession]:
     """A generator for asynchronous SQLAlchemy ORM sessions to the database.
 
     Yields:
@@ -36,3 +193,18 @@ async def get_async_database_session() -> AsyncIterator[asyncio.AsyncSession]:
 
     async with async_database_session_factory.get_session() as async_session:
         yield async_session
+
+
+async def get_async_read_only_database_session(
+    async_database_session_factory: async_session.SQLAlchemyAsyncSessionFactory = (
+        fastapi.Depends(get_async_database_session_factory)
+    ),
+) -> AsyncIterator[asyncio.AsyncSession]:
+    """A generator for asynchronous SQLAlchemy ORM sessions that only read from the database.
+
+    Yields:
+        AsyncIterator[asyncio.AsyncSession]: A read-only asynchronous SQLAlchemy ORM session to the database.
+    """
+
+    async with async_database_session_factory.get_read_only_session() as async_session:
+        yield async_session
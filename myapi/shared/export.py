@@ -0,0 +1,79 @@
+import csv
+import enum
+import io
+import json
+import operator
+from typing import Any, Iterable
+
+from myapi.shared import serialization
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self]
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def encode_header(export_format: ExportFormat, fieldnames: tuple[str, ...]) -> bytes:
+    """Returns the text that precedes the first record of an export.
+
+    Args:
+        export_format (ExportFormat): Format of the export.
+        fieldnames (tuple[str, ...]): Names of the exported attributes, in order.
+
+    Returns:
+        bytes: The UTF-8 encoded CSV header line, or nothing for NDJSON.
+    """
+
+    if export_format is ExportFormat.NDJSON:
+        return b""
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(fieldnames)
+
+    return buffer.getvalue().encode()
+
+
+def encode_records(
+    export_format: ExportFormat, fieldnames: tuple[str, ...], records: Iterable[Any]
+) -> bytes:
+    """Encodes a batch of records into a chunk of an export.
+
+    Args:
+        export_format (ExportFormat): Format of the export.
+        fieldnames (tuple[str, ...]): Names of at least two exported attributes, in order.
+        records (Iterable[Any]): Objects that provide the exported attributes.
+
+    Returns:
+        bytes: One UTF-8 encoded line per record in the requested format.
+    """
+
+    get_values = operator.attrgetter(*fieldnames)
+
+    if export_format is ExportFormat.NDJSON:
+        if serialization.get_serialization_configuration().fast_json:
+            return b"".join(
+                serialization.dumps(dict(zip(fieldnames, get_values(record)))) + b"\n"
+                for record in records
+            )
+
+        return "".join(
+            json.dumps(dict(zip(fieldnames, get_values(record)))) + "\n"
+            for record in records
+        ).encode()
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(get_values(record) for record in records)
+
+    return buffer.getvalue().encode()
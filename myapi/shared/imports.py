@@ -0,0 +1,269 @@
+import csv
+import dataclasses
+import logging
+import time
+from typing import Any, AsyncIterator, Generic, Iterable, Iterator, Optional, TypeVar
+
+import anyio.from_thread
+import fastapi
+import pydantic
+
+from myapi.shared import export
+
+# Longest line that is buffered while waiting for its end.
+MAX_LINE_BYTES = 64 * 2**10
+# Number of rejected lines whose errors are reported.
+MAX_IMPORT_ERRORS = 100
+# Number of lines after which the progress of an import is logged.
+IMPORT_PROGRESS_LINES = 100_000
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=pydantic.BaseModel)
+
+
+class ImportFormatError(ValueError):
+    """Raised if the body of an import cannot be read at all, as opposed to a line."""
+
+
+@dataclasses.dataclass
+class ImportReport:
+    """Progress of an import.
+
+    Attributes:
+        lines (int): Number of lines that were read.
+        accepted (int): Number of records that were valid.
+        rejected (int): Number of lines that were not valid records.
+        errors (list[dict[str, Any]]): Line number and message of the first
+            `MAX_IMPORT_ERRORS` rejected lines.
+    """
+
+    lines: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    errors: list[dict[str, Any]] = dataclasses.field(default_factory=list)
+
+    def reject(self, line: int, message: str) -> None:
+        self.rejected += 1
+
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append({"line": line, "message": message})
+
+
+class RecordParser(Generic[ModelT]):
+    """Parses the chunks of a CSV or NDJSON body into records, one record per line.
+
+    Only the incomplete last line of a chunk is held until the next chunk arrives,
+    so the memory does not grow with the body. Invalid lines are counted and reported
+    instead of failing the import. CSV bodies start with a header that names the
+    columns; fields that span lines are not supported.
+
+    Args:
+        import_format (export.ExportFormat): Format of the body.
+        model (type[ModelT]): Pydantic model that every record is validated against.
+        fieldnames (tuple[str, ...]): Fields of the model that are read from the CSV
+            columns of the same name.
+    """
+
+    def __init__(
+        self,
+        import_format: export.ExportFormat,
+        model: type[ModelT],
+        fieldnames: tuple[str, ...],
+    ) -> None:
+        self.import_format = import_format
+        self.model = model
+        self.fieldnames = fieldnames
+        self.report = ImportReport()
+        self._buffer = b""
+        self._columns: Optional[list[int]] = None
+        self._started_at = time.perf_counter()
+
+    def parse(self, chunks: Iterable[bytes]) -> Iterator[ModelT]:
+        """Yields the valid records of a body that is read from an iterable."""
+
+        for chunk in chunks:
+            yield from self.feed(chunk)
+
+        yield from self.close()
+
+    async def parse_async(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[ModelT]:
+        """Yields the valid records of a body that is read from an async iterator."""
+
+        async for chunk in chunks:
+            for record in self.feed(chunk):
+                yield record
+
+        for record in self.close():
+            yield record
+
+    def feed(self, chunk: bytes) -> list[ModelT]:
+        """Parses the lines that a chunk completes.
+
+        Args:
+            chunk (bytes): The next chunk of the body.
+
+        Raises:
+            ImportFormatError: Raised if a line exceeds `MAX_LINE_BYTES` or if the CSV
+                header lacks a field.
+
+        Returns:
+            list[ModelT]: The valid records of the completed lines.
+        """
+
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+
+        if len(self._buffer) > MAX_LINE_BYTES:
+            raise ImportFormatError(
+                f"Line {self.report.lines + len(lines) + 1} is longer than "
+                f"{MAX_LINE_BYTES} bytes"
+            )
+
+        return self._parse_lines(lines)
+
+    def close(self) -> list[ModelT]:
+        """Parses the last line of the body and logs the outcome of the import.
+
+        Returns:
+            list[ModelT]: The record of the last line, if it is valid.
+        """
+
+        records = self._parse_lines([self._buffer]) if self._buffer else []
+        self._buffer = b""
+        self._log_progress("Parsed")
+
+        return records
+
+    def _parse_lines(self, lines: list[bytes]) -> list[ModelT]:
+        records = []
+
+        for line in lines:
+            self.report.lines += 1
+
+            if self.report.lines % IMPORT_PROGRESS_LINES == 0:
+                self._log_progress("Parsing")
+
+            if not line.strip():
+                continue
+
+            try:
+                record = self._parse_line(line)
+            except pydantic.ValidationError as exc:
+                self.report.reject(self.report.lines, _error_message(exc))
+                continue
+            except UnicodeDecodeError:
+                self.report.reject(self.report.lines, "Line is not valid UTF-8")
+                continue
+
+            if record is not None:
+                self.report.accepted += 1
+                records.append(record)
+
+        return records
+
+    def _parse_line(self, line: bytes) -> Optional[ModelT]:
+        if self.import_format is export.ExportFormat.NDJSON:
+            return self.model.model_validate_json(line)
+
+        (values,) = csv.reader([line.decode()])
+
+        if self._columns is None:
+            missing = [name for name in self.fieldnames if name not in values]
+
+            if missing:
+                raise ImportFormatError(
+                    f"The CSV header lacks the columns {', '.join(missing)}"
+                )
+
+            self._columns = [values.index(name) for name in self.fieldnames]
+
+            return None
+
+        return self.model.model_validate(
+            {
+                name: values[column] if column < len(values) else None
+                for name, column in zip(self.fieldnames, self._columns)
+            }
+        )
+
+    def _log_progress(self, state: str) -> None:
+        logger.info(
+            "%s %s import: %d lines in %.1f s, %d records accepted, %d rejected",
+            state,
+            self.import_format.value,
+            self.report.lines,
+            time.perf_counter() - self._started_at,
+            self.report.accepted,
+            self.report.rejected,
+        )
+
+
+def _error_message(exc: pydantic.ValidationError) -> str:
+    return "; ".join(
+        ".".join(map(str, error["loc"])) + ": " + error["msg"]
+        if error["loc"]
+        else error["msg"]
+        for error in exc.errors()
+    )
+
+
+def get_import_format(request: fastapi.Request) -> export.ExportFormat:
+    """Returns the format of an import from the content type of its request.
+
+    Raises:
+        HTTPException: Raised if the content type is neither CSV nor NDJSON.
+
+    Returns:
+        export.ExportFormat: The format of the body.
+    """
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    for import_format, media_type in export.MEDIA_TYPES.items():
+        if content_type == media_type:
+            return import_format
+
+    raise fastapi.HTTPException(
+        status_code=415,
+        detail=f"Imports must have one of the content types "
+        f"{', '.join(export.MEDIA_TYPES.values())}",
+    )
+
+
+def import_request_body() -> dict[str, Any]:
+    """Returns the OpenAPI description of a body that is read by `RecordParser`.
+
+    Returns:
+        dict[str, Any]: The `openapi_extra` value of the path operation.
+    """
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                media_type: {"schema": {"type": "string"}}
+                for media_type in export.MEDIA_TYPES.values()
+            },
+        }
+    }
+
+
+def iterate_from_thread(chunks: AsyncIterator[bytes]) -> Iterator[bytes]:
+    """Iterates an async iterator from a worker thread of the event loop.
+
+    FastAPI runs path operations that are not coroutines in such threads, so they
+    can stream the body of their request with this function.
+
+    Args:
+        chunks (AsyncIterator[bytes]): The async iterator, e.g. `request.stream()`.
+
+    Yields:
+        Iterator[bytes]: The chunks of the async iterator.
+    """
+
+    async def next_chunk() -> Optional[bytes]:
+        return await anext(chunks, None)
+
+    while (chunk := anyio.from_thread.run(next_chunk)) is not None:
+        yield chunk
@@ -0,0 +1,266 @@
+import dataclasses
+import math
+import time
+from typing import Any, Callable, Mapping, Union
+
+from starlette import types
+
+from myapi.shared import statistics
+
+# Content type of the Prometheus text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Source = Union[statistics.Histogram, statistics.Gauge, Callable[[], float], float]
+
+
+@dataclasses.dataclass
+class _Collection:
+    label_names: tuple[str, ...]
+    # Either the sources, or a function that returns them whenever they are rendered.
+    sources: Union[Mapping[Any, Source], Callable[[], Mapping[Any, Source]]]
+
+
+@dataclasses.dataclass
+class _Family:
+    kind: str
+    documentation: str
+    collections: dict[tuple[tuple[str, str], ...], _Collection]
+
+
+_families: dict[str, _Family] = {}
+
+
+def register_histogram(
+    name: str, documentation: str, histogram: statistics.Histogram, **labels: str
+) -> None:
+    """Registers a histogram that is exposed by `render`.
+
+    Args:
+        name (str): Name of the metric.
+        documentation (str): Help text of the metric.
+        histogram (statistics.Histogram): The histogram.
+        **labels (str): Labels that distinguish the histogram within the metric.
+    """
+
+    register_histograms(name, documentation, (), {(): histogram}, **labels)
+
+
+def register_histograms(
+    name: str,
+    documentation: str,
+    label_names: tuple[str, ...],
+    histograms: Mapping[Any, statistics.Histogram],
+    **labels: str,
+) -> None:
+    """Registers histograms that are added while the application runs.
+
+    Args:
+        name (str): Name of the metric.
+        documentation (str): Help text of the metric.
+        label_names (tuple[str, ...]): Names of the labels in the keys of the mapping.
+        histograms (Mapping[Any, statistics.Histogram]): Histograms by the tuple of
+            their label values, or by the value of the only label. The mapping is read
+            whenever the metrics are rendered, so histograms can be added to it.
+        **labels (str): Labels that are shared by all histograms of the mapping.
+    """
+
+    _register("histogram", name, documentation, label_names, histograms, labels)
+
+
+def register_gauge(
+    name: str,
+    documentation: str,
+    gauge: Union[statistics.Gauge, Callable[[], float]],
+    **labels: str,
+) -> None:
+    """Registers a gauge, or a function that returns the current value of a gauge.
+
+    Args:
+        name (str): Name of the metric.
+        documentation (str): Help text of the metric.
+        gauge (Union[statistics.Gauge, Callable[[], float]]): The gauge.
+        **labels (str): Labels that distinguish the gauge within the metric.
+    """
+
+    _register("gauge", name, documentation, (), {(): gauge}, labels)
+
+
+def register_counters(
+    name: str,
+    documentation: str,
+    counters: Callable[[], Mapping[str, float]],
+    **labels: str,
+) -> None:
+    """Registers a component whose counters are read whenever the metrics are rendered.
+
+    Every counter is rendered as a sample of a gauge, labelled by its name. Some of the
+    counters are current values, e.g. the size of a cache, not monotonic totals.
+
+    Args:
+        name (str): Name of the metric.
+        documentation (str): Help text of the metric.
+        counters (Callable[[], Mapping[str, float]]): Returns the current counters of
+            the component by name, e.g. `statistics.Histogram.statistics`.
+        **labels (str): Labels that distinguish the component within the metric.
+    """
+
+    _register("gauge", name, documentation, ("counter",), counters, labels)
+
+
+def _register(
+    kind: str,
+    name: str,
+    documentation: str,
+    label_names: tuple[str, ...],
+    sources: Union[Mapping[Any, Source], Callable[[], Mapping[Any, Source]]],
+    labels: Mapping[str, str],
+) -> None:
+    family = _families.setdefault(name, _Family(kind, documentation, {}))
+
+    if family.kind != kind:
+        raise ValueError(f"The metric '{name}' is a {family.kind}, not a {kind}")
+
+    # Registering the same labels again, e.g. on a restart, replaces the sources.
+    family.collections[tuple(labels.items())] = _Collection(label_names, sources)
+
+
+def render() -> str:
+    """Returns all registered metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics, one sample per line.
+    """
+
+    lines = []
+
+    for name, family in _families.items():
+        lines.append(f"# HELP {name} {_escape(family.documentation, quote=False)}")
+        lines.append(f"# TYPE {name} {family.kind}")
+
+        for labels, collection in family.collections.items():
+            sources = (
+                collection.sources()
+                if callable(collection.sources)
+                else collection.sources
+            )
+
+            for key, source in list(sources.items()):
+                values = key if isinstance(key, tuple) else (key,)
+                sample_labels = (*labels, *zip(collection.label_names, values))
+
+                if isinstance(source, statistics.Histogram):
+                    lines.extend(_histogram_samples(name, sample_labels, source))
+                    continue
+
+                value: float
+
+                if isinstance(source, statistics.Gauge):
+                    value = source.value
+                elif callable(source):
+                    value = source()
+                else:
+                    value = source
+
+                lines.append(f"{name}{_labels(sample_labels)} {_number(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _histogram_samples(
+    name: str, labels: tuple[tuple[str, str], ...], histogram: statistics.Histogram
+) -> list[str]:
+    # Read the count first, so no bucket exceeds it while values are observed.
+    count = histogram.count
+    total = histogram.sum
+    samples = [
+        f"{name}_bucket{_labels((*labels, ('le', _number(bound))))} {min(bucket, count)}"
+        for bound, bucket in histogram.cumulative_counts()
+    ]
+    samples.append(f"{name}_bucket{_labels((*labels, ('le', '+Inf')))} {count}")
+    samples.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+    samples.append(f"{name}_count{_labels(labels)} {count}")
+
+    return samples
+
+
+def _labels(labels: tuple[tuple[str, object], ...]) -> str:
+    if not labels:
+        return ""
+
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels)
+
+    return f"{{{pairs}}}"
+
+
+def _escape(value: str, quote: bool = True) -> str:
+    value = value.replace("\\", r"\\").replace("\n", r"\n")
+
+    return value.replace('"', r"\"") if quote else value
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware that measures the latency and concurrency of HTTP requests.
+
+    The latency is recorded per method, route template and status code, so the
+    number of histograms is bounded by the routes of the application. Requests that
+    match no route are recorded with the route `unmatched`.
+
+    Args:
+        app (types.ASGIApp): The wrapped application.
+    """
+
+    def __init__(self, app: types.ASGIApp) -> None:
+        self.app = app
+        self.in_flight = statistics.Gauge()
+        self.durations: dict[tuple[str, str, int], statistics.Histogram] = {}
+
+        register_gauge(
+            "http_requests_in_flight",
+            "Number of HTTP requests that are being handled.",
+            self.in_flight,
+        )
+        register_histograms(
+            "http_request_duration_seconds",
+            "Time until HTTP requests are answered, by route and status.",
+            ("method", "route", "status"),
+            self.durations,
+        )
+
+    async def __call__(
+        self, scope: types.Scope, receive: types.Receive, send: types.Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_and_record_status(message: types.Message) -> None:
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+            await send(message)
+
+        self.in_flight.increment()
+        start = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_and_record_status)
+        finally:
+            self.in_flight.decrement()
+            # The router adds the matched route to the scope of the request.
+            route = scope.get("route")
+            key = (scope["method"], getattr(route, "path", "unmatched"), status)
+            histogram = self.durations.get(key) or self.durations.setdefault(
+                key, statistics.Histogram()
+            )
+            histogram.observe(time.perf_counter() - start)
@@ -0,0 +1,67 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class InvalidCursorError(ValueError):
+    """Raised if a pagination cursor cannot be decoded.
+
+    Args:
+        cursor (str): The cursor that was received from the client.
+    """
+
+    def __init__(self, cursor: str) -> None:
+        self.cursor = cursor
+
+        super().__init__(f"Cursor '{self.cursor}' is not a valid pagination cursor")
+
+
+def encode_cursor(*keys: Any) -> str:
+    """Encodes the keyset of the last row of a page into an opaque cursor.
+
+    Args:
+        *keys (Any): JSON serializable values of the columns the page is ordered by.
+
+    Returns:
+        str: A URL-safe cursor that points behind the given keyset.
+    """
+
+    payload = json.dumps(keys, separators=(",", ":")).encode()
+
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *types: type) -> list[Any]:
+    """Decodes an opaque cursor into the keyset it was created from.
+
+    Args:
+        cursor (str): A cursor that was created by `encode_cursor`.
+        *types (type): Expected types of the values of the keyset, in order.
+
+    Raises:
+        InvalidCursorError: Raised if the cursor was not created by `encode_cursor`
+            or if its keyset does not match the expected types.
+
+    Returns:
+        list[Any]: The values of the columns the page is ordered by.
+    """
+
+    padding = "=" * (-len(cursor) % 4)
+
+    try:
+        keys = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError(cursor)
+
+    if not isinstance(keys, list) or len(keys) != len(types):
+        raise InvalidCursorError(cursor)
+
+    # JSON booleans are instances of int, so the types are compared exactly.
+    if any(type(key) is not key_type for key, key_type in zip(keys, types)):
+        raise InvalidCursorError(cursor)
+
+    return keys
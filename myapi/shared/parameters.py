@@ -0,0 +1,64 @@
+from typing import Annotated, Iterable
+
+import fastapi
+
+MAX_IDS = 10_000
+
+
+def parse_ids(ids: str) -> list[int]:
+    """Parses a comma-separated list of primary keys.
+
+    Args:
+        ids (str): Comma-separated list of primary keys, e.g. "1,2,3".
+
+    Raises:
+        HTTPException: Raised if a key is not an integer or if there are too many keys.
+
+    Returns:
+        list[int]: The unique primary keys in the order of their first occurrence.
+    """
+
+    try:
+        return unique_ids(int(value) for value in ids.split(",") if value)
+    except ValueError:
+        raise fastapi.HTTPException(
+            status_code=422, detail=f"'{ids}' is not a comma-separated list of IDs"
+        )
+
+
+def unique_ids(ids: Iterable[int]) -> list[int]:
+    """Removes duplicate primary keys and keeps the order of their first occurrence.
+
+    Args:
+        ids (Iterable[int]): The primary keys.
+
+    Raises:
+        HTTPException: Raised if there are too many keys.
+
+    Returns:
+        list[int]: The unique primary keys.
+    """
+
+    unique = list(dict.fromkeys(ids))
+
+    if len(unique) > MAX_IDS:
+        raise fastapi.HTTPException(
+            status_code=422,
+            detail=f"A single request must not contain more than {MAX_IDS} IDs",
+        )
+
+    return unique
+
+
+def get_ids(
+    ids: Annotated[
+        str, fastapi.Query(description="Comma-separated list of primary keys")
+    ],
+) -> list[int]:
+    """Parses a comma-separated list of primary keys from the query string.
+
+    Returns:
+        list[int]: The unique primary keys in the order of the query string.
+    """
+
+    return parse_ids(ids)
@@ -0,0 +1,169 @@
+import functools
+from typing import Any, AsyncIterator, TypeVar
+
+import fastapi
+import pydantic
+from fastapi import exceptions
+
+from myapi.shared import export
+
+MAX_BULK_RECORDS = 10_000
+# Bytes that a record may take up in the body on average, which bounds the body size.
+MAX_RECORD_BYTES = 1024
+
+ModelT = TypeVar("ModelT", bound=pydantic.BaseModel)
+
+
+def bulk_request_body(schema_name: str) -> dict[str, Any]:
+    """Returns the OpenAPI description of a body that is read with `read_records`.
+
+    Args:
+        schema_name (str): Name of the OpenAPI component schema of a single record.
+
+    Returns:
+        dict[str, Any]: The `openapi_extra` value of the path operation.
+    """
+
+    schema = {
+        "type": "array",
+        "items": {"$ref": f"#/components/schemas/{schema_name}"},
+    }
+    media_types = ("application/json", export.MEDIA_TYPES[export.ExportFormat.NDJSON])
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {media_type: {"schema": schema} for media_type in media_types},
+        }
+    }
+
+
+async def read_records(
+    request: fastapi.Request, model: type[ModelT], max_records: int = MAX_BULK_RECORDS
+) -> list[ModelT]:
+    """Reads and validates a batch of records from the body of a request.
+
+    The body is either a JSON array of objects or, if the request has the
+    `application/x-ndjson` content type, a stream of JSON objects, one per line.
+    Bodies larger than `max_records` times `MAX_RECORD_BYTES` are rejected before
+    any record is validated, from their `Content-Length` or while they are read.
+
+    Args:
+        request (fastapi.Request): The request whose body contains the records.
+        model (type[ModelT]): Pydantic model that every record is validated against.
+        max_records (int): Maximum number of records that are accepted in one request.
+
+    Raises:
+        RequestValidationError: Raised if the body is malformed or a record is invalid.
+        HTTPException: Raised if the body contains more than `max_records` records
+            or is too large for them.
+
+    Returns:
+        list[ModelT]: The validated records in the order of the body.
+    """
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    chunks = _read_body(request, max_records * MAX_RECORD_BYTES)
+
+    if content_type == export.MEDIA_TYPES[export.ExportFormat.NDJSON]:
+        records = await _read_ndjson_records(chunks, model, max_records)
+    else:
+        records = await _read_json_records(chunks, model)
+
+    if len(records) > max_records:
+        raise fastapi.HTTPException(
+            status_code=413,
+            detail=f"A single request must not contain more than {max_records} records",
+        )
+
+    return records
+
+
+async def _read_body(request: fastapi.Request, max_bytes: int) -> AsyncIterator[bytes]:
+    content_length = request.headers.get("content-length", "")
+
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise _body_too_large(max_bytes)
+
+    # The stream is limited too, as the body may be sent without its length.
+    size = 0
+
+    async for chunk in request.stream():
+        size += len(chunk)
+
+        if size > max_bytes:
+            raise _body_too_large(max_bytes)
+
+        yield chunk
+
+
+def _body_too_large(max_bytes: int) -> fastapi.HTTPException:
+    return fastapi.HTTPException(
+        status_code=413,
+        detail=f"A single request body must not be larger than {max_bytes} bytes",
+    )
+
+
+async def _read_json_records(
+    chunks: AsyncIterator[bytes], model: type[ModelT]
+) -> list[ModelT]:
+    body = b"".join([chunk async for chunk in chunks])
+
+    try:
+        return _list_adapter(model).validate_json(body)
+    except pydantic.ValidationError as exc:
+        raise exceptions.RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in exc.errors()]
+        )
+
+
+@functools.cache
+def _list_adapter(model: type[ModelT]) -> pydantic.TypeAdapter[Any]:
+    return pydantic.TypeAdapter(list[model])  # type: ignore[valid-type]
+
+
+async def _read_ndjson_records(
+    chunks: AsyncIterator[bytes], model: type[ModelT], max_records: int
+) -> list[ModelT]:
+    records: list[ModelT] = []
+    errors: list[dict] = []
+    buffer = b""
+    line_number = 0
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            line_number += 1
+            _validate_line(line, line_number, model, records, errors)
+
+        # Stop reading as soon as the limit is exceeded instead of buffering the body.
+        if len(records) > max_records:
+            return records
+
+    _validate_line(buffer, line_number + 1, model, records, errors)
+
+    if errors:
+        raise exceptions.RequestValidationError(errors)
+
+    return records
+
+
+def _validate_line(
+    line: bytes,
+    line_number: int,
+    model: type[ModelT],
+    records: list[ModelT],
+    errors: list[dict],
+) -> None:
+    if not line.strip():
+        return
+
+    try:
+        records.append(model.model_validate_json(line))
+    except pydantic.ValidationError as exc:
+        errors.extend(
+            {**error, "loc": ("body", line_number, *error["loc"])}
+            for error in exc.errors()
+        )
@@ -0,0 +1,109 @@
+import dataclasses
+import functools
+import json
+import operator
+import types
+from typing import Any, Callable, Optional
+
+from fastapi import responses
+
+from myapi.shared import configuration
+
+orjson: Optional[types.ModuleType]
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional dependency
+    orjson = None
+
+
+@functools.cache
+def get_serialization_configuration() -> configuration.SerializationConfiguration:
+    """Returns the serialization configuration of this process."""
+
+    return configuration.SerializationConfiguration.from_environment()
+
+
+def dumps(content: Any) -> bytes:
+    """Encodes JSON data, dataclasses included, into compact JSON.
+
+    The compiled orjson encoder is used if it is installed, e.g. with the `fast-json`
+    extra, otherwise the standard library encoder. Dataclass fields whose metadata
+    sets `serialize` to False are not encoded.
+
+    Args:
+        content (Any): JSON data that may contain dataclass instances.
+
+    Returns:
+        bytes: The UTF-8 encoded JSON document.
+    """
+
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_encode_dataclass,
+            option=orjson.OPT_PASSTHROUGH_DATACLASS,
+        )
+
+    return json.dumps(
+        content, default=_encode_dataclass, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def _encode_dataclass(value: Any) -> dict[str, Any]:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _dataclass_encoder(type(value))(value)
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@functools.cache
+def _dataclass_encoder(dataclass: type) -> Callable[[Any], dict[str, Any]]:
+    fieldnames = tuple(
+        field.name
+        for field in dataclasses.fields(dataclass)
+        if field.metadata.get("serialize", True)
+    )
+
+    if len(fieldnames) < 2:
+        return lambda value: {name: getattr(value, name) for name in fieldnames}
+
+    # A getter of several attributes returns their values as a tuple.
+    get_values = operator.attrgetter(*fieldnames)
+
+    return lambda value: dict(zip(fieldnames, get_values(value)))
+
+
+class FastJSONResponse(responses.Response):
+    """A JSON response that encodes its content with `dumps`, without validation."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, response: Optional[responses.Response] = None) -> Any:
+    """Prepares the content returned by a path operation for the response.
+
+    If fast JSON responses are enabled, the content is encoded directly and
+    returned as a response, which bypasses the validation and serialization of
+    the `response_model`. The `response_model` still documents the response in
+    the OpenAPI schema, so the content must match it exactly. Otherwise the
+    content is returned unchanged.
+
+    Args:
+        content (Any): JSON data that may contain dataclass instances.
+        response (Optional[responses.Response]): The `Response` parameter of the
+            path operation, if any, whose headers are kept.
+
+    Returns:
+        Any: The content, or a response with the encoded content.
+    """
+
+    if not get_serialization_configuration().fast_json:
+        return content
+
+    return FastJSONResponse(
+        content, headers=response.headers if response is not None else None
+    )
@@ -0,0 +1,145 @@
+import bisect
+import itertools
+import threading
+from typing import Callable, Generic, Iterator, TypeVar
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    """A histogram of observed values with fixed upper bucket bounds.
+
+    Observations take no lock: every thread counts into its own shard, and the shards
+    are only summed up when the histogram is read.
+
+    Args:
+        buckets (tuple[float, ...]): Ascending upper bounds of the buckets. Values
+            above the last bound are only counted in the total.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+
+        self._shards = _ThreadShards(lambda: _HistogramShard(len(buckets)))
+
+    @property
+    def count(self) -> int:
+        return sum(shard.count for shard in self._shards)
+
+    @property
+    def sum(self) -> float:
+        return sum(shard.sum for shard in self._shards)
+
+    def observe(self, value: float) -> None:
+        """Adds a value to the histogram.
+
+        Args:
+            value (float): The observed value.
+        """
+
+        shard = self._shards.get()
+        shard.count += 1
+        shard.sum += value
+        index = bisect.bisect_left(self.buckets, value)
+
+        if index < len(shard.bucket_counts):
+            shard.bucket_counts[index] += 1
+
+    def cumulative_counts(self) -> list[tuple[float, int]]:
+        """Returns the number of values up to and including each upper bound.
+
+        Returns:
+            list[tuple[float, int]]: Pairs of the upper bound and the number of values.
+        """
+
+        bucket_counts = [0] * len(self.buckets)
+
+        for shard in self._shards:
+            for index, count in enumerate(shard.bucket_counts):
+                bucket_counts[index] += count
+
+        return list(zip(self.buckets, itertools.accumulate(bucket_counts)))
+
+    def statistics(self) -> dict[str, float]:
+        """Returns the count, the sum, and the cumulative counts of the buckets.
+
+        Returns:
+            dict[str, float]: Values of the counters by name.
+        """
+
+        counters = {"count": self.count, "sum": self.sum}
+        counters.update(
+            (f"le_{bound:g}", count) for bound, count in self.cumulative_counts()
+        )
+
+        return counters
+
+
+class Gauge:
+    """A value that goes up and down, e.g. the number of requests in flight.
+
+    Like the histogram, the gauge counts into a shard per thread without a lock.
+    """
+
+    def __init__(self) -> None:
+        self._shards = _ThreadShards(_GaugeShard)
+
+    @property
+    def value(self) -> int:
+        return sum(shard.value for shard in self._shards)
+
+    def increment(self) -> None:
+        self._shards.get().value += 1
+
+    def decrement(self) -> None:
+        self._shards.get().value -= 1
+
+
+class _HistogramShard:
+    __slots__ = ("count", "sum", "bucket_counts")
+
+    def __init__(self, buckets: int) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self.bucket_counts = [0] * buckets
+
+
+class _GaugeShard:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+
+ShardT = TypeVar("ShardT")
+
+
+class _ThreadShards(Generic[ShardT]):
+    """Counters that are written by a single thread each and read by any thread.
+
+    Args:
+        factory (Callable[[], ShardT]): Creates the shard of a thread on its first use.
+    """
+
+    def __init__(self, factory: Callable[[], ShardT]) -> None:
+        self._factory = factory
+        self._shards: list[ShardT] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def get(self) -> ShardT:
+        """Returns the shard of the current thread."""
+
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = self._factory()
+
+            with self._lock:
+                self._shards.append(shard)
+
+            return shard
+
+    def __iter__(self) -> Iterator[ShardT]:
+        with self._lock:
+            return iter(list(self._shards))
@@ -0,0 +1,303 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import re
+import time
+from typing import Any, Callable, Iterator, Optional
+
+from fastapi import routing
+from starlette import types
+
+from myapi.shared import configuration
+
+_request_timing: contextvars.ContextVar[Optional["RequestTiming"]] = (
+    contextvars.ContextVar("request_timing", default=None)
+)
+
+WHITESPACE = re.compile(r"\s+")
+
+
+class RequestTiming:
+    """Where the time of a single request went.
+
+    The database is accounted by the instrumentation of the session factories, the
+    phases of the route handler by `TimedRoute`.
+
+    Args:
+        record_statements (bool): Whether to keep every statement with its parameters.
+    """
+
+    __slots__ = (
+        "route",
+        "statement_count",
+        "database_time",
+        "pool_wait_time",
+        "executions",
+        "last_execution_context",
+        "handler_started_at",
+        "endpoint_started_at",
+        "endpoint_finished_at",
+        "handler_finished_at",
+    )
+
+    def __init__(self, record_statements: bool = False) -> None:
+        self.route: Optional[str] = None
+        self.statement_count = 0
+        self.database_time = 0.0
+        self.pool_wait_time = 0.0
+        self.executions: Optional[list[tuple[str, Any]]] = (
+            [] if record_statements else None
+        )
+        self.last_execution_context: Any = None
+        self.handler_started_at: Optional[float] = None
+        self.endpoint_started_at: Optional[float] = None
+        self.endpoint_finished_at: Optional[float] = None
+        self.handler_finished_at: Optional[float] = None
+
+    def server_timing(self, total: float) -> str:
+        """Returns the value of a `Server-Timing` header with the times in milliseconds.
+
+        Args:
+            total (float): Seconds from receiving the request to starting the response.
+
+        Returns:
+            str: The header value.
+        """
+
+        statements = "statement" if self.statement_count == 1 else "statements"
+        metrics = [
+            f"db;dur={self.database_time * 1000:.3f};"
+            f'desc="{self.statement_count} {statements}"',
+            f"pool;dur={self.pool_wait_time * 1000:.3f}",
+        ]
+
+        if self.handler_started_at is not None and self.endpoint_started_at is not None:
+            validation = self.endpoint_started_at - self.handler_started_at
+            metrics.append(f"validation;dur={validation * 1000:.3f}")
+
+        if (
+            self.endpoint_finished_at is not None
+            and self.handler_finished_at is not None
+        ):
+            serialization = self.handler_finished_at - self.endpoint_finished_at
+            metrics.append(f"serialization;dur={serialization * 1000:.3f}")
+
+        metrics.append(f"total;dur={total * 1000:.3f}")
+
+        return ", ".join(metrics)
+
+
+def current() -> Optional[RequestTiming]:
+    """Returns the timing of the current request, or None outside of requests."""
+
+    return _request_timing.get()
+
+
+@contextlib.contextmanager
+def account(record_statements: bool = False) -> Iterator[RequestTiming]:
+    """Accounts the statements and pool waits of the block in a new timing.
+
+    Args:
+        record_statements (bool): Whether to keep every statement with its parameters.
+
+    Yields:
+        Iterator[RequestTiming]: The timing, which is filled while the block runs.
+    """
+
+    request_timing = RequestTiming(record_statements)
+    token = _request_timing.set(request_timing)
+
+    try:
+        yield request_timing
+    finally:
+        _request_timing.reset(token)
+
+
+def record_statement(
+    statement: str, parameters: Any, execution_context: Any, seconds: float
+) -> None:
+    """Adds a statement to the timing of the current request, if any.
+
+    Args:
+        statement (str): The SQL statement that was executed.
+        parameters (Any): The parameters of the statement.
+        execution_context (Any): The SQLAlchemy execution context of the statement.
+            Batches of a single execution, e.g. of many inserted rows, share it and
+            are only recorded once.
+        seconds (float): Execution time of the statement.
+    """
+
+    request_timing = _request_timing.get()
+
+    if request_timing is not None:
+        request_timing.statement_count += 1
+        request_timing.database_time += seconds
+
+        if (
+            request_timing.executions is not None
+            and execution_context is not request_timing.last_execution_context
+        ):
+            request_timing.executions.append((statement, parameters))
+            request_timing.last_execution_context = execution_context
+
+
+def record_pool_wait(seconds: float) -> None:
+    """Adds the wait for a pooled connection to the timing of the current request.
+
+    Args:
+        seconds (float): Time to check the connection out of the pool.
+    """
+
+    request_timing = _request_timing.get()
+
+    if request_timing is not None:
+        request_timing.pool_wait_time += seconds
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware that reports the timing of every request in its response.
+
+    The `Server-Timing` header lists the number of statements and the time spent
+    executing them, the wait for pooled connections, the validation of the request,
+    the serialization of the response and the total time until the response started.
+    With `SERVER_TIMING_STATEMENTS`, every statement is also listed in an
+    `X-Database-Statement` header. Statements that run after the response started,
+    e.g. while streaming it, are not included. Requests are accounted even if the
+    header is disabled, for `diagnostics.StatementCheckMiddleware`.
+
+    Args:
+        app (types.ASGIApp): The wrapped application.
+        server_timing_configuration (Optional[configuration.ServerTimingConfiguration]):
+            The configuration, read from the environment if None.
+    """
+
+    def __init__(
+        self,
+        app: types.ASGIApp,
+        server_timing_configuration: Optional[
+            configuration.ServerTimingConfiguration
+        ] = None,
+    ) -> None:
+        self.app = app
+        self.configuration = (
+            server_timing_configuration
+            or configuration.ServerTimingConfiguration.from_environment()
+        )
+
+    async def __call__(
+        self, scope: types.Scope, receive: types.Receive, send: types.Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_with_server_timing(message: types.Message) -> None:
+            if message["type"] == "http.response.start" and self.configuration.enabled:
+                total = time.perf_counter() - start
+                headers = [
+                    *message.get("headers", ()),
+                    (b"server-timing", request_timing.server_timing(total).encode()),
+                ]
+
+                if self.configuration.statements:
+                    headers.extend(_statement_headers(request_timing))
+
+                message = {**message, "headers": headers}
+
+            await send(message)
+
+        with account(self.configuration.statements) as request_timing:
+            await self.app(scope, receive, send_with_server_timing)
+
+
+def _statement_headers(request_timing: RequestTiming) -> list[tuple[bytes, bytes]]:
+    headers = []
+
+    for statement, _ in request_timing.executions or ():
+        statement = WHITESPACE.sub(" ", statement).strip()
+        headers.append(
+            (b"x-database-statement", statement.encode("latin-1", "replace"))
+        )
+
+    return headers
+
+
+class TimedRoute(routing.APIRoute):
+    """Route that splits its handler time into validation, endpoint and serialization.
+
+    Validation covers parsing the request and solving the dependencies, serialization
+    everything after the endpoint returned: closing its sessions, validating the
+    response against the response model and encoding it.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        @functools.wraps(handler)
+        async def timed_handler(request):
+            request_timing = _request_timing.get()
+
+            if request_timing is None:
+                return await handler(request)
+
+            request_timing.route = self.path
+            request_timing.handler_started_at = time.perf_counter()
+
+            try:
+                return await handler(request)
+            finally:
+                request_timing.handler_finished_at = time.perf_counter()
+
+        return timed_handler
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # The wrapper keeps the signature of the endpoint and whether it is a coroutine,
+    # so FastAPI still solves its parameters and runs it in the same way.
+    if getattr(endpoint, "__timed__", False):
+        # Including a router copies its routes with their already timed endpoints.
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def timed_coroutine(*args, **kwargs):
+            request_timing = _request_timing.get()
+
+            if request_timing is None:
+                return await endpoint(*args, **kwargs)
+
+            request_timing.endpoint_started_at = time.perf_counter()
+
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                request_timing.endpoint_finished_at = time.perf_counter()
+
+        timed_coroutine.__timed__ = True  # type: ignore[attr-defined]
+
+        return timed_coroutine
+
+    @functools.wraps(endpoint)
+    def timed_function(*args, **kwargs):
+        request_timing = _request_timing.get()
+
+        if request_timing is None:
+            return endpoint(*args, **kwargs)
+
+        request_timing.endpoint_started_at = time.perf_counter()
+
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            request_timing.endpoint_finished_at = time.perf_counter()
+
+    timed_function.__timed__ = True  # type: ignore[attr-defined]
+
+    return timed_function
@@ -0,0 +1,382 @@
+"""Micro-benchmarks of both SQLAlchemyActorMapper implementations.
+
+The benchmarks only run with `--benchmark`. Every method of the sync and the async
+mapper is measured on tables of `--benchmark-rows` actors: the statements it issues,
+its best wall time and the peak memory it allocates. Each measurement is compared with
+the baseline stored in `benchmarks.json`. Issuing more statements than the baseline
+always fails; wall time and allocations fail if they exceed the baseline by more than
+`--benchmark-tolerance`. Run with `--benchmark-save` to store new baselines.
+
+SQLite tables are created in temporary files. With a PostgreSQL `--database-url`, the
+actors are added to the test database and removed afterwards; the async mapper then
+connects through asyncpg.
+"""
+
+import asyncio
+import dataclasses
+import inspect
+import json
+import pathlib
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Iterator, Optional, Sequence
+
+import pytest
+import sqlalchemy
+from sqlalchemy import event, orm
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+
+from myapi.actors import queries
+from myapi.async_actors import queries as async_queries
+from myapi.shared.database import models
+
+BASELINES_PATH = pathlib.Path(__file__).with_name("benchmarks.json")
+
+# Last name of the benchmark actors, used to remove them from the database afterwards.
+MARKER = "benchmark-actor-mapper"
+
+REPEAT = 3
+
+# Below these floors, differences are noise rather than regressions.
+MINIMUM_SECONDS = 0.0005
+MINIMUM_BYTES = 64 * 2**10
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def middle(actor_ids: Sequence[int]) -> int:
+    return actor_ids[len(actor_ids) // 2]
+
+
+def spread(actor_ids: Sequence[int], count: int = 100) -> Sequence[int]:
+    return actor_ids[:: max(len(actor_ids) // count, 1)][:count]
+
+
+# The same calls serve both mappers, the async ones return awaitables.
+OPERATIONS: dict[str, Callable[[Any, Sequence[int]], Any]] = {
+    "create_actor": lambda mapper, ids: mapper.create_actor("Benchmark", "Actor"),
+    "create_actors": lambda mapper, ids: mapper.create_actors(
+        [("Benchmark", "Actor")] * 100
+    ),
+    "read_actors": lambda mapper, ids: mapper.read_actors(),
+    "read_actors_page": lambda mapper, ids: mapper.read_actors_page(100, middle(ids)),
+    "stream_actors": lambda mapper, ids: mapper.stream_actors(1000),
+    "search_actors": lambda mapper, ids: mapper.search_actors("actor12", 100),
+    "search_actors_prefix": lambda mapper, ids: mapper.search_actors(
+        "actor12", 10, prefix=True
+    ),
+    "read_actor": lambda mapper, ids: mapper.read_actor(middle(ids)),
+    "read_actor_version": lambda mapper, ids: mapper.read_actor_version(middle(ids)),
+    "read_actors_by_ids": lambda mapper, ids: mapper.read_actors_by_ids(spread(ids)),
+    "update_actor": lambda mapper, ids: mapper.update_actor(
+        middle(ids), first_name="Benchmark"
+    ),
+    "update_actor_first_name": lambda mapper, ids: mapper.update_actor_first_name(
+        middle(ids), "Benchmark"
+    ),
+    "update_actor_last_name": lambda mapper, ids: mapper.update_actor_last_name(
+        middle(ids), "Benchmark"
+    ),
+    "delete_actors": lambda mapper, ids: mapper.delete_actors(spread(ids)),
+    "delete_actor": lambda mapper, ids: mapper.delete_actor(middle(ids)),
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class BenchmarkDatabase:
+    url: sqlalchemy.URL
+    rows: int
+    actor_ids: list[int]
+
+
+@dataclasses.dataclass(frozen=True)
+class Measurement:
+    statements: int
+    seconds: float
+    peak_bytes: int
+
+    def regressions(self, baseline: "Measurement", tolerance: float) -> list[str]:
+        """Returns a description of every cost that regressed against the baseline."""
+
+        regressions = []
+
+        if self.statements > baseline.statements:
+            regressions.append(
+                f"{self.statements} statements instead of {baseline.statements}"
+            )
+
+        if self.seconds > max(baseline.seconds, MINIMUM_SECONDS) * tolerance:
+            regressions.append(
+                f"{self.seconds * 1000:.2f} ms instead of {baseline.seconds * 1000:.2f} ms"
+            )
+
+        if self.peak_bytes > max(baseline.peak_bytes, MINIMUM_BYTES) * tolerance:
+            regressions.append(
+                f"{self.peak_bytes} bytes allocated instead of {baseline.peak_bytes}"
+            )
+
+        return regressions
+
+
+class StatementCounter:
+    """Counts the statements that an engine sends to the database."""
+
+    def __init__(self, engine: sqlalchemy.Engine) -> None:
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self.increment)
+
+    def increment(self, *args: Any) -> None:
+        self.count += 1
+
+
+def pytest_generate_tests(metafunc: pytest.Metafunc):
+    if "benchmark_database" in metafunc.fixturenames:
+        metafunc.parametrize(
+            "benchmark_database",
+            metafunc.config.getoption("--benchmark-rows"),
+            indirect=True,
+            scope="module",
+            ids=lambda rows: f"{rows}-rows",
+        )
+
+
+@pytest.fixture(name="benchmark_database", scope="module")
+def create_benchmark_database(
+    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
+) -> Iterator[BenchmarkDatabase]:
+    """Yields a database with an actor table that holds the requested number of actors.
+
+    Args:
+        request (pytest.FixtureRequest): Pytest request object whose parameter is the
+            number of actors in the table.
+        tmp_path_factory (pytest.TempPathFactory): Factory of temporary directories for
+            SQLite databases.
+
+    Yields:
+        BenchmarkDatabase: URL of the database and primary keys of its actors.
+    """
+
+    if not request.config.getoption("--benchmark"):
+        pytest.skip("the mapper benchmarks only run with --benchmark")
+
+    rows: int = request.param
+    url = sqlalchemy.make_url(request.config.getoption("--database-url"))
+
+    if url.get_backend_name() == "sqlite":
+        url = url.set(database=str(tmp_path_factory.mktemp("benchmark") / "actors.db"))
+
+    engine = sqlalchemy.create_engine(url)
+    models.Actor.metadata.create_all(engine)
+    batch_size = 10_000
+
+    try:
+        with engine.begin() as connection:
+            for offset in range(0, rows, batch_size):
+                connection.execute(
+                    sqlalchemy.insert(models.actor_table),
+                    [
+                        {"first_name": f"Actor{index}", "last_name": MARKER}
+                        for index in range(offset, min(offset + batch_size, rows))
+                    ],
+                )
+
+            actor_ids = list(
+                connection.scalars(
+                    sqlalchemy.select(models.actor_table.c.id)
+                    .where(models.actor_table.c.last_name == MARKER)
+                    .order_by(models.actor_table.c.id)
+                )
+            )
+
+        yield BenchmarkDatabase(url, rows, actor_ids)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(
+                sqlalchemy.delete(models.actor_table).where(
+                    models.actor_table.c.last_name == MARKER
+                )
+            )
+
+        engine.dispose()
+
+
+@pytest.fixture(name="baselines", scope="module")
+def load_baselines(request: pytest.FixtureRequest) -> Iterator[dict[str, Any]]:
+    """Yields the stored baselines and stores them again with `--benchmark-save`."""
+
+    baselines = (
+        json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    )
+
+    yield baselines
+
+    if request.config.getoption("--benchmark-save"):
+        BASELINES_PATH.write_text(
+            json.dumps(baselines, indent=2, sort_keys=True) + "\n"
+        )
+
+
+async def measure(
+    run: Callable[[Callable[[], None]], Awaitable[tuple[int, float]]],
+) -> Measurement:
+    """Measures an operation `REPEAT` times for its wall time, then once more traced.
+
+    Args:
+        run (Callable[[Callable[[], None]], Awaitable[tuple[int, float]]]): Runs the
+            operation in a new transaction that is rolled back afterwards. It calls its
+            argument right before the operation starts and returns the number of
+            statements and seconds of the operation.
+
+    Returns:
+        Measurement: The costs of the operation.
+    """
+
+    timings = [await run(lambda: None) for _ in range(REPEAT)]
+    tracemalloc.start()
+
+    try:
+        await run(tracemalloc.reset_peak)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(
+        statements=timings[-1][0],
+        seconds=min(seconds for _, seconds in timings),
+        peak_bytes=peak_bytes,
+    )
+
+
+def measure_sync(
+    benchmark_database: BenchmarkDatabase,
+    operation: Callable[[Any, Sequence[int]], Any],
+) -> Measurement:
+    engine = sqlalchemy.create_engine(benchmark_database.url)
+    counter = StatementCounter(engine)
+    sessionmaker = orm.sessionmaker(engine)
+
+    async def run(started: Callable[[], None]) -> tuple[int, float]:
+        with sessionmaker() as session:
+            mapper = queries.SQLAlchemyActorMapper(session)
+            session.connection()
+            counter.count = 0
+            started()
+            start = time.perf_counter()
+            result = operation(mapper, benchmark_database.actor_ids)
+
+            if inspect.isgenerator(result):
+                for _ in result:
+                    pass
+
+            seconds = time.perf_counter() - start
+            session.rollback()
+
+        return counter.count, seconds
+
+    try:
+        return asyncio.run(measure(run))
+    finally:
+        engine.dispose()
+
+
+def measure_async(
+    benchmark_database: BenchmarkDatabase,
+    operation: Callable[[Any, Sequence[int]], Any],
+) -> Measurement:
+    url = benchmark_database.url
+    async_engine = sqlalchemy_asyncio.create_async_engine(
+        url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+    )
+    counter = StatementCounter(async_engine.sync_engine)
+    sessionmaker = sqlalchemy_asyncio.async_sessionmaker(async_engine)
+
+    async def run(started: Callable[[], None]) -> tuple[int, float]:
+        async with sessionmaker() as session:
+            mapper = async_queries.SQLAlchemyActorMapper(session)
+            await session.connection()
+            counter.count = 0
+            started()
+            start = time.perf_counter()
+            result = operation(mapper, benchmark_database.actor_ids)
+
+            if inspect.isasyncgen(result):
+                async for _ in result:
+                    pass
+            else:
+                await result
+
+            seconds = time.perf_counter() - start
+            await session.rollback()
+
+        return counter.count, seconds
+
+    async def measure_and_dispose() -> Measurement:
+        try:
+            return await measure(run)
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(measure_and_dispose())
+
+
+def check_baseline(
+    request: pytest.FixtureRequest,
+    baselines: dict[str, Any],
+    key: tuple[str, str, int, str],
+    measurement: Measurement,
+):
+    dialect, stack, rows, operation = key
+    stored = baselines.setdefault(dialect, {}).setdefault(stack, {})
+    stored = stored.setdefault(str(rows), {})
+
+    if request.config.getoption("--benchmark-save"):
+        stored[operation] = dataclasses.asdict(measurement)
+        return
+
+    baseline: Optional[dict[str, Any]] = stored.get(operation)
+
+    if baseline is None:
+        pytest.skip(f"no baseline for {key}, store one with --benchmark-save")
+
+    tolerance = request.config.getoption("--benchmark-tolerance")
+    regressions = measurement.regressions(Measurement(**baseline), tolerance)
+
+    assert not regressions, f"{operation} on {rows} rows regressed: " + ", ".join(
+        regressions
+    )
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_actor_mapper(
+    request: pytest.FixtureRequest,
+    benchmark_database: BenchmarkDatabase,
+    baselines: dict[str, Any],
+    operation: str,
+):
+    measurement = measure_sync(benchmark_database, OPERATIONS[operation])
+    key = (
+        benchmark_database.url.get_backend_name(),
+        "sync",
+        benchmark_database.rows,
+        operation,
+    )
+
+    check_baseline(request, baselines, key, measurement)
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_async_actor_mapper(
+    request: pytest.FixtureRequest,
+    benchmark_database: BenchmarkDatabase,
+    baselines: dict[str, Any],
+    operation: str,
+):
+    measurement = measure_async(benchmark_database, OPERATIONS[operation])
+    key = (
+        benchmark_database.url.get_backend_name(),
+        "async",
+        benchmark_database.rows,
+        operation,
+    )
+
+    check_baseline(request, baselines, key, measurement)
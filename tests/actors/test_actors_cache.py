@@ -0,0 +1,268 @@
+import asyncio
+import pathlib
+from unittest import mock
+
+import pytest
+import sqlalchemy
+from sqlalchemy import orm
+
+from myapi.actors import caching, exceptions, queries, service
+from myapi.async_actors import caching as async_caching
+from myapi.async_actors import service as async_service
+from myapi.shared import cache
+from myapi.shared.database import models
+
+
+class FakeClock:
+    """Monotonic clock for tests that only advances when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(name="clock")
+def get_clock():
+    yield FakeClock()
+
+
+@pytest.fixture(name="actor_cache")
+def get_actor_cache(clock: FakeClock):
+    """Yields an empty actor cache with room for two actors and a TTL of ten seconds."""
+
+    yield cache.ActorCache(max_size=2, ttl=10, clock=clock)
+
+
+@pytest.fixture(name="decorated_mapper")
+def get_decorated_mapper():
+    """Yields a mock of the decorated mapper that knows the actors with IDs 1 to 3."""
+
+    actor_mapper = mock.create_autospec(service.ActorMapper, instance=True)
+
+    def read_actor(actor_id: int) -> service.Actor:
+        if actor_id not in (1, 2, 3):
+            raise exceptions.ActorNotFoundError(actor_id)
+
+        return service.Actor(actor_id, "Test", "Actor")
+
+    def read_actors_by_ids(actor_ids: list[int]) -> list[service.Actor]:
+        return [
+            service.Actor(actor_id, "Test", "Actor")
+            for actor_id in actor_ids
+            if actor_id in (1, 2, 3)
+        ]
+
+    actor_mapper.read_actor.side_effect = read_actor
+    actor_mapper.read_actors_by_ids.side_effect = read_actors_by_ids
+
+    yield actor_mapper
+
+
+class TestCachingActorMapper:
+    @pytest.fixture(name="mapper_under_test")
+    def get_mapper_under_test(
+        self, decorated_mapper: mock.Mock, actor_cache: cache.ActorCache
+    ):
+        yield caching.CachingActorMapper(decorated_mapper, actor_cache, negative_ttl=1)
+
+    def test_read_actor_from_cache(
+        self,
+        mapper_under_test: caching.CachingActorMapper,
+        decorated_mapper: mock.Mock,
+        actor_cache: cache.ActorCache,
+    ):
+        first_actor = mapper_under_test.read_actor(1)
+        second_actor = mapper_under_test.read_actor(1)
+
+        assert first_actor == second_actor == service.Actor(1, "Test", "Actor")
+        assert decorated_mapper.read_actor.call_count == 1
+        assert actor_cache.entries.hits == 1 and actor_cache.entries.misses == 1
+
+    def test_read_actor_after_expiration(
+        self,
+        mapper_under_test: caching.CachingActorMapper,
+        decorated_mapper: mock.Mock,
+        clock: FakeClock,
+    ):
+        mapper_under_test.read_actor(1)
+        clock.now += 10
+        mapper_under_test.read_actor(1)
+
+        assert decorated_mapper.read_actor.call_count == 2
+
+    def test_read_actor_evicts_least_recently_used(
+        self,
+        mapper_under_test: caching.CachingActorMapper,
+        decorated_mapper: mock.Mock,
+        actor_cache: cache.ActorCache,
+    ):
+        for actor_id in (1, 2, 1, 3, 1):
+            mapper_under_test.read_actor(actor_id)
+
+        assert decorated_mapper.read_actor.call_count == 3
+        assert actor_cache.entries.evictions == 1
+        assert actor_cache.get(2) is None
+
+    def test_read_missing_actor_from_cache(
+        self,
+        mapper_under_test: caching.CachingActorMapper,
+        decorated_mapper: mock.Mock,
+        clock: FakeClock,
+    ):
+        for _ in range(2):
+            with pytest.raises(exceptions.ActorNotFoundError):
+                mapper_under_test.read_actor(0)
+
+        clock.now += 1
+
+        with pytest.raises(exceptions.ActorNotFoundError):
+            mapper_under_test.read_actor(0)
+
+        assert decorated_mapper.read_actor.call_count == 2
+
+    def test_read_actors_by_ids_from_cache(
+        self,
+        mapper_under_test: caching.CachingActorMapper,
+        decorated_mapper: mock.Mock,
+    ):
+        mapper_under_test.read_actor(2)
+        actors = mapper_under_test.read_actors_by_ids([3, 2, 0, 1])
+        mapper_under_test.read_actors_by_ids([1, 0])
+
+        assert [actor.actor_id for actor in actors] == [3, 2, 1]
+        decorated_mapper.read_actors_by_ids.assert_called_once_with([3, 0, 1])
+
+    def test_update_actor_invalidates_cache(
+        self, mapper_under_test: caching.CachingActorMapper, decorated_mapper: mock.Mock
+    ):
+        decorated_mapper.update_actor.return_value = service.Actor(
+            1, "Updated", "Actor", 2
+        )
+
+        mapper_under_test.read_actor(1)
+        mapper_under_test.update_actor(1, first_name="Updated")
+        mapper_under_test.read_actor(1)
+
+        decorated_mapper.update_actor.assert_called_once_with(
+            1, None, first_name="Updated"
+        )
+        assert decorated_mapper.read_actor.call_count == 2
+
+    def test_delete_actors_invalidates_cache(
+        self, mapper_under_test: caching.CachingActorMapper, decorated_mapper: mock.Mock
+    ):
+        mapper_under_test.read_actor(1)
+        mapper_under_test.delete_actors([1])
+        mapper_under_test.read_actor(1)
+
+        assert decorated_mapper.read_actor.call_count == 2
+
+    def test_create_actor_invalidates_missing_actor(
+        self, mapper_under_test: caching.CachingActorMapper, decorated_mapper: mock.Mock
+    ):
+        decorated_mapper.create_actor.return_value = service.Actor(0, "Test", "Actor")
+
+        with pytest.raises(exceptions.ActorNotFoundError):
+            mapper_under_test.read_actor(0)
+
+        mapper_under_test.create_actor("Test", "Actor")
+
+        with pytest.raises(exceptions.ActorNotFoundError):
+            mapper_under_test.read_actor(0)
+
+        assert decorated_mapper.read_actor.call_count == 2
+
+
+def test_uncommitted_write_is_invalidated_on_commit(
+    tmp_path: pathlib.Path, actor_cache: cache.ActorCache
+):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    models.actor_table.metadata.create_all(engine)
+    sessionmaker = orm.sessionmaker(engine)
+
+    def read_actor(actor_id: int) -> service.Actor:
+        with sessionmaker() as database_session:
+            return caching.CachingActorMapper(
+                queries.SQLAlchemyActorMapper(database_session), actor_cache
+            ).read_actor(actor_id)
+
+    try:
+        with sessionmaker.begin() as database_session:
+            actor_mapper = queries.SQLAlchemyActorMapper(database_session)
+            actor_id = actor_mapper.create_actor("Old", "Actor").actor_id
+
+        with sessionmaker.begin() as database_session:
+            caching.CachingActorMapper(
+                queries.SQLAlchemyActorMapper(database_session),
+                actor_cache,
+                session=database_session,
+            ).update_actor(actor_id, first_name="New")
+            # Another request reads and caches the row before the update commits.
+            uncommitted_read = read_actor(actor_id)
+
+        committed_read = read_actor(actor_id)
+    finally:
+        engine.dispose()
+
+    assert uncommitted_read.first_name == "Old"
+    assert committed_read.first_name == "New"
+
+
+class TestActorCache:
+    def test_rows_older_than_a_write_are_not_cached(
+        self, actor_cache: cache.ActorCache
+    ):
+        actor_cache.fence(1, 2)
+        actor_cache.put(service.Actor(1, "Old", "Actor", 1))
+        stale_entry = actor_cache.get(1)
+        actor_cache.put(service.Actor(1, "New", "Actor", 2))
+        actor_cache.put(service.Actor(1, "Old", "Actor", 1))
+
+        assert stale_entry is None
+        assert actor_cache.get(1) == (1, "New", "Actor", 2)
+
+    def test_deleted_actors_are_only_cached_as_missing(
+        self, actor_cache: cache.ActorCache
+    ):
+        actor_cache.fence(1, None)
+        actor_cache.put(service.Actor(1, "Old", "Actor", 1))
+        stale_entry = actor_cache.get(1)
+        actor_cache.put_missing(1, ttl=1)
+
+        assert stale_entry is None
+        assert actor_cache.get(1) is cache.NOT_FOUND
+
+    def test_created_actors_are_not_cached_as_missing(
+        self, actor_cache: cache.ActorCache
+    ):
+        actor_cache.fence(1, 1)
+        actor_cache.put_missing(1, ttl=1)
+
+        assert actor_cache.get(1) is None
+
+
+def test_writes_of_either_router_invalidate_the_shared_cache(
+    actor_cache: cache.ActorCache, decorated_mapper: mock.Mock
+):
+    async_decorated_mapper = mock.create_autospec(
+        async_service.ActorMapper, instance=True
+    )
+    async_decorated_mapper.read_actor.return_value = async_service.Actor(
+        1, "Test", "Actor"
+    )
+    decorated_mapper.update_actor.return_value = service.Actor(1, "New", "Actor", 2)
+    async_mapper = async_caching.CachingActorMapper(async_decorated_mapper, actor_cache)
+
+    asyncio.run(async_mapper.read_actor(1))
+    caching.CachingActorMapper(decorated_mapper, actor_cache).update_actor(
+        1, first_name="New"
+    )
+    async_decorated_mapper.read_actor.return_value = async_service.Actor(
+        1, "New", "Actor", 2
+    )
+    actor = asyncio.run(async_mapper.read_actor(1))
+
+    assert actor == async_service.Actor(1, "New", "Actor", 2)
+    assert async_decorated_mapper.read_actor.call_count == 2
@@ -7,10 +7,12 @@ import sqlalchemy
 from sqlalchemy import orm
 
 from myapi.actors import exceptions, queries, service
-from myapi.shared.database import models
+from myapi.shared.database import identifiers, models, statements
 
 logger = logging.getLogger(__name__)
 
+pytestmark = pytest.mark.usefixtures("strict_statements")
+
 
 class Singleton(type):
     """Metaclass for Singleton."""
@@ -132,6 +134,23 @@ class TestSQLAlchemyActorMapper:
 
         assert database_actor_values.issuperset(expected_database_actor_values)
 
+    def test_create_actors_return_value(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+
+        expected_actors = [actor_repository.create_domain_actor() for _ in range(3)]
+        domain_actors = mapper_under_test.create_actors(
+            [(actor.first_name, actor.last_name) for actor in expected_actors]
+        )
+
+        assert domain_actors == expected_actors
+
+    def test_create_actors_without_names(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        assert mapper_under_test.create_actors([]) == []
+
     def test_read_actor_return_value(
         self, mapper_under_test: queries.SQLAlchemyActorMapper
     ):
@@ -147,6 +166,18 @@ class TestSQLAlchemyActorMapper:
         with pytest.raises(exceptions.ActorNotFoundError):
             mapper_under_test.read_actor(0)
 
+    def test_read_actors_by_ids_return_value(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+
+        expected_actors = [actor_repository.domain_actors[index] for index in (2, 0)]
+        actors = mapper_under_test.read_actors_by_ids(
+            [expected_actors[0].actor_id, 0, expected_actors[1].actor_id]
+        )
+
+        assert actors == expected_actors
+
     def test_read_actors_return_value(
         self, mapper_under_test: queries.SQLAlchemyActorMapper
     ):
@@ -157,6 +188,122 @@ class TestSQLAlchemyActorMapper:
 
         assert actors == expected_actors
 
+    def test_read_actors_page_return_value(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+
+        expected_actors = actor_repository.domain_actors[:2]
+        page = mapper_under_test.read_actors_page(2)
+
+        assert page == service.ActorPage(expected_actors, expected_actors[-1].actor_id)
+
+    @pytest.mark.repeated_statements
+    def test_read_actors_pages_return_all_actors(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+
+        expected_actors = actor_repository.domain_actors
+        actors: list[service.Actor] = []
+        page = mapper_under_test.read_actors_page(2)
+        actors.extend(page.actors)
+
+        while page.next_actor_id is not None:
+            page = mapper_under_test.read_actors_page(2, page.next_actor_id)
+            actors.extend(page.actors)
+
+        assert actors == expected_actors
+
+    def test_stream_actors_return_value(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+
+        expected_actors = actor_repository.domain_actors
+        batches = list(mapper_under_test.stream_actors(2))
+
+        assert all(len(batch) <= 2 for batch in batches)
+        assert [actor for batch in batches for actor in batch] == expected_actors
+
+    def test_update_actor_return_value(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+        test_actor_id = 2
+
+        previous_actor = actor_repository.domain_actors[test_actor_id - 1]
+        expected_actor = dataclasses.replace(
+            previous_actor,
+            first_name="Updated",
+            last_name="Name",
+            version=previous_actor.version + 1,
+        )
+        actor_repository.domain_actors[test_actor_id - 1] = expected_actor
+        domain_actor = mapper_under_test.update_actor(
+            test_actor_id, first_name="Updated", last_name="Name"
+        )
+
+        assert domain_actor == expected_actor
+        assert mapper_under_test.read_actor(test_actor_id) == expected_actor
+
+    def test_update_actor_without_changes(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+        test_actor_id = 2
+
+        expected_actor = actor_repository.domain_actors[test_actor_id - 1]
+
+        assert mapper_under_test.update_actor(test_actor_id) == expected_actor
+
+    def test_read_actor_version(self, mapper_under_test: queries.SQLAlchemyActorMapper):
+        actor_repository = TestActorRepository()
+        test_actor = actor_repository.domain_actors[0]
+
+        assert mapper_under_test.read_actor_version(test_actor.actor_id) == 1
+
+        with pytest.raises(exceptions.ActorNotFoundError):
+            mapper_under_test.read_actor_version(0)
+
+    def test_update_actor_with_expected_version(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+        test_actor = actor_repository.domain_actors[2]
+
+        updated_actor = mapper_under_test.update_actor(
+            test_actor.actor_id, [test_actor.version], first_name="Versioned"
+        )
+        actor_repository.domain_actors[2] = updated_actor
+
+        assert updated_actor.version == test_actor.version + 1
+
+        with pytest.raises(exceptions.ActorVersionMismatchError) as exc_info:
+            mapper_under_test.update_actor(
+                test_actor.actor_id, [test_actor.version], first_name="Stale"
+            )
+
+        assert exc_info.value.version == updated_actor.version
+        assert mapper_under_test.read_actor(test_actor.actor_id) == updated_actor
+
+    def test_delete_actor_with_stale_version(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+        test_actor = actor_repository.domain_actors[2]
+
+        with pytest.raises(exceptions.ActorVersionMismatchError):
+            mapper_under_test.delete_actor(test_actor.actor_id, [0])
+
+        assert mapper_under_test.read_actor(test_actor.actor_id) == test_actor
+
+    def test_update_missing_actor(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        with pytest.raises(exceptions.ActorNotFoundError):
+            mapper_under_test.update_actor(0, first_name="")
+
     def test_update_missing_actor_first_name(
         self, mapper_under_test: queries.SQLAlchemyActorMapper
     ):
@@ -174,3 +321,203 @@ class TestSQLAlchemyActorMapper:
     ):
         with pytest.raises(exceptions.ActorNotFoundError):
             mapper_under_test.delete_actor(0)
+
+    def test_delete_actors_return_value(
+        self, mapper_under_test: queries.SQLAlchemyActorMapper
+    ):
+        actor_repository = TestActorRepository()
+
+        deleted_actor = actor_repository.domain_actors.pop()
+        deleted_actor_ids = mapper_under_test.delete_actors([0, deleted_actor.actor_id])
+
+        assert deleted_actor_ids == [deleted_actor.actor_id]
+
+        with pytest.raises(exceptions.ActorNotFoundError):
+            mapper_under_test.read_actor(deleted_actor.actor_id)
+
+    def test_delete_actor(self, mapper_under_test: queries.SQLAlchemyActorMapper):
+        actor_repository = TestActorRepository()
+
+        deleted_actor = actor_repository.domain_actors.pop()
+        mapper_under_test.delete_actor(deleted_actor.actor_id)
+
+        with pytest.raises(exceptions.ActorNotFoundError):
+            mapper_under_test.read_actor(deleted_actor.actor_id)
+
+    @pytest.fixture(name="searched_actors", scope="class")
+    def create_searched_actors(self, mapper_under_test: queries.SQLAlchemyActorMapper):
+        """Creates actors whose names match the query `search` in every rank, best first."""
+
+        return mapper_under_test.create_actors(
+            [
+                ("Search", "Exact"),
+                ("Marla", "Searchwell"),
+                ("Searchlight", "Doe"),
+                ("Anna", "Researcher"),
+            ]
+        )
+
+    @pytest.mark.repeated_statements
+    def test_search_actors_ranks_and_continues(
+        self,
+        mapper_under_test: queries.SQLAlchemyActorMapper,
+        searched_actors: list[service.Actor],
+    ):
+        page = mapper_under_test.search_actors("SEARCH", 2)
+
+        assert page.actors == searched_actors[:2]
+        assert page.next_key == (
+            statements.LAST_NAME_PREFIX_MATCH,
+            searched_actors[1].actor_id,
+        )
+
+        page = mapper_under_test.search_actors("SEARCH", 2, after=page.next_key)
+
+        assert page == service.ActorSearchPage(searched_actors[2:], None)
+
+    def test_search_actors_by_prefix(
+        self,
+        mapper_under_test: queries.SQLAlchemyActorMapper,
+        searched_actors: list[service.Actor],
+    ):
+        page = mapper_under_test.search_actors("sea", 10, prefix=True)
+        expected_actors = [searched_actors[index] for index in (1, 0, 2)]
+
+        assert page == service.ActorSearchPage(expected_actors, None)
+
+    def test_search_actors_with_short_query_matches_prefixes(
+        self,
+        mapper_under_test: queries.SQLAlchemyActorMapper,
+        searched_actors: list[service.Actor],
+    ):
+        page = mapper_under_test.search_actors("re", 10)
+
+        assert page == service.ActorSearchPage(searched_actors[3:], None)
+
+    def test_search_actors_escapes_wildcards(
+        self,
+        mapper_under_test: queries.SQLAlchemyActorMapper,
+        searched_actors: list[service.Actor],
+    ):
+        assert mapper_under_test.search_actors("%a_", 10).actors == []
+
+    @pytest.fixture(name="listed_actors", scope="class")
+    def create_listed_actors(self, mapper_under_test: queries.SQLAlchemyActorMapper):
+        """Creates actors whose last names start with `Lister`."""
+
+        return mapper_under_test.create_actors(
+            [("Bea", "Lister"), ("Al", "Lister"), ("Cy", "Listerine"), ("Al", "Listo")]
+        )
+
+    @pytest.mark.repeated_statements
+    def test_filter_actors_by_last_name_prefix_in_name_order(
+        self,
+        mapper_under_test: queries.SQLAlchemyActorMapper,
+        listed_actors: list[service.Actor],
+    ):
+        actor_filter = service.ActorFilter(
+            last_name="Lister", prefix=True, order=service.ActorOrder.NAME
+        )
+        expected_actors = [listed_actors[index] for index in (1, 0, 2)]
+
+        page = mapper_under_test.filter_actors(actor_filter, 2)
+
+        assert page.actors == expected_actors[:2]
+        assert page.next_key == ("Lister", "Bea", listed_actors[0].actor_id)
+
+        page = mapper_under_test.filter_actors(actor_filter, 2, page.next_key)
+
+        assert page == service.ActorListingPage(expected_actors[2:], None)
+
+    @pytest.mark.parametrize(
+        "actor_filter, indexes",
+        [
+            (service.ActorFilter(last_name="Lister"), (0, 1)),
+            (service.ActorFilter(first_name="Al"), (1, 3)),
+            (service.ActorFilter(last_name="Lister", first_name="Al"), (1,)),
+            (
+                service.ActorFilter(
+                    last_name="Lister", first_name="Al", order=service.ActorOrder.NAME
+                ),
+                (1,),
+            ),
+            (
+                service.ActorFilter(
+                    last_name="lister", prefix=True, order=service.ActorOrder.NAME
+                ),
+                (),
+            ),
+        ],
+    )
+    def test_filter_actors_return_value(
+        self,
+        mapper_under_test: queries.SQLAlchemyActorMapper,
+        listed_actors: list[service.Actor],
+        actor_filter: service.ActorFilter,
+        indexes: tuple[int, ...],
+    ):
+        page = mapper_under_test.filter_actors(actor_filter, 10)
+        expected_actors = [listed_actors[index] for index in indexes]
+
+        assert page == service.ActorListingPage(expected_actors, None)
+
+    @pytest.mark.parametrize(
+        "actor_filter",
+        [
+            service.ActorFilter(last_name="Lister", prefix=True),
+            service.ActorFilter(first_name="Al", order=service.ActorOrder.NAME),
+            service.ActorFilter(
+                last_name="Lister",
+                first_name="Al",
+                prefix=True,
+                order=service.ActorOrder.NAME,
+            ),
+        ],
+    )
+    def test_filter_actors_with_unsupported_filter(
+        self,
+        mapper_under_test: queries.SQLAlchemyActorMapper,
+        actor_filter: service.ActorFilter,
+    ):
+        with pytest.raises(statements.UnsupportedActorFilterError):
+            mapper_under_test.filter_actors(actor_filter, 10)
+
+    @pytest.mark.parametrize("batch_size", [2, queries.IMPORT_BATCH_SIZE])
+    def test_import_actors(
+        self,
+        mapper_under_test: queries.SQLAlchemyActorMapper,
+        db_session: orm.Session,
+        monkeypatch: pytest.MonkeyPatch,
+        batch_size: int,
+    ):
+        monkeypatch.setattr(queries, "IMPORT_BATCH_SIZE", batch_size)
+        last_name = f"Importer{batch_size}"
+        names = [("Ada", last_name), ("Bo", last_name), ("Cy", last_name)]
+
+        assert mapper_under_test.import_actors(iter(names)) == 3
+
+        statement = (
+            sqlalchemy.select(
+                models.actor_table.c.first_name, models.actor_table.c.last_name
+            )
+            .where(models.actor_table.c.last_name == last_name)
+            .order_by(models.actor_table.c.id)
+        )
+
+        assert [tuple(row) for row in db_session.execute(statement)] == names
+
+    def test_create_actors_with_allocated_ids(self, db_session: orm.Session):
+        reserved_ids = iter(range(10_000, 10_010))
+        id_allocator = identifiers.IdentifierAllocator(
+            lambda count: [next(reserved_ids) for _ in range(count)], 4
+        )
+        mapper_under_test = queries.SQLAlchemyActorMapper(db_session, id_allocator)
+
+        actor = mapper_under_test.create_actor("Ida", "Allocated")
+        actors = mapper_under_test.create_actors(
+            [("Al", "Allocated"), ("Lo", "Allocated")]
+        )
+
+        assert actor == service.Actor(10_000, "Ida", "Allocated", 1)
+        assert [actor.actor_id for actor in actors] == [10_001, 10_002]
+        assert mapper_under_test.read_actors_by_ids([10_001, 10_002]) == actors
@@ -0,0 +1,334 @@
+"""Query plan checks of every statement of both SQLAlchemyActorMapper implementations.
+
+Every operation of the sync and the async mapper is run on a table of `--plan-rows`
+actors, in a transaction that is rolled back afterwards. Each statement that it sends
+to the database is explained: on PostgreSQL through `EXPLAIN (FORMAT JSON)`, otherwise
+through SQLite's `EXPLAIN QUERY PLAN`. A statement fails the check if it reads the
+actor table without an index while the table holds more than `SCAN_ROW_THRESHOLD`
+actors, or if PostgreSQL estimates it to cost more than `MAX_COST`.
+
+Every method of the mapper interface must have an operation here, named after the
+method with an optional variant in brackets, so a new query cannot skip the check.
+
+SQLite tables are created in temporary files. With a PostgreSQL `--database-url`, the
+actors are added to the test database and removed afterwards; the async mapper then
+connects through asyncpg.
+"""
+
+import asyncio
+import inspect
+from typing import Any, Callable, Iterator, Sequence
+
+import pytest
+import sqlalchemy
+from sqlalchemy import event, orm
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+
+from myapi.actors import queries, service
+from myapi.async_actors import queries as async_queries
+from myapi.async_actors import service as async_service
+from myapi.shared.database import diagnostics, models
+
+# Prefix of the last names of the plan actors, used to remove them afterwards.
+MARKER = "plan-actor"
+
+SCAN_ROW_THRESHOLD = 1000
+MAX_COST = 1000
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+# Operations that read every actor on purpose.
+FULL_SCANS = {"read_actors", "stream_actors"}
+
+# SQLite has no index for LIKE patterns that are matched case-insensitively.
+SQLITE_FULL_SCANS = {"search_actors", "search_actors[prefix]"}
+
+
+def middle(actor_ids: Sequence[int]) -> int:
+    return actor_ids[len(actor_ids) // 2]
+
+
+def spread(actor_ids: Sequence[int], count: int = 100) -> Sequence[int]:
+    return actor_ids[:: max(len(actor_ids) // count, 1)][:count]
+
+
+def imported(service: Any, names: list[tuple[str, str]]) -> Any:
+    """Returns the names as the iterable that the mapper of the service imports."""
+
+    if service is not async_service:
+        return iter(names)
+
+    async def iterate_names():
+        for name in names:
+            yield name
+
+    return iterate_names()
+
+
+# The same calls serve both mappers with their service module, the async ones return
+# awaitables.
+OPERATIONS: dict[str, Callable[[Any, Any, Sequence[int]], Any]] = {
+    "create_actor": lambda mapper, service, ids: mapper.create_actor("Plan", "Actor"),
+    "create_actors": lambda mapper, service, ids: mapper.create_actors(
+        [("Plan", "Actor")] * 2
+    ),
+    "import_actors": lambda mapper, service, ids: mapper.import_actors(
+        imported(service, [("Plan", "Actor")] * 2)
+    ),
+    "read_actors": lambda mapper, service, ids: mapper.read_actors(),
+    "read_actors_page": lambda mapper, service, ids: mapper.read_actors_page(
+        100, middle(ids)
+    ),
+    "filter_actors[last_name]": lambda mapper, service, ids: mapper.filter_actors(
+        service.ActorFilter(last_name=f"{MARKER}-0500"), 100
+    ),
+    "filter_actors[first_name]": lambda mapper, service, ids: mapper.filter_actors(
+        service.ActorFilter(first_name="Plan7"), 100
+    ),
+    "filter_actors[names]": lambda mapper, service, ids: mapper.filter_actors(
+        service.ActorFilter(last_name=f"{MARKER}-0500", first_name="Plan7"), 100
+    ),
+    "filter_actors[name_order]": lambda mapper, service, ids: mapper.filter_actors(
+        service.ActorFilter(order=service.ActorOrder.NAME),
+        100,
+        (f"{MARKER}-0500", "Plan7", 0),
+    ),
+    "filter_actors[last_name_prefix]": lambda mapper, service, ids: (
+        mapper.filter_actors(
+            service.ActorFilter(
+                last_name=f"{MARKER}-05", prefix=True, order=service.ActorOrder.NAME
+            ),
+            100,
+        )
+    ),
+    "search_actors": lambda mapper, service, ids: mapper.search_actors(
+        f"{MARKER}-050", 100
+    ),
+    "search_actors[prefix]": lambda mapper, service, ids: mapper.search_actors(
+        f"{MARKER}-050", 10, prefix=True
+    ),
+    "stream_actors": lambda mapper, service, ids: mapper.stream_actors(1000),
+    "read_actor": lambda mapper, service, ids: mapper.read_actor(middle(ids)),
+    "read_actor_version": lambda mapper, service, ids: mapper.read_actor_version(
+        middle(ids)
+    ),
+    "read_actors_by_ids": lambda mapper, service, ids: mapper.read_actors_by_ids(
+        spread(ids)
+    ),
+    "update_actor": lambda mapper, service, ids: mapper.update_actor(
+        middle(ids), [1], first_name="Plan"
+    ),
+    "update_actor_first_name": lambda mapper, service, ids: (
+        mapper.update_actor_first_name(middle(ids), "Plan")
+    ),
+    "update_actor_last_name": lambda mapper, service, ids: (
+        mapper.update_actor_last_name(middle(ids), "Plan")
+    ),
+    "delete_actors": lambda mapper, service, ids: mapper.delete_actors(spread(ids)),
+    "delete_actor": lambda mapper, service, ids: mapper.delete_actor(middle(ids), [1]),
+}
+
+
+class StatementRecorder:
+    """Records the statements that an engine sends to the database."""
+
+    def __init__(self, engine: sqlalchemy.Engine) -> None:
+        self.statements: list[tuple[str, Any]] = []
+        self.recording = False
+        event.listen(engine, "before_cursor_execute", self.record)
+
+    def record(self, connection, cursor, statement, parameters, context, many):
+        if self.recording:
+            self.statements.append((statement, parameters))
+
+
+@pytest.fixture(name="plan_database", scope="module")
+def create_plan_database(
+    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
+) -> Iterator[tuple[sqlalchemy.URL, list[int]]]:
+    """Yields a database with an actor table that holds `--plan-rows` actors.
+
+    Every hundred actors share a first name, every ten a last name.
+
+    Args:
+        request (pytest.FixtureRequest): Pytest request object that gives access to the
+            command line options.
+        tmp_path_factory (pytest.TempPathFactory): Factory of temporary directories for
+            SQLite databases.
+
+    Yields:
+        tuple[sqlalchemy.URL, list[int]]: URL of the database and primary keys of its
+            actors.
+    """
+
+    rows: int = request.config.getoption("--plan-rows")
+    url = sqlalchemy.make_url(request.config.getoption("--database-url"))
+
+    if url.get_backend_name() == "sqlite":
+        url = url.set(database=str(tmp_path_factory.mktemp("plans") / "actors.db"))
+
+    engine = sqlalchemy.create_engine(url)
+    models.Actor.metadata.create_all(engine)
+    plan_actors = models.actor_table.c.last_name.startswith(MARKER)
+
+    try:
+        with engine.begin() as connection:
+            connection.execute(
+                sqlalchemy.insert(models.actor_table),
+                [
+                    {
+                        "first_name": f"Plan{index % 100}",
+                        "last_name": f"{MARKER}-{index // 10:04d}",
+                    }
+                    for index in range(rows)
+                ],
+            )
+            # The planner chooses between index and table scans by the statistics.
+            connection.exec_driver_sql("ANALYZE actor")
+            actor_ids = list(
+                connection.scalars(
+                    sqlalchemy.select(models.actor_table.c.id)
+                    .where(plan_actors)
+                    .order_by(models.actor_table.c.id)
+                )
+            )
+
+        yield url, actor_ids
+    finally:
+        with engine.begin() as connection:
+            connection.execute(sqlalchemy.delete(models.actor_table).where(plan_actors))
+
+        engine.dispose()
+
+
+def explain_sync(
+    url: sqlalchemy.URL,
+    operation: Callable[[Any, Any, Sequence[int]], Any],
+    actor_ids: list[int],
+) -> list[diagnostics.StatementPlan]:
+    engine = sqlalchemy.create_engine(url)
+    recorder = StatementRecorder(engine)
+
+    try:
+        with orm.Session(engine) as session:
+            mapper = queries.SQLAlchemyActorMapper(session)
+            recorder.recording = True
+            result = operation(mapper, service, actor_ids)
+
+            if inspect.isgenerator(result):
+                for _ in result:
+                    pass
+
+            recorder.recording = False
+            connection = session.connection()
+
+            return [
+                diagnostics.explain_statement(connection, statement, parameters)
+                for statement, parameters in recorder.statements
+            ]
+    finally:
+        engine.dispose()
+
+
+def explain_async(
+    url: sqlalchemy.URL,
+    operation: Callable[[Any, Any, Sequence[int]], Any],
+    actor_ids: list[int],
+) -> list[diagnostics.StatementPlan]:
+    async_engine = sqlalchemy_asyncio.create_async_engine(
+        url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+    )
+    recorder = StatementRecorder(async_engine.sync_engine)
+
+    async def explain() -> list[diagnostics.StatementPlan]:
+        try:
+            async with sqlalchemy_asyncio.AsyncSession(async_engine) as session:
+                mapper = async_queries.SQLAlchemyActorMapper(session)
+                recorder.recording = True
+                result = operation(mapper, async_service, actor_ids)
+
+                if inspect.isasyncgen(result):
+                    async for _ in result:
+                        pass
+                else:
+                    await result
+
+                recorder.recording = False
+                connection = await session.connection()
+
+                return [
+                    await connection.run_sync(
+                        diagnostics.explain_statement, statement, parameters
+                    )
+                    for statement, parameters in recorder.statements
+                ]
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(explain())
+
+
+def check_plans(
+    plans: list[diagnostics.StatementPlan],
+    operation: str,
+    dialect: str,
+    rows: int,
+):
+    full_scans = FULL_SCANS | (SQLITE_FULL_SCANS if dialect == "sqlite" else set())
+
+    assert plans, f"{operation} sent no statements"
+
+    if operation in full_scans:
+        return
+
+    for plan in plans:
+        if rows > SCAN_ROW_THRESHOLD:
+            assert models.actor_table.name not in plan.sequential_scans, (
+                f"{operation} scans the actor table without an index: {plan.statement}"
+            )
+
+        assert plan.cost is None or plan.cost <= MAX_COST, (
+            f"{operation} is estimated to cost {plan.cost}: {plan.statement}"
+        )
+
+
+@pytest.mark.parametrize("mapper_service", [service, async_service])
+def test_operations_cover_the_mapper_interface(mapper_service: Any):
+    # Operations are named after the method they call, variants in brackets.
+    methods = {operation.partition("[")[0] for operation in OPERATIONS}
+
+    assert methods >= mapper_service.ActorMapper.__abstractmethods__
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_actor_mapper_plans(
+    request: pytest.FixtureRequest,
+    plan_database: tuple[sqlalchemy.URL, list[int]],
+    operation: str,
+):
+    url, actor_ids = plan_database
+    plans = explain_sync(url, OPERATIONS[operation], actor_ids)
+
+    check_plans(
+        plans,
+        operation,
+        url.get_backend_name(),
+        request.config.getoption("--plan-rows"),
+    )
+
+
+@pytest.mark.parametrize("operation", OPERATIONS)
+def test_async_actor_mapper_plans(
+    request: pytest.FixtureRequest,
+    plan_database: tuple[sqlalchemy.URL, list[int]],
+    operation: str,
+):
+    url, actor_ids = plan_database
+    plans = explain_async(url, OPERATIONS[operation], actor_ids)
+
+    check_plans(
+        plans,
+        operation,
+        url.get_backend_name(),
+        request.config.getoption("--plan-rows"),
+    )
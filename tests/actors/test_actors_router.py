@@ -0,0 +1,337 @@
+"""Tests of the actor routers, mostly through the HTTP API on a SQLite database."""
+
+import json
+from unittest import mock
+
+import fastapi
+import pytest
+from fastapi import testclient
+
+from myapi import main
+from myapi.async_actors import queries as async_queries
+from myapi.async_actors import router as async_router
+from myapi.shared import payloads
+
+PREFIXES = ["/actors", "/async/actors"]
+MISSING_LAST_NAME = "last_name: Input should be a valid string"
+
+
+def test_client_does_not_change_the_application(client: testclient.TestClient):
+    assert isinstance(client.app, fastapi.FastAPI)
+    assert client.app is not main.app
+    assert main.app.router.lifespan_context is not client.app.router.lifespan_context
+
+
+def test_counters_are_exposed_as_metrics(client: testclient.TestClient):
+    client.get("/async/actors/1")
+
+    metrics = client.get("/metrics").text.splitlines()
+
+    assert any(
+        line.startswith('actor_reads{engine="async",counter="executed"} ')
+        for line in metrics
+    )
+    assert any(
+        line.startswith('database_pool_wait_seconds_count{engine="sync"} ')
+        for line in metrics
+    )
+    assert client.get("/statistics").status_code == 404
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_load_test_operations(client: testclient.TestClient, prefix: str):
+    created = client.post(f"{prefix}/", json={"first_name": "Lo", "last_name": "Ad"})
+    actor_id = created.json()["actor_id"]
+
+    read = client.get(f"{prefix}/{actor_id}")
+    patched = client.patch(f"{prefix}/{actor_id}", json={"first_name": "Load"})
+    deleted = client.delete(f"{prefix}/{actor_id}")
+
+    assert [created.status_code, read.status_code, deleted.status_code] == [200] * 3
+    assert patched.json() == {
+        "actor_id": actor_id,
+        "first_name": "Load",
+        "last_name": "Ad",
+    }
+    assert client.get(f"{prefix}/{actor_id}").status_code == 404
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_import_actors(client: testclient.TestClient, prefix: str):
+    last_name = f"Import{prefix.count('/')}"
+    body = f"first_name,last_name\nJane,{last_name}\nJohn\nJim,{last_name}\n"
+
+    imported = client.post(
+        f"{prefix}/import", content=body, headers={"content-type": "text/csv"}
+    )
+    listed = client.get(f"{prefix}/", params={"last_name": last_name})
+
+    assert imported.json() == {
+        "imported": 2,
+        "rejected": 1,
+        "lines": 4,
+        "errors": [{"line": 3, "message": MISSING_LAST_NAME}],
+    }
+    assert [actor["first_name"] for actor in listed.json()["actors"]] == [
+        "Jane",
+        "Jim",
+    ]
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_import_rejects_malformed_bodies(client: testclient.TestClient, prefix: str):
+    unsupported = client.post(
+        f"{prefix}/import", content="", headers={"content-type": "text/plain"}
+    )
+    headless = client.post(
+        f"{prefix}/import",
+        content="first_name,surname\n",
+        headers={"content-type": "text/csv"},
+    )
+
+    assert unsupported.status_code == 415
+    assert headless.status_code == 400
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_delete_actors(client: testclient.TestClient, prefix: str):
+    created = client.post(
+        f"{prefix}/bulk",
+        json=[{"first_name": "Del", "last_name": "Ete"}] * 2,
+    )
+    first_actor_id, second_actor_id = created.json()["actor_ids"]
+    client.delete(f"{prefix}/{second_actor_id}")
+
+    deleted = client.delete(
+        f"{prefix}/", params={"ids": f"{first_actor_id},{second_actor_id}"}
+    )
+
+    assert deleted.json() == {
+        "actor_ids": [first_actor_id],
+        "missing_actor_ids": [second_actor_id],
+    }
+    assert client.get(f"{prefix}/{first_actor_id}").status_code == 404
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_search_actors(client: testclient.TestClient, prefix: str):
+    query = f"Zyx{prefix.count('/')}"
+    names = [
+        {"first_name": "Ann", "last_name": f"Mc{query}"},
+        {"first_name": query, "last_name": "Exact"},
+        {"first_name": "Bob", "last_name": f"{query}son"},
+    ]
+    client.post(f"{prefix}/bulk", json=names)
+
+    first_page = client.get(f"{prefix}/search", params={"q": query, "limit": 2})
+    second_page = client.get(
+        f"{prefix}/search",
+        params={"q": query, "limit": 2, "next": first_page.json()["next"]},
+    )
+    completed = client.get(f"{prefix}/autocomplete", params={"q": query.lower()})
+    invalid_cursor = client.get(
+        f"{prefix}/search", params={"q": query, "next": "invalid"}
+    )
+
+    assert [actor["last_name"] for actor in first_page.json()["actors"]] == [
+        "Exact",
+        f"{query}son",
+    ]
+    assert [actor["last_name"] for actor in second_page.json()["actors"]] == [
+        f"Mc{query}"
+    ]
+    assert second_page.json()["next"] is None
+    assert [actor["last_name"] for actor in completed.json()["actors"]] == [
+        "Exact",
+        f"{query}son",
+    ]
+    assert invalid_cursor.status_code == 400
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_filter_actors(client: testclient.TestClient, prefix: str):
+    last_name = f"Filter{prefix.count('/')}"
+    names = [
+        {"first_name": "Cy", "last_name": f"{last_name}b"},
+        {"first_name": "Al", "last_name": f"{last_name}a"},
+        {"first_name": "Bo", "last_name": f"{last_name}a"},
+    ]
+    client.post(f"{prefix}/bulk", json=names)
+    parameters = {
+        "last_name": last_name,
+        "prefix": True,
+        "sort": "last_name,first_name",
+    }
+
+    first_page = client.get(f"{prefix}/", params={**parameters, "limit": 2})
+    second_page = client.get(
+        f"{prefix}/",
+        params={**parameters, "limit": 2, "next": first_page.json()["next"]},
+    )
+    exact = client.get(
+        f"{prefix}/", params={"last_name": f"{last_name}a", "first_name": "Bo"}
+    )
+    unsupported = client.get(
+        f"{prefix}/", params={"first_name": "Bo", "sort": "last_name,first_name"}
+    )
+
+    assert [actor["first_name"] for actor in first_page.json()["actors"]] == [
+        "Al",
+        "Bo",
+    ]
+    assert [actor["first_name"] for actor in second_page.json()["actors"]] == ["Cy"]
+    assert second_page.json()["next"] is None
+    assert [actor["first_name"] for actor in exact.json()["actors"]] == ["Bo"]
+    assert unsupported.status_code == 400
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_create_actors(client: testclient.TestClient, prefix: str):
+    created = client.post(
+        f"{prefix}/bulk",
+        json=[{"first_name": "Bu", "last_name": "Lk"}, {"first_name": "Ne"}],
+    )
+    streamed = client.post(
+        f"{prefix}/bulk",
+        content='{"first_name": "Nd", "last_name": "Json"}\n' * 2,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    actor_ids = streamed.json()["actor_ids"]
+    looked_up = client.post(f"{prefix}/lookup", json={"actor_ids": actor_ids})
+
+    assert created.status_code == 422
+    assert created.json()["detail"][0]["loc"] == ["body", 1, "last_name"]
+    assert [actor["last_name"] for actor in looked_up.json()["actors"]] == [
+        "Json",
+        "Json",
+    ]
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_create_actors_rejects_large_bodies(
+    client: testclient.TestClient, prefix: str, monkeypatch: pytest.MonkeyPatch
+):
+    too_many = client.post(
+        f"{prefix}/bulk",
+        json=[{"first_name": "Too", "last_name": "Many"}] * 10_001,
+    )
+    monkeypatch.setattr(payloads, "MAX_RECORD_BYTES", 1)
+    too_large = client.post(
+        f"{prefix}/bulk",
+        json=[{"first_name": "Too", "last_name": "Large"}] * 1000,
+    )
+    streamed = client.post(
+        f"{prefix}/bulk",
+        content=iter([b'[{"first_name": "Too", "last_name": "Large"}'] * 1000),
+    )
+
+    assert too_many.status_code == 413
+    assert too_large.json() == {
+        "detail": "A single request body must not be larger than 10000 bytes"
+    }
+    assert streamed.status_code == 413
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_conditional_requests(client: testclient.TestClient, prefix: str):
+    created = client.post(f"{prefix}/", json={"first_name": "E", "last_name": "Tag"})
+    actor_url = f"{prefix}/{created.json()['actor_id']}"
+    etag = client.get(actor_url).headers["ETag"]
+
+    not_modified = client.get(actor_url, headers={"If-None-Match": f"W/{etag}"})
+    patched = client.patch(
+        actor_url, json={"first_name": "Etag"}, headers={"If-Match": etag}
+    )
+    modified = client.get(actor_url, headers={"If-None-Match": etag})
+    conflicting_patch = client.patch(
+        actor_url, json={"first_name": "Lost"}, headers={"If-Match": etag}
+    )
+    conflicting_delete = client.delete(actor_url, headers={"If-Match": etag})
+    deleted = client.delete(actor_url, headers={"If-Match": patched.headers["ETag"]})
+
+    assert (not_modified.status_code, not_modified.headers["ETag"]) == (304, etag)
+    assert patched.headers["ETag"] != etag
+    assert modified.status_code == 200
+    assert modified.json()["first_name"] == "Etag"
+    assert modified.headers["ETag"] == patched.headers["ETag"]
+    assert conflicting_patch.status_code == conflicting_delete.status_code == 412
+    assert deleted.status_code == 200
+    assert client.get(actor_url, headers={"If-None-Match": etag}).status_code == 404
+
+
+def test_only_read_only_mappers_share_reads():
+    write_mapper = async_router.get_actor_mapper(
+        mock.Mock(), actor_cache=None, actor_writer=None, id_allocator=None
+    )
+    read_only_mapper = async_router.get_read_only_actor_mapper(
+        mock.Mock(), actor_cache=None, actor_loader=None
+    )
+
+    assert isinstance(write_mapper, async_queries.SQLAlchemyActorMapper)
+    assert write_mapper.actor_reads is None
+    assert isinstance(read_only_mapper, async_queries.SQLAlchemyActorMapper)
+    assert read_only_mapper.actor_reads is async_router.actor_reads
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_export_actors(client: testclient.TestClient, prefix: str):
+    last_name = f"Export{prefix.count('/')}"
+    created = client.post(
+        f"{prefix}/bulk",
+        json=[{"first_name": "Ex", "last_name": last_name}] * 2,
+    )
+
+    exported = client.get(f"{prefix}/export")
+    exported_csv = client.get(f"{prefix}/export", params={"format": "csv"})
+
+    records = [json.loads(line) for line in exported.text.splitlines()]
+    csv_lines = exported_csv.text.splitlines()
+    assert exported.headers["content-type"] == "application/x-ndjson"
+    assert [record for record in records if record["last_name"] == last_name] == [
+        {"actor_id": actor_id, "first_name": "Ex", "last_name": last_name}
+        for actor_id in created.json()["actor_ids"]
+    ]
+    assert csv_lines[0] == "actor_id,first_name,last_name"
+    assert len(csv_lines) == len(records) + 1
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_lookup_actors(client: testclient.TestClient, prefix: str):
+    created = client.post(
+        f"{prefix}/bulk",
+        json=[{"first_name": "Look", "last_name": "Up"}] * 2,
+    )
+    first_actor_id, second_actor_id = created.json()["actor_ids"]
+    missing_actor_id = second_actor_id + 1000
+    ids = [second_actor_id, missing_actor_id, first_actor_id, second_actor_id]
+
+    looked_up = client.post(f"{prefix}/lookup", json={"actor_ids": ids})
+    listed = client.get(f"{prefix}/", params={"ids": ",".join(map(str, ids))})
+    filtered = client.get(f"{prefix}/", params={"ids": "1", "last_name": "Up"})
+
+    assert looked_up.json() == listed.json()
+    assert [actor["actor_id"] for actor in listed.json()["actors"]] == [
+        second_actor_id,
+        first_actor_id,
+    ]
+    assert listed.json()["missing_actor_ids"] == [missing_actor_id]
+    assert filtered.status_code == 400
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+# Header values are sent as Latin-1, so the superscript two arrives as "²".
+@pytest.mark.parametrize("etag", [b'"\xb2"', b'"99999999999"', b'"%s"' % (b"1" * 5000)])
+def test_invalid_entity_tags_do_not_match(
+    client: testclient.TestClient, prefix: str, etag: bytes
+):
+    created = client.post(f"{prefix}/", json={"first_name": "In", "last_name": "Tag"})
+    actor_url = f"{prefix}/{created.json()['actor_id']}"
+
+    read = client.get(actor_url, headers={"If-None-Match": etag})
+    patched = client.patch(
+        actor_url, json={"first_name": "Lost"}, headers={"If-Match": etag}
+    )
+    deleted = client.delete(actor_url, headers={"If-Match": etag})
+
+    assert read.status_code == 200
+    assert patched.status_code == deleted.status_code == 412
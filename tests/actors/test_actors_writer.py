@@ -0,0 +1,82 @@
+import asyncio
+import pathlib
+from typing import Any, Awaitable, Callable
+
+import pytest
+import sqlalchemy
+from sqlalchemy import exc
+from sqlalchemy.ext import asyncio as sqlalchemy_asyncio
+
+from myapi.async_actors import queries, service
+from myapi.shared.database import models
+
+
+def run_with_writer(
+    database_path: pathlib.Path,
+    create: Callable[[sqlalchemy_asyncio.async_sessionmaker, Any], Awaitable[Any]],
+) -> tuple[Any, list[str]]:
+    """Runs `create` with an actor writer on a new SQLite database.
+
+    Returns:
+        tuple[Any, list[str]]: The result of `create` and the first names of all
+            actors in the database afterwards.
+    """
+
+    async def run():
+        async_engine = sqlalchemy_asyncio.create_async_engine(
+            f"sqlite+aiosqlite:///{database_path}"
+        )
+
+        try:
+            async with async_engine.begin() as connection:
+                await connection.run_sync(models.actor_table.metadata.create_all)
+
+            sessionmaker = sqlalchemy_asyncio.async_sessionmaker(async_engine)
+            actor_writer = queries.create_actor_writer(sessionmaker.begin)
+            result = await create(sessionmaker, actor_writer)
+
+            async with sessionmaker() as async_session:
+                first_names = await async_session.scalars(
+                    sqlalchemy.select(models.actor_table.c.first_name)
+                )
+
+                return result, list(first_names)
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(run())
+
+
+def test_actor_writer_fails_only_the_bad_row(tmp_path: pathlib.Path):
+    async def create_concurrently(sessionmaker, actor_writer):
+        results = await asyncio.gather(
+            *(
+                queries.SQLAlchemyActorMapper(
+                    sessionmaker(), actor_writer=actor_writer
+                ).create_actor(first_name, "Writer")
+                for first_name in ("Ada", None, "Cy")
+            ),
+            return_exceptions=True,
+        )
+
+        return results, actor_writer.statistics()["batches"]
+
+    (results, batches), first_names = run_with_writer(
+        tmp_path / "writer.db", create_concurrently
+    )
+
+    assert results[0] == service.Actor(1, "Ada", "Writer", 1)
+    assert isinstance(results[1], exc.IntegrityError)
+    assert results[2] == service.Actor(2, "Cy", "Writer", 1)
+    assert batches == 1
+    assert first_names == ["Ada", "Cy"]
+
+
+def test_actor_writer_fails_a_single_bad_row(tmp_path: pathlib.Path):
+    async def create_bad_row(sessionmaker, actor_writer):
+        with pytest.raises(exc.IntegrityError):
+            await actor_writer.write((None, "Writer"))
+
+    _, first_names = run_with_writer(tmp_path / "writer.db", create_bad_row)
+
+    assert first_names == []
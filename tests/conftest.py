@@ -4,11 +4,17 @@ from __future__ import annotations
 
 import logging
 import pathlib
+from typing import Iterator
 
 import pytest
 import sqlalchemy
+from fastapi import testclient
 from sqlalchemy import orm
 
+from myapi import local
+from myapi.shared import timing
+from myapi.shared.database import diagnostics, instrumentation
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(message)s",
@@ -16,6 +22,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def pytest_configure(config: pytest.Config):
+    config.addinivalue_line(
+        "markers", "repeated_statements: the test repeats statements on purpose"
+    )
+
+
 def pytest_addoption(parser: pytest.Parser):
     parser.addoption(
         "--database-url",
@@ -23,6 +35,37 @@ def pytest_addoption(parser: pytest.Parser):
         default="sqlite:///pytest.db",
         help="URL of the database used for tests by pytest",
     )
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        help="run the mapper benchmarks and compare them with the stored baselines",
+    )
+    parser.addoption(
+        "--benchmark-rows",
+        action="store",
+        type=lambda value: [int(rows) for rows in value.split(",")],
+        default=[1000, 100_000, 1_000_000],
+        help="comma-separated numbers of actors in the table of the mapper benchmarks",
+    )
+    parser.addoption(
+        "--benchmark-tolerance",
+        action="store",
+        type=float,
+        default=1.5,
+        help="factor by which wall time and allocations may exceed their baselines",
+    )
+    parser.addoption(
+        "--plan-rows",
+        action="store",
+        type=int,
+        default=10_000,
+        help="number of actors in the table whose query plans are checked",
+    )
+    parser.addoption(
+        "--benchmark-save",
+        action="store_true",
+        help="store the measurements of the mapper benchmarks as the new baselines",
+    )
 
 
 @pytest.fixture(scope="session")
@@ -46,6 +89,8 @@ def db_engine(request: pytest.FixtureRequest):
         )
 
     engine = sqlalchemy.create_engine(db_url, echo=True)
+    # Accounts the statements of tests that use the `strict_statements` fixture.
+    instrumentation.observe_statement_time(engine, {})
 
     yield engine
 
@@ -75,3 +120,43 @@ def db_session(db_engine: sqlalchemy.Engine):
 
     session.rollback()
     session.close()
+
+
+@pytest.fixture
+def strict_statements(request: pytest.FixtureRequest):
+    """Fails the test if it repeats a statement, see `diagnostics.check_statements`.
+
+    Only statements of engines that are observed by `observe_statement_time`, e.g.
+    `db_engine`, are checked. Mark tests that repeat statements on purpose with
+    `pytest.mark.repeated_statements`.
+    """
+
+    with timing.account(record_statements=True) as request_timing:
+        yield request_timing
+
+    if request.node.get_closest_marker("repeated_statements") is None:
+        diagnostics.check_statements(request_timing, threshold=3, strict=True)
+
+
+@pytest.fixture(name="client", scope="session")
+def get_client(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Iterator[testclient.TestClient]:
+    """Yields a client of the application on SQLite, which serves both actor routers.
+
+    The application of `myapi.local` runs on a temporary SQLite database, so its routes
+    depend on the same lifespan state as in production.
+
+    Args:
+        tmp_path_factory (pytest.TempPathFactory): Factory of temporary directories for
+            the database file.
+
+    Yields:
+        Iterator[testclient.TestClient]: The client, inside the lifespan of the
+            application.
+    """
+
+    database_path = tmp_path_factory.mktemp("router") / "actors.db"
+
+    with testclient.TestClient(local.create_app(str(database_path))) as client:
+        yield client
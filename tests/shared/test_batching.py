@@ -0,0 +1,157 @@
+import asyncio
+from typing import Union
+
+import pytest
+
+from myapi.shared import batching
+
+
+class TestBatchLoader:
+    @pytest.fixture(name="batches")
+    def get_batches(self):
+        yield []
+
+    @pytest.fixture(name="loader_under_test")
+    def get_loader_under_test(self, batches: list[list[int]]):
+        """Yields a loader that knows the values of all positive keys."""
+
+        async def load_batch(keys: list[int]) -> dict[int, str]:
+            batches.append(keys)
+            return {key: f"value {key}" for key in keys if key > 0}
+
+        yield batching.BatchLoader(load_batch, max_batch_size=3)
+
+    def test_concurrent_loads_are_batched(
+        self,
+        loader_under_test: batching.BatchLoader[int, str],
+        batches: list[list[int]],
+    ):
+        async def load_concurrently():
+            return await asyncio.gather(
+                *(loader_under_test.load(key) for key in (2, 1, 2, 0))
+            )
+
+        results = asyncio.run(load_concurrently())
+
+        assert results == ["value 2", "value 1", "value 2", None]
+        assert batches == [[2, 1, 0]]
+
+    def test_batches_are_limited_in_size(
+        self,
+        loader_under_test: batching.BatchLoader[int, str],
+        batches: list[list[int]],
+    ):
+        async def load_concurrently():
+            return await asyncio.gather(
+                *(loader_under_test.load(key) for key in range(1, 6))
+            )
+
+        asyncio.run(load_concurrently())
+
+        assert batches == [[1, 2, 3], [4, 5]]
+
+    def test_sequential_loads_are_not_batched(
+        self,
+        loader_under_test: batching.BatchLoader[int, str],
+        batches: list[list[int]],
+    ):
+        async def load_sequentially():
+            return [await loader_under_test.load(key) for key in (1, 2)]
+
+        assert asyncio.run(load_sequentially()) == ["value 1", "value 2"]
+        assert batches == [[1], [2]]
+
+    def test_exceptions_are_raised_for_all_keys(self):
+        async def load_batch(keys: list[int]) -> dict[int, str]:
+            raise ConnectionError("database unavailable")
+
+        loader_under_test = batching.BatchLoader(load_batch)
+
+        async def load_concurrently():
+            return await asyncio.gather(
+                *(loader_under_test.load(key) for key in (1, 2)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(load_concurrently())
+
+        assert all(isinstance(result, ConnectionError) for result in results)
+
+
+class TestBatchWriter:
+    @pytest.fixture(name="batches")
+    def get_batches(self):
+        yield []
+
+    @pytest.fixture(name="writer_under_test")
+    def get_writer_under_test(self, batches: list[list[int]]):
+        """Yields a writer that fails to write negative items."""
+
+        async def write_batch(items: list[int]) -> list[Union[str, Exception]]:
+            batches.append(items)
+            return [
+                f"value {item}" if item >= 0 else ValueError(f"bad item {item}")
+                for item in items
+            ]
+
+        yield batching.BatchWriter(write_batch, max_batch_size=3)
+
+    def test_concurrent_writes_are_batched(
+        self,
+        writer_under_test: batching.BatchWriter[int, str],
+        batches: list[list[int]],
+    ):
+        async def write_concurrently():
+            return await asyncio.gather(
+                *(writer_under_test.write(item) for item in (2, 1, 2))
+            )
+
+        results = asyncio.run(write_concurrently())
+
+        assert results == ["value 2", "value 1", "value 2"]
+        assert batches == [[2, 1, 2]]
+
+    def test_batches_are_limited_in_size(
+        self,
+        writer_under_test: batching.BatchWriter[int, str],
+        batches: list[list[int]],
+    ):
+        async def write_concurrently():
+            return await asyncio.gather(
+                *(writer_under_test.write(item) for item in range(5))
+            )
+
+        asyncio.run(write_concurrently())
+
+        assert batches == [[0, 1, 2], [3, 4]]
+
+    def test_failed_items_only_fail_their_callers(
+        self, writer_under_test: batching.BatchWriter[int, str]
+    ):
+        async def write_concurrently():
+            return await asyncio.gather(
+                *(writer_under_test.write(item) for item in (1, -1, 2)),
+                return_exceptions=True,
+            )
+
+        first, failed, second = asyncio.run(write_concurrently())
+
+        assert (first, second) == ("value 1", "value 2")
+        assert isinstance(failed, ValueError)
+        assert writer_under_test.statistics()["failures"] == 1
+
+    def test_exceptions_are_raised_for_all_items(self):
+        async def write_batch(items: list[int]) -> list[Union[str, Exception]]:
+            raise ConnectionError("database unavailable")
+
+        writer_under_test = batching.BatchWriter(write_batch)
+
+        async def write_concurrently():
+            return await asyncio.gather(
+                *(writer_under_test.write(item) for item in (1, 2)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(write_concurrently())
+
+        assert all(isinstance(result, ConnectionError) for result in results)
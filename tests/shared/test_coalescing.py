@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from myapi.shared import coalescing
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_are_coalesced(self):
+        single_flight: coalescing.SingleFlight[int, str] = coalescing.SingleFlight()
+        executions = []
+
+        async def read(key: int) -> str:
+            executions.append(key)
+            await asyncio.sleep(0.01)
+            return f"value {key}"
+
+        async def read_concurrently():
+            return await asyncio.gather(
+                *(
+                    single_flight.call(key, lambda key=key: read(key))
+                    for key in (1, 1, 1, 2)
+                )
+            )
+
+        results = asyncio.run(read_concurrently())
+
+        assert results == ["value 1", "value 1", "value 1", "value 2"]
+        assert executions == [1, 2]
+        assert single_flight.statistics() == {
+            "in_flight": 0,
+            "executed": 2,
+            "coalesced": 2,
+        }
+
+    def test_exceptions_are_shared(self):
+        single_flight: coalescing.SingleFlight[int, str] = coalescing.SingleFlight()
+
+        async def fail() -> str:
+            await asyncio.sleep(0.01)
+            raise LookupError("missing")
+
+        async def read_concurrently():
+            return await asyncio.gather(
+                *(single_flight.call(1, fail) for _ in range(3)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(read_concurrently())
+
+        assert all(isinstance(result, LookupError) for result in results)
+        assert single_flight.executed == 1
+
+    def test_waiting_call_executes_if_first_call_is_cancelled(self):
+        single_flight: coalescing.SingleFlight[int, str] = coalescing.SingleFlight()
+
+        async def read() -> str:
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def cancel_first_call():
+            first_call = asyncio.create_task(single_flight.call(1, read))
+            await asyncio.sleep(0)
+            second_call = asyncio.create_task(single_flight.call(1, read))
+            await asyncio.sleep(0)
+            first_call.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await first_call
+
+            return await second_call
+
+        assert asyncio.run(cancel_first_call()) == "value"
+        assert single_flight.executed == 2
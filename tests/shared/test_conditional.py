@@ -0,0 +1,46 @@
+import pytest
+
+from myapi.shared import conditional
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "expected"),
+    [
+        ('"2"', False),
+        ('W/"2"', False),
+        ('"1", "2"', False),
+        ("*", False),
+        ('"1"', True),
+        ('"x"', True),
+        ('"²"', True),
+        (f'"{"1" * 5000}"', True),
+    ],
+)
+def test_none_match(if_none_match: str, expected: bool):
+    assert conditional.none_match(if_none_match, 2) is expected
+
+
+@pytest.mark.parametrize(
+    ("if_match", "expected"),
+    [
+        (None, None),
+        ("*", None),
+        ('"2"', [2]),
+        ('"1", "2"', [1, 2]),
+        ('W/"2"', []),
+        ("2", []),
+        ('"²", "2"', [2]),
+        ('"99999999999", "2147483648", "2147483647"', [2147483647]),
+        (f'"{"1" * 5000}"', []),
+    ],
+)
+def test_expected_versions(if_match: str, expected: list[int]):
+    assert conditional.expected_versions(if_match) == expected
+
+
+def test_not_modified():
+    response = conditional.not_modified(3)
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"3"'
+    assert response.body == b""
@@ -0,0 +1,129 @@
+import logging
+
+import fastapi
+import pytest
+import sqlalchemy
+from fastapi import testclient
+
+from myapi.shared import configuration, timing
+from myapi.shared.database import diagnostics, instrumentation
+
+
+@pytest.fixture(name="engine")
+def get_engine():
+    engine = sqlalchemy.create_engine("sqlite://")
+    instrumentation.observe_statement_time(engine, {})
+
+    yield engine
+
+    engine.dispose()
+
+
+def create_app(
+    engine: sqlalchemy.Engine,
+    sample_rate: float = 0.0,
+    strict: bool = False,
+    sample: float = 0.5,
+) -> fastapi.FastAPI:
+    app = fastapi.FastAPI()
+    app.add_middleware(
+        diagnostics.StatementCheckMiddleware,
+        statement_check_configuration=configuration.StatementCheckConfiguration(
+            sample_rate=sample_rate, threshold=3, strict=strict
+        ),
+        sample=lambda: sample,
+    )
+    app.add_middleware(
+        timing.ServerTimingMiddleware,
+        server_timing_configuration=configuration.ServerTimingConfiguration(
+            enabled=True, statements=False
+        ),
+    )
+
+    @app.get("/lookups")
+    def look_up(ids: str):
+        with engine.connect() as connection:
+            for item_id in ids.split(","):
+                connection.execute(sqlalchemy.text("SELECT :id"), {"id": int(item_id)})
+
+        return {}
+
+    return app
+
+
+class TestParametersShape:
+    @pytest.mark.parametrize(
+        "parameters, shape",
+        [
+            ((1, "Actor"), "(int, str)"),
+            ({"id": 1}, "{id: int}"),
+            ([(1, "A"), (2, "B")], "2 x (int, str)"),
+            ([(1,), ("A",)], "2 x mixed"),
+        ],
+    )
+    def test_values_are_described_by_type(self, parameters, shape):
+        assert diagnostics.parameters_shape(parameters) == shape
+
+
+class TestFindRepeatedStatements:
+    def test_identical_parameters_are_flagged_at_once(self):
+        executions = [("SELECT ?", (1,)), ("SELECT ?", (1,))]
+
+        assert diagnostics.find_repeated_statements(executions, threshold=3) == [
+            diagnostics.RepeatedStatement("SELECT ?", 2, 1)
+        ]
+
+    def test_same_statements_are_flagged_from_the_threshold(self):
+        executions = [("SELECT ?", (1,)), ("SELECT ?", (2,)), ("UPDATE ?", (1,))]
+
+        assert diagnostics.find_repeated_statements(executions, threshold=3) == []
+        assert diagnostics.find_repeated_statements(executions, threshold=2) == [
+            diagnostics.RepeatedStatement("SELECT ?", 2, 0)
+        ]
+
+
+class TestStatementCheckMiddleware:
+    def test_strict_mode_raises_on_point_lookups(self, engine: sqlalchemy.Engine):
+        with testclient.TestClient(create_app(engine, strict=True)) as client:
+            client.get("/lookups", params={"ids": "1,2"})
+
+            with pytest.raises(diagnostics.RepeatedStatementsError):
+                client.get("/lookups", params={"ids": "1,2,3"})
+
+    def test_sampled_requests_log_warnings(
+        self, engine: sqlalchemy.Engine, caplog: pytest.LogCaptureFixture
+    ):
+        app = create_app(engine, sample_rate=0.6, sample=0.5)
+
+        with caplog.at_level(logging.WARNING, logger=diagnostics.__name__):
+            with testclient.TestClient(app) as client:
+                response = client.get("/lookups", params={"ids": "1,1"})
+
+        assert response.status_code == 200
+        assert "1 of them with repeated parameters" in caplog.text
+
+    def test_requests_outside_the_sample_are_not_checked(
+        self, engine: sqlalchemy.Engine, caplog: pytest.LogCaptureFixture
+    ):
+        app = create_app(engine, sample_rate=0.4, sample=0.5)
+
+        with caplog.at_level(logging.WARNING, logger=diagnostics.__name__):
+            with testclient.TestClient(app) as client:
+                client.get("/lookups", params={"ids": "1,1,1"})
+
+        assert caplog.text == ""
+
+
+class TestSlowStatementLog:
+    def test_slow_statements_are_logged_with_their_shape(
+        self, caplog: pytest.LogCaptureFixture
+    ):
+        engine = sqlalchemy.create_engine("sqlite://")
+        instrumentation.observe_statement_time(engine, {}, slow_statement_seconds=1e-9)
+
+        with caplog.at_level(logging.WARNING, logger=diagnostics.__name__):
+            with engine.connect() as connection:
+                connection.execute(sqlalchemy.text("SELECT :id"), {"id": 1})
+
+        assert "Slow statement took" in caplog.text
+        assert "SELECT ? with parameters (int)" in caplog.text
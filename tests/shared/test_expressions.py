@@ -0,0 +1,59 @@
+import sys
+
+import pytest
+import sqlalchemy
+
+from myapi.shared.database import expressions
+
+NAMES = ["Sm", "Smh", "Smi", "Smith", "Smj", "퟿", "퟿x", "", "Sn"]
+
+
+@pytest.fixture(name="names", scope="module")
+def create_names():
+    """Yields a connection to an in-memory table of names."""
+
+    engine = sqlalchemy.create_engine("sqlite://")
+    table = sqlalchemy.Table(
+        "name",
+        sqlalchemy.MetaData(),
+        sqlalchemy.Column("value", sqlalchemy.TEXT),
+    )
+
+    with engine.connect() as connection:
+        table.create(connection)
+        connection.execute(
+            sqlalchemy.insert(table), [{"value": value} for value in NAMES]
+        )
+
+        yield connection, table
+
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("Smith", "Smith%"), ("100%", "100\\%%"), ("a_b\\c", "a\\_b\\\\c%")],
+)
+def test_like_pattern(value: str, expected: str):
+    assert expressions.like_pattern(value, suffix="%") == expected
+
+
+@pytest.mark.parametrize(
+    ("prefix", "expected"),
+    [
+        ("Smi", ["Smi", "Smith"]),
+        ("S", ["Sm", "Smh", "Smi", "Smith", "Smj", "Sn"]),
+        ("퟿", ["퟿", "퟿x"]),
+        ("x", []),
+        (chr(sys.maxunicode), []),
+    ],
+)
+def test_starts_with(names, prefix: str, expected: list[str]):
+    connection, table = names
+    statement = (
+        sqlalchemy.select(table.c.value)
+        .where(expressions.starts_with(table.c.value, prefix))
+        .order_by(table.c.value)
+    )
+
+    assert list(connection.scalars(statement)) == expected
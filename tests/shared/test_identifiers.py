@@ -0,0 +1,87 @@
+import asyncio
+import itertools
+import threading
+from concurrent import futures
+
+from myapi.shared.database import identifiers
+
+
+class Sequence:
+    """Counts the reserved keys like a database sequence."""
+
+    def __init__(self) -> None:
+        self.values = itertools.count(1)
+        self.reservations: list[int] = []
+
+    def reserve(self, count: int) -> list[int]:
+        self.reservations.append(count)
+        return [next(self.values) for _ in range(count)]
+
+
+class TestIdentifierAllocator:
+    def test_keys_are_handed_out_from_blocks(self):
+        sequence = Sequence()
+        allocator_under_test = identifiers.IdentifierAllocator(sequence.reserve, 3)
+
+        allocated = [allocator_under_test.allocate() for _ in range(4)]
+
+        assert allocated == [[1], [2], [3], [4]]
+        assert sequence.reservations == [3, 3]
+        assert allocator_under_test.statistics() == {
+            "allocations": 4,
+            "blocks": 2,
+            "available": 2,
+        }
+
+    def test_allocations_may_exceed_the_block_size(self):
+        sequence = Sequence()
+        allocator_under_test = identifiers.IdentifierAllocator(sequence.reserve, 3)
+
+        assert allocator_under_test.allocate(2) == [1, 2]
+        assert allocator_under_test.allocate(5) == [3, 4, 5, 6, 7]
+        assert sequence.reservations == [3, 4]
+
+    def test_concurrent_threads_receive_unique_keys(self):
+        sequence = Sequence()
+        reserving = threading.Lock()
+
+        def reserve(count: int) -> list[int]:
+            # The allocator serializes reservations, so this lock is never contended.
+            assert reserving.acquire(blocking=False)
+
+            try:
+                return sequence.reserve(count)
+            finally:
+                reserving.release()
+
+        allocator_under_test = identifiers.IdentifierAllocator(reserve, 10)
+
+        with futures.ThreadPoolExecutor(8) as executor:
+            allocated = list(
+                executor.map(lambda _: allocator_under_test.allocate(3), range(200))
+            )
+
+        keys = [key for block in allocated for key in block]
+
+        assert sorted(keys) == list(range(1, 601))
+
+
+class TestAsyncIdentifierAllocator:
+    def test_concurrent_tasks_share_a_reservation(self):
+        sequence = Sequence()
+
+        async def reserve(count: int) -> list[int]:
+            await asyncio.sleep(0)
+            return sequence.reserve(count)
+
+        allocator_under_test = identifiers.AsyncIdentifierAllocator(reserve, 10)
+
+        async def allocate_concurrently():
+            return await asyncio.gather(
+                *(allocator_under_test.allocate() for _ in range(12))
+            )
+
+        allocated = asyncio.run(allocate_concurrently())
+
+        assert [key for (key,) in allocated] == list(range(1, 13))
+        assert sequence.reservations == [10, 10]
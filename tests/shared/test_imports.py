@@ -0,0 +1,113 @@
+import fastapi
+import pydantic
+import pytest
+from fastapi import testclient
+
+from myapi.shared import export, imports
+
+FIELDNAMES = ("first_name", "last_name")
+
+
+class Name(pydantic.BaseModel):
+    first_name: str
+    last_name: str
+
+
+def parse(
+    import_format: export.ExportFormat, chunks: list[bytes]
+) -> tuple[list[Name], imports.ImportReport]:
+    parser = imports.RecordParser(import_format, Name, FIELDNAMES)
+
+    return list(parser.parse(chunks)), parser.report
+
+
+def split(body: bytes, size: int) -> list[bytes]:
+    return [body[start : start + size] for start in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("size", [1, 7, 1000])
+def test_csv_lines_are_parsed_across_chunks(size: int):
+    body = 'extra,last_name,first_name\r\nx,"Doe, Jr.",Jane\r\n\r\ny,Roe,Rick'.encode()
+
+    records, report = parse(export.ExportFormat.CSV, split(body, size))
+
+    assert records == [
+        Name(first_name="Jane", last_name="Doe, Jr."),
+        Name(first_name="Rick", last_name="Roe"),
+    ]
+    assert report == imports.ImportReport(lines=4, accepted=2)
+
+
+def test_invalid_lines_are_reported():
+    body = b'{"first_name": "Jane", "last_name": "Doe"}\n{"first_name": "Rick"}\n{\n'
+
+    records, report = parse(export.ExportFormat.NDJSON, [body])
+
+    assert records == [Name(first_name="Jane", last_name="Doe")]
+    assert (report.lines, report.accepted, report.rejected) == (3, 1, 2)
+    assert [error["line"] for error in report.errors] == [2, 3]
+    assert report.errors[0]["message"] == "last_name: Field required"
+
+
+def test_invalid_csv_lines_are_reported():
+    body = b"first_name,last_name\nJane\n\xff,Doe\n"
+
+    records, report = parse(export.ExportFormat.CSV, [body])
+
+    assert records == []
+    assert report.errors == [
+        {"line": 2, "message": "last_name: Input should be a valid string"},
+        {"line": 3, "message": "Line is not valid UTF-8"},
+    ]
+
+
+def test_reported_errors_are_capped(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(imports, "MAX_IMPORT_ERRORS", 2)
+
+    _, report = parse(export.ExportFormat.NDJSON, [b"{}\n" * 5])
+
+    assert report.rejected == 5
+    assert len(report.errors) == 2
+
+
+def test_csv_header_must_name_the_fields():
+    with pytest.raises(imports.ImportFormatError, match="lacks the columns last_name"):
+        parse(export.ExportFormat.CSV, [b"first_name,surname\n"])
+
+
+def test_lines_are_limited(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(imports, "MAX_LINE_BYTES", 8)
+
+    with pytest.raises(imports.ImportFormatError, match="Line 2 is longer"):
+        parse(export.ExportFormat.NDJSON, [b"{}\n", b"{" * 9])
+
+
+def test_request_body_is_streamed_to_a_sync_path_operation():
+    app = fastapi.FastAPI()
+
+    @app.post("/import")
+    def import_names(request: fastapi.Request):
+        parser = imports.RecordParser(
+            imports.get_import_format(request), Name, FIELDNAMES
+        )
+        names = parser.parse(imports.iterate_from_thread(request.stream()))
+
+        return {"last_names": [name.last_name for name in names]}
+
+    body = b"".join(
+        b'{"first_name": "Jane", "last_name": "Doe%d"}\n' % number
+        for number in range(1000)
+    )
+
+    with testclient.TestClient(app) as client:
+        response = client.post(
+            "/import",
+            content=split(body, 1000),
+            headers={"content-type": "application/x-ndjson"},
+        )
+        unsupported = client.post(
+            "/import", content=body, headers={"content-type": "text/plain"}
+        )
+
+    assert response.json()["last_names"] == [f"Doe{number}" for number in range(1000)]
+    assert unsupported.status_code == 415
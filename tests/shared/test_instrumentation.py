@@ -0,0 +1,91 @@
+import threading
+
+import sqlalchemy
+
+from myapi.shared import statistics
+from myapi.shared.database import instrumentation
+
+
+class TestHistogram:
+    def test_observations_are_counted_cumulatively(self):
+        histogram = statistics.Histogram(buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        assert histogram.statistics() == {
+            "count": 4,
+            "sum": 2.65,
+            "le_0.1": 2,
+            "le_1": 3,
+        }
+
+
+class TestGauge:
+    def test_increments_and_decrements_of_all_threads_are_summed(self):
+        gauge = statistics.Gauge()
+        gauge.increment()
+
+        thread = threading.Thread(target=gauge.increment)
+        thread.start()
+        thread.join()
+        gauge.decrement()
+
+        assert gauge.value == 1
+
+
+class TestConnectionHoldTime:
+    def test_every_checkout_is_observed_on_checkin(self):
+        engine = sqlalchemy.create_engine("sqlite://")
+        histogram = statistics.Histogram()
+        instrumentation.observe_connection_hold_time(engine, histogram)
+
+        for _ in range(3):
+            with engine.connect() as connection:
+                connection.execute(sqlalchemy.text("SELECT 1"))
+
+        assert histogram.count == 3
+        assert histogram.sum > 0
+
+
+class TestPoolWaitTime:
+    def test_every_checkout_is_observed(self):
+        engine = sqlalchemy.create_engine("sqlite://")
+        histogram = statistics.Histogram()
+        instrumentation.observe_pool_wait_time(engine, histogram)
+
+        for _ in range(3):
+            with engine.connect() as connection:
+                connection.execute(sqlalchemy.text("SELECT 1"))
+
+        assert histogram.count == 3
+
+    def test_checkouts_of_a_recreated_pool_are_observed(self):
+        engine = sqlalchemy.create_engine("sqlite://")
+        histogram = statistics.Histogram()
+        instrumentation.observe_pool_wait_time(engine, histogram)
+
+        for _ in range(2):
+            engine.dispose()
+
+            with engine.connect() as connection:
+                connection.execute(sqlalchemy.text("SELECT 1"))
+
+        assert histogram.count == 2
+
+
+class TestStatementTime:
+    def test_statements_are_observed_by_operation(self):
+        engine = sqlalchemy.create_engine("sqlite://")
+        histograms: dict[str, statistics.Histogram] = {}
+        instrumentation.observe_statement_time(engine, histograms)
+
+        with engine.connect() as connection:
+            connection.execute(sqlalchemy.text("SELECT 1"))
+            connection.execute(sqlalchemy.text("select 2"))
+            connection.execute(sqlalchemy.text("CREATE TABLE test (id INTEGER)"))
+
+        assert {operation: h.count for operation, h in histograms.items()} == {
+            "SELECT": 2,
+            "CREATE": 1,
+        }
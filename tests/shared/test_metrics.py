@@ -0,0 +1,96 @@
+import fastapi
+from fastapi import testclient
+
+from myapi.shared import metrics, statistics
+
+
+class TestRender:
+    def test_histograms_are_rendered_cumulatively(self):
+        histogram = statistics.Histogram(buckets=(0.1, 1.0))
+        metrics.register_histogram(
+            "test_render_seconds", "Test histogram.", histogram, engine="sync"
+        )
+
+        for value in (0.05, 0.5, 2.0):
+            histogram.observe(value)
+
+        lines = metrics.render().splitlines()
+
+        assert "# TYPE test_render_seconds histogram" in lines
+        assert 'test_render_seconds_bucket{engine="sync",le="0.1"} 1' in lines
+        assert 'test_render_seconds_bucket{engine="sync",le="1.0"} 2' in lines
+        assert 'test_render_seconds_bucket{engine="sync",le="+Inf"} 3' in lines
+        assert 'test_render_seconds_sum{engine="sync"} 2.55' in lines
+        assert 'test_render_seconds_count{engine="sync"} 3' in lines
+
+    def test_histograms_added_after_registration_are_rendered(self):
+        histograms: dict[str, statistics.Histogram] = {}
+        metrics.register_histograms(
+            "test_render_labeled_seconds",
+            "Test histograms.",
+            ("operation",),
+            histograms,
+        )
+
+        histograms["SELECT"] = statistics.Histogram()
+        histograms["SELECT"].observe(0.001)
+
+        assert 'test_render_labeled_seconds_count{operation="SELECT"} 1' in (
+            metrics.render().splitlines()
+        )
+
+    def test_gauges_and_label_values_are_rendered(self):
+        gauge = statistics.Gauge()
+        metrics.register_gauge("test_render_gauge", "Test gauge.", gauge, route='a"b')
+        metrics.register_gauge("test_render_function", "Test function.", lambda: 7)
+
+        gauge.increment()
+        gauge.increment()
+        gauge.decrement()
+
+        lines = metrics.render().splitlines()
+
+        assert 'test_render_gauge{route="a\\"b"} 1' in lines
+        assert "test_render_function 7" in lines
+
+    def test_counters_are_read_whenever_they_are_rendered(self):
+        counters = {"hits": 1}
+        metrics.register_counters(
+            "test_render_counters", "Test counters.", counters.copy, engine="sync"
+        )
+
+        counters["hits"] += 1
+        counters["misses"] = 3
+
+        lines = metrics.render().splitlines()
+
+        assert "# TYPE test_render_counters gauge" in lines
+        assert 'test_render_counters{engine="sync",counter="hits"} 2' in lines
+        assert 'test_render_counters{engine="sync",counter="misses"} 3' in lines
+
+
+class TestRequestMetricsMiddleware:
+    def test_requests_are_observed_by_route_and_status(self):
+        app = fastapi.FastAPI()
+        app.add_middleware(metrics.RequestMetricsMiddleware)
+
+        @app.get("/items/{item_id}")
+        def read_item(item_id: int):
+            return {"item_id": item_id}
+
+        with testclient.TestClient(app) as client:
+            client.get("/items/1")
+            client.get("/items/2")
+            client.get("/missing")
+
+        lines = metrics.render().splitlines()
+
+        assert (
+            'http_request_duration_seconds_count{method="GET",route="/items/{item_id}",'
+            'status="200"} 2'
+        ) in lines
+        assert (
+            'http_request_duration_seconds_count{method="GET",route="unmatched",'
+            'status="404"} 1'
+        ) in lines
+        assert "http_requests_in_flight 0" in lines
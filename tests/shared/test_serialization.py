@@ -0,0 +1,69 @@
+import dataclasses
+import json
+
+import pydantic
+import pytest
+
+from myapi.actors import schemas, service
+from myapi.shared import configuration, export, serialization
+
+ACTORS = [service.Actor(1, "Penélope", "Cruz"), service.Actor(2, "Zoë", "Kravitz")]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch):
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+
+
+@pytest.mark.usefixtures("encoder")
+class TestDumps:
+    def test_actor_matches_the_response_model(self):
+        expected = schemas.ReadActorResponse.model_validate(
+            ACTORS[0], from_attributes=True
+        ).model_dump_json()
+
+        assert serialization.dumps(ACTORS[0]) == expected.encode()
+
+    def test_actors_page_matches_the_response_model(self):
+        content = {"actors": ACTORS, "next": None, "missing_actor_ids": [3]}
+        expected = pydantic.TypeAdapter(schemas.ReadActorsResponse).dump_json(
+            schemas.ReadActorsResponse.model_validate(
+                {**content, "actors": [dataclasses.asdict(actor) for actor in ACTORS]}
+            )
+        )
+
+        assert serialization.dumps(content) == expected
+
+    def test_unsupported_values_are_rejected(self):
+        with pytest.raises(TypeError):
+            serialization.dumps({"actor": object()})
+
+    def test_output_is_valid_json(self):
+        assert json.loads(serialization.dumps(ACTORS)) == [
+            {"actor_id": 1, "first_name": "Penélope", "last_name": "Cruz"},
+            {"actor_id": 2, "first_name": "Zoë", "last_name": "Kravitz"},
+        ]
+
+
+@pytest.mark.parametrize("fast_json", [True, False])
+def test_ndjson_export_chunks_are_bytes(
+    fast_json: bool, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(
+        serialization,
+        "get_serialization_configuration",
+        lambda: configuration.SerializationConfiguration(fast_json),
+    )
+
+    chunk = export.encode_records(
+        export.ExportFormat.NDJSON, ("actor_id", "last_name"), ACTORS
+    )
+
+    assert isinstance(chunk, bytes)
+    assert [json.loads(line) for line in chunk.splitlines()] == [
+        {"actor_id": 1, "last_name": "Cruz"},
+        {"actor_id": 2, "last_name": "Kravitz"},
+    ]
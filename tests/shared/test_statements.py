@@ -0,0 +1,34 @@
+import pytest
+
+from myapi.actors import service
+from myapi.async_actors import service as async_service
+from myapi.shared.database import statements
+
+
+@pytest.mark.parametrize("actor_order", [service.ActorOrder, async_service.ActorOrder])
+def test_orders_of_both_stacks(actor_order):
+    assert actor_order.ID == statements.ORDER_BY_ID
+    assert actor_order.NAME == statements.ORDER_BY_NAME
+
+
+@pytest.mark.parametrize(
+    "actor_filter",
+    [
+        service.ActorFilter(last_name="Sm", prefix=True),
+        async_service.ActorFilter(first_name="Jo", order=async_service.ActorOrder.NAME),
+    ],
+)
+def test_unsupported_filters_of_both_stacks(actor_filter):
+    with pytest.raises(statements.UnsupportedActorFilterError):
+        statements.check_actor_filter(actor_filter)
+
+
+def test_to_actors_builds_the_given_type():
+    rows = [(1, "Jo", "Smith", 2)]
+
+    assert statements.to_actors(async_service.Actor, rows) == [
+        async_service.Actor(1, "Jo", "Smith", 2)
+    ]
+    assert statements.sort_key(
+        statements.to_actors(service.Actor, rows)[0], service.ActorOrder.NAME
+    ) == ("Smith", "Jo", 1)
@@ -0,0 +1,97 @@
+import fastapi
+import pytest
+import sqlalchemy
+from fastapi import testclient
+
+from myapi.shared import configuration, statistics, timing
+from myapi.shared.database import instrumentation
+
+
+@pytest.fixture(name="engine")
+def get_engine():
+    engine = sqlalchemy.create_engine("sqlite://")
+    instrumentation.observe_statement_time(engine, {})
+    instrumentation.observe_pool_wait_time(engine, statistics.Histogram())
+
+    yield engine
+
+    engine.dispose()
+
+
+def create_app(
+    engine: sqlalchemy.Engine, statements: bool = False, enabled: bool = True
+) -> fastapi.FastAPI:
+    app = fastapi.FastAPI()
+    app.add_middleware(
+        timing.ServerTimingMiddleware,
+        server_timing_configuration=configuration.ServerTimingConfiguration(
+            enabled=enabled, statements=statements
+        ),
+    )
+    router = fastapi.APIRouter(route_class=timing.TimedRoute)
+
+    @router.get("/sync/{count}")
+    def run_statements(count: int):
+        with engine.connect() as connection:
+            for number in range(count):
+                connection.execute(sqlalchemy.text(f"SELECT {number}"))
+
+        return {"count": count}
+
+    @router.get("/async")
+    async def run_nothing():
+        return {"count": 0}
+
+    app.include_router(router, prefix="/timed")
+
+    return app
+
+
+def parse_server_timing(header: str) -> dict[str, dict[str, str]]:
+    metrics = {}
+
+    for metric in header.split(", "):
+        name, *parameters = metric.split(";")
+        metrics[name] = dict(parameter.split("=", 1) for parameter in parameters)
+
+    return metrics
+
+
+class TestServerTimingMiddleware:
+    def test_statements_and_phases_are_reported(self, engine: sqlalchemy.Engine):
+        with testclient.TestClient(create_app(engine)) as client:
+            response = client.get("/timed/sync/3")
+
+        metrics = parse_server_timing(response.headers["server-timing"])
+
+        assert response.json() == {"count": 3}
+        assert list(metrics) == ["db", "pool", "validation", "serialization", "total"]
+        assert metrics["db"]["desc"] == '"3 statements"'
+        assert float(metrics["db"]["dur"]) > 0
+        assert float(metrics["pool"]["dur"]) > 0
+        assert "x-database-statement" not in response.headers
+
+    def test_coroutine_endpoints_are_timed(self, engine: sqlalchemy.Engine):
+        with testclient.TestClient(create_app(engine)) as client:
+            response = client.get("/timed/async")
+
+        metrics = parse_server_timing(response.headers["server-timing"])
+
+        assert metrics["db"]["desc"] == '"0 statements"'
+        assert "validation" in metrics and "serialization" in metrics
+
+    def test_statements_are_listed_on_request(self, engine: sqlalchemy.Engine):
+        with testclient.TestClient(create_app(engine, statements=True)) as client:
+            response = client.get("/timed/sync/2")
+
+        assert response.headers.get_list("x-database-statement") == [
+            "SELECT 0",
+            "SELECT 1",
+        ]
+
+    def test_disabled_middleware_adds_no_header(self, engine: sqlalchemy.Engine):
+        with testclient.TestClient(create_app(engine, enabled=False)) as client:
+            response = client.get("/timed/sync/1")
+
+        assert response.json() == {"count": 1}
+        assert "server-timing" not in response.headers